@@ -2,14 +2,10 @@ import dash
 from dash import dcc, html, dash_table
 import pandas as pd
 from dash.dependencies import Input, Output, State
-from queries.store_performance import fetch_sales_data
-from queries.category_performance import fetch_subcategory_data
-from queries.brand_performance import fetch_brand_data
-from queries.product_performance import fetch_product_data
-from queries.store_performance import fetch_total_sales
 from queries.common import get_last_date
+from queries.dashboard import fetch_dashboard_bundle
 from datetime import datetime
-from queries.store_performance import fetch_sales_data, create_store_sales_chart
+from queries.store_performance import create_store_sales_chart
 from queries.category_performance import create_category_sales_chart
 from queries.brand_performance import create_brand_sales_bar_chart
 from queries.product_performance import create_product_sales_bar_chart
@@ -29,6 +25,8 @@ from playwright.async_api import async_playwright
 import psycopg2
 import uuid
 from werkzeug.serving import make_server
+from html import escape
+from plotly.offline import get_plotlyjs
 import os
 from dotenv import load_dotenv
 
@@ -753,6 +751,30 @@ async def generate_and_send_report():
 
 
 
+def split_halves(df: pd.DataFrame):
+    """Left/right halves of a table, as laid out side by side in the report."""
+    mid_index = len(df) // 2
+    return df.iloc[:mid_index], df.iloc[mid_index:]
+
+
+def build_report_sections(bundle) -> dict:
+    """
+    Tables (left and right halves) and Plotly figures for every report
+    section, from one DashboardBundle. Shared by the Dash callback and the
+    direct PDF render, so both show the same report.
+    """
+    return {
+        "store":    (*split_halves(bundle.store_data),
+                     create_store_sales_chart(bundle.store_chart, top_n=30)),
+        "category": (*split_halves(bundle.category_data),
+                     create_category_sales_chart(bundle.category_data, top_n=15)),
+        "brand":    (*split_halves(bundle.brand_data),
+                     create_brand_sales_bar_chart(bundle.brand_data, top_n=30)),
+        "product":  (*split_halves(bundle.product_data),
+                     create_product_sales_bar_chart(bundle.product_data, top_n=30)),
+    }
+
+
 @app.callback(
     [Output('store-table-left', 'data'),
      Output('store-table-right', 'data'),
@@ -781,34 +803,16 @@ def update_tables(start_date, end_date):
         if isinstance(end_date, str):
             end_date = pd.to_datetime(end_date)
             
-        # Fetch sales data
-        store_data, chart_data = fetch_sales_data(start_date, end_date)
-        mid_index_store = len(store_data) // 2
-        store_left = store_data.iloc[:mid_index_store]   
-        store_right = store_data.iloc[mid_index_store:]
-
-        fig = create_store_sales_chart(chart_data, top_n=30)
-
-        category_data = fetch_subcategory_data(start_date, end_date)
-        mid_index_category = len(category_data) // 2
-        category_left = category_data.iloc[:mid_index_category]   
-        category_right = category_data.iloc[mid_index_category:]
-        category_fig = create_category_sales_chart(category_data, top_n=15)
-        
-        brand_data = fetch_brand_data(start_date, end_date)
-        mid_index_brand = len(brand_data) // 2
-        brand_left = brand_data.iloc[:mid_index_brand]
-        brand_right = brand_data.iloc[mid_index_brand:]
-        # Fixed: Pass brand_data to the chart function
-        brand_fig = create_brand_sales_bar_chart(brand_data, top_n=30)
-        
-        product_data = fetch_product_data(start_date, end_date)
-        mid_index_product = len(product_data) // 2
-        product_left = product_data.iloc[:mid_index_product]
-        product_right = product_data.iloc[mid_index_product:]
-        product_fig = create_product_sales_bar_chart(product_data, top_n=30)
-        
-        last_date = get_last_date()
+        # One bundle: last dates resolved once, all fetches run concurrently
+        bundle = fetch_dashboard_bundle(start_date, end_date)
+        sections = build_report_sections(bundle)
+
+        store_left, store_right, fig = sections["store"]
+        category_left, category_right, category_fig = sections["category"]
+        brand_left, brand_right, brand_fig = sections["brand"]
+        product_left, product_right, product_fig = sections["product"]
+
+        last_date = bundle.last_date
         
         formatted_date = last_date.strftime('%B %d, %Y')
         date_display = html.P([
@@ -816,7 +820,7 @@ def update_tables(start_date, end_date):
             html.Span(formatted_date, style={'fontWeight': 'bold', 'fontSize': '18px', 'color': '#e74c3c'})
         ], style={'fontSize': '16px', 'color': '#2c3e50'})
 
-        total_sales, weekly_growth = fetch_total_sales()
+        total_sales, weekly_growth = bundle.total_sales, bundle.weekly_growth
         total_sales_display = f"📊 Total Sales: ₹{total_sales:,.2f}" 
 
         growth_color = "#006400" if weekly_growth > 0 else "#e74c3c"
@@ -850,13 +854,181 @@ def update_tables(start_date, end_date):
         return [], [], {}, [], [], {}, [], [], {}, [],[],{}, "Error fetching data", "N/A", "N/A"
 
 
+# =============================================================================
+# DIRECT RENDER MODE
+# -----------------------------------------------------------------------------
+# Builds the report straight from the dashboard query bundle: tables become
+# static HTML, the Plotly figures are drawn by an inlined plotly.js, and
+# Chromium prints the page from memory (page.set_content) — no Dash server,
+# no port polling, no fixed sleeps. Readiness is signalled by the data:
+# the bundle is checked before rendering, and the PDF is printed once every
+# Plotly.newPlot promise has resolved (body[data-charts-ready]).
+# Tune in your .env file:
+#   REPORT_RENDER_MODE=direct   → static HTML → PDF (default)
+#   REPORT_RENDER_MODE=dash     → previous flow: live Dash server + Playwright
+#   REPORT_RENDER_TIMEOUT=120   → seconds to wait for the charts to draw
+# =============================================================================
+
+REPORT_RENDER_MODE    = os.getenv("REPORT_RENDER_MODE", "direct").strip().lower()
+REPORT_RENDER_TIMEOUT = int(os.getenv("REPORT_RENDER_TIMEOUT", "120"))
+REPORTS_DIR           = "/home/azureuser/azure_analysis_algorithm/reports"
+
+# (section key, title, left border colour, name column, chart box style)
+REPORT_SECTIONS = [
+    ("store",    "Store Performance",    None,      "Store Name",   "width: 1500px; height: 400px;"),
+    ("category", "Category Performance", "#e67e22", "Subcategory",  "width: 700px; height: 500px;"),
+    ("brand",    "Brand Performance",    "#9b59b6", "Brand Name",   "width: 800px; height: 500px;"),
+    ("product",  "Product Performance",  "#9b59b6", "Product Name", "width: 1200px; height: 700px;"),
+]
+
+REPORT_CSS = """
+body { margin: 0; font-family: Arial, sans-serif; background: #f4f6f9; }
+.header { background: #f8f9fa; padding: 15px; margin-bottom: 20px;
+          border-bottom: 2px solid #eee; text-align: center; }
+.header h2 { color: #2c3e50; font-size: 32px; font-weight: bold; margin-bottom: 10px; }
+.header p { color: #2c3e50; font-size: 16px; }
+.header .date { font-weight: bold; font-size: 18px; color: #e74c3c; }
+.total-sales { color: #27ae60; font-size: 30px; font-weight: bold; text-align: center; }
+.growth { font-size: 20px; font-weight: bold; text-align: center; }
+.card { background: white; border-radius: 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        padding: 20px; margin: 20px 0; }
+.card + .card { page-break-before: always; }
+.card h3 { color: #2c3e50; font-size: 24px; margin-bottom: 20px; padding-bottom: 10px;
+           border-bottom: 4px solid #3498db; text-align: center; }
+.tables { display: flex; justify-content: center; gap: 20px; width: 100%; }
+.tables.beside-chart { justify-content: flex-start; gap: 10px; align-items: flex-start; }
+.report-table { flex: 1; width: 100%; border-collapse: collapse; background: white; }
+.report-table th { background: #fff3cd; font-weight: bold; border-bottom: 2px solid #dee2e6;
+                   padding: 6px; font-size: 14px; }
+.report-table td { text-align: center; padding: 6px; font-size: 14px; border: 1px solid #f0f0f0; }
+.report-table tbody tr:nth-child(even) { background: #fff9e6; }
+.report-table td.name { text-align: left; }
+.report-table td.up { color: #006400; font-weight: bold; }
+.report-table td.down { color: #e74c3c; font-weight: bold; }
+.chart { margin-top: 30px; }
+"""
+
+
+def table_html(df: pd.DataFrame, name_col: str) -> str:
+    """One half-table, styled like the Dash DataTables (arrow cells coloured)."""
+    head = "".join(f"<th>{escape(str(col))}</th>" for col in df.columns)
+    rows = []
+    for record in df.itertuples(index=False):
+        cells = []
+        for col, value in zip(df.columns, record):
+            text = str(value)
+            if col == name_col:
+                css = "name"
+            else:
+                css = "up" if "🡅" in text else "down" if "🡇" in text else ""
+            cells.append(f'<td class="{css}">{escape(text)}</td>')
+        rows.append(f"<tr>{''.join(cells)}</tr>")
+    return (f'<table class="report-table"><thead><tr>{head}</tr></thead>'
+            f'<tbody>{"".join(rows)}</tbody></table>')
+
+
+def render_report_html(bundle) -> str:
+    """The full daily report as one self-contained HTML page."""
+    sections = build_report_sections(bundle)
+
+    growth = bundle.weekly_growth
+    growth_color = "#006400" if growth > 0 else "#e74c3c"
+    parts = [
+        '<div class="header"><h2>Daily Sales Report</h2>'
+        "<p>📅 This report compares the latest available sales data with the average "
+        "sales from the previous 7 days, Update: "
+        f'<span class="date">{bundle.last_date.strftime("%B %d, %Y")}</span></p></div>',
+        f'<h4 class="total-sales">📊 Total Sales: ₹{bundle.total_sales:,.2f}</h4>',
+        f'<p class="growth" style="color: {growth_color};">📈 Avg Weekly Growth: {growth:.2f}%</p>',
+    ]
+
+    figures = []
+    for key, title, accent, name_col, chart_style in REPORT_SECTIONS:
+        left, right, fig = sections[key]
+        accent_css = f' style="border-left: 4px solid {accent}; padding-left: 10px;"' if accent else ""
+        chart = f'<div class="chart" id="chart-{key}" style="{chart_style}"></div>'
+        tables = table_html(left, name_col) + table_html(right, name_col)
+        if key == "category":
+            # Category chart sits to the right of its two tables
+            body = f'<div class="tables beside-chart">{tables}{chart}</div>'
+        else:
+            body = f'<div class="tables">{tables}</div>{chart}'
+        parts.append(f'<div class="card"><h3{accent_css}>{escape(title)}</h3>{body}</div>')
+        # "</" would end the inline <script> early
+        figures.append((f"chart-{key}", fig.to_json().replace("</", "<\\/")))
+
+    figure_js = ",".join(
+        f'["{div_id}", {fig_json}]' for div_id, fig_json in figures
+    )
+    script = f"""
+    const figures = [{figure_js}];
+    const config = {{staticPlot: true, displayModeBar: false}};
+    Promise.all(figures.map(([id, fig]) => Plotly.newPlot(id, fig.data, fig.layout, config)))
+        .then(() => {{ document.body.dataset.chartsReady = "true"; }})
+        .catch((err) => {{ document.body.dataset.chartsReady = "error: " + err; }});
+    """
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f"<style>{REPORT_CSS}</style>"
+        f"<script>{get_plotlyjs()}</script></head>"
+        f'<body>{"".join(parts)}<script>{script}</script></body></html>'
+    )
+
+
+def check_report_data(bundle):
+    """Refuse to print a report whose data did not load."""
+    empty = [name for name in ("store_data", "category_data", "brand_data", "product_data")
+             if getattr(bundle, name).empty]
+    if bundle.last_date is None or empty:
+        raise RuntimeError(f"Report data missing: {empty or 'last_date'}")
+
+
+async def save_pdf_direct():
+    """Render the report from the query bundle and print it — no Dash server."""
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    file_path = os.path.join(REPORTS_DIR, f"sales_report_{yesterday}.pdf")
+
+    # Same window the hidden date picker hands to update_tables
+    bundle = fetch_dashboard_bundle(default_start_date, default_end_date)
+    check_report_data(bundle)
+    report_html = render_report_html(bundle)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            await page.set_content(report_html, wait_until="load")
+            await page.wait_for_function(
+                "() => document.body.dataset.chartsReady !== undefined",
+                timeout=REPORT_RENDER_TIMEOUT * 1000
+            )
+            state = await page.evaluate("() => document.body.dataset.chartsReady")
+            if state != "true":
+                raise RuntimeError(f"Charts failed to render: {state}")
+
+            print("Generating PDF...")
+            await page.pdf(
+                path=file_path,
+                format="A3",
+                landscape=True,
+                margin={"top": "0mm", "bottom": "0mm", "left": "0mm", "right": "0mm"},
+                scale=1.0,
+                print_background=True
+            )
+        finally:
+            await browser.close()
+    print(f"PDF saved as {file_path}")
+    return file_path, yesterday
+
+
 def run_server():
     """Run the Dash server in a separate thread"""
     server = make_server('127.0.0.1', 8050, app.server)
     server.serve_forever()
 
-async def generate_and_send_report():
-    """Main function to orchestrate the entire process"""
+async def generate_and_send_report_dash():
+    """Previous flow: serve the Dash app, then print it with Playwright"""
     print("Starting Dash server...")
     
     # Start server in background thread
@@ -905,5 +1077,21 @@ async def generate_and_send_report():
         os._exit(0)
 
 
+async def generate_and_send_report():
+    """Main function to orchestrate the entire process"""
+    if REPORT_RENDER_MODE == "dash":
+        await generate_and_send_report_dash()
+        return
+
+    print("Generating PDF report (direct render)...")
+    await save_pdf_direct()
+
+    print("Sending email...")
+    if send_email_with_attachment():
+        print("Report generation and email sending completed successfully!")
+    else:
+        print("Error occurred during email sending")
+
+
 if __name__ == '__main__':
     asyncio.run(generate_and_send_report())
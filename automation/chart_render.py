@@ -0,0 +1,188 @@
+import atexit
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+# =============================================================================
+# REPORT CHART RENDERING
+# -----------------------------------------------------------------------------
+# Shared by weekly_reports.py and monthly_reports.py. A store's three top-10
+# bar charts are rendered in one batch (plotly.io.write_images) on a single
+# Kaleido instance that is started once per process and kept warm, instead of
+# three cold write_image calls per store. Render-pool threads take turns on
+# that instance.
+#
+# Rendered images are cached on disk under a SHA-256 of the full figure JSON
+# (x, y, labels, title and styling) plus format and scale. A chart whose data
+# did not change since the last run, e.g. the same top-10 brands with the
+# same sales, is read back instead of being rendered again. Files unused for
+# CHART_CACHE_MAX_AGE_DAYS are removed when the renderer starts.
+#
+# CHART_FORMAT=svg embeds vector SVG instead of a PNG. The PDF keeps sharp
+# text at any zoom and there is no rasterisation at scale 2, which makes
+# renders faster and files smaller. wkhtmltopdf renders data: SVG images.
+#
+# Tune in your .env file:
+#   CHART_FORMAT=png               → png | svg
+#   CHART_CACHE_DIR=chart_cache    → blank disables the disk cache
+#   CHART_CACHE_MAX_AGE_DAYS=30    → prune cached images unused this long
+# =============================================================================
+
+CHART_FORMAT             = os.getenv("CHART_FORMAT", "png").strip().lower()
+CHART_CACHE_DIR          = os.getenv("CHART_CACHE_DIR", "chart_cache").strip()
+CHART_CACHE_MAX_AGE_DAYS = float(os.getenv("CHART_CACHE_MAX_AGE_DAYS", "30"))
+CHART_SCALE              = 2
+
+MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+IMG_STYLE  = "display:block;margin:auto;width:90%;max-height:500px;"
+
+_render_lock = threading.Lock()   # one batch at a time on the warm Kaleido
+_started     = False
+
+
+def bar_chart(df, x_col, y_col, title, top_n=10):
+    """The report's modern Plotly bar chart of the top_n rows, or None if df is empty."""
+    if df.empty:
+        return None
+    df_plot = df.head(top_n)
+
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=df_plot[x_col],
+                y=df_plot[y_col],
+                text=[f"₹{v:,.0f}" for v in df_plot[y_col]],
+                textposition="outside",
+                marker=dict(color="#0078d7"),
+            )
+        ]
+    )
+    fig.update_layout(
+        title=dict(text=title, font=dict(size=18, color="#0078d7", family="Segoe UI")),
+        xaxis=dict(title="", tickangle=-45, automargin=True),
+        yaxis=dict(title="Sales (₹)", gridcolor="rgba(200,200,200,0.3)"),
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        margin=dict(l=40, r=40, t=50, b=80),
+        height=500,
+    )
+    return fig
+
+
+def chart_key(fig, fmt: str = None) -> str:
+    """Cache key: SHA-256 of the figure JSON, format and scale."""
+    fmt = fmt or CHART_FORMAT
+    payload = f"{fmt}|{CHART_SCALE}|{fig.to_json()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _start_renderer():
+    """Start the persistent Kaleido browser (Kaleido >= 1.1) and prune the cache."""
+    global _started
+    if _started:
+        return
+    _started = True
+
+    try:
+        import kaleido
+        start_server = getattr(kaleido, "start_sync_server", None)
+        if start_server:
+            start_server()
+            atexit.register(kaleido.stop_sync_server)
+    except Exception as e:
+        print(f"  ⚠️ Could not start a persistent Kaleido ({e}) — rendering per batch")
+
+    if CHART_CACHE_DIR and os.path.isdir(CHART_CACHE_DIR):
+        cutoff = time.time() - CHART_CACHE_MAX_AGE_DAYS * 86400
+        for name in os.listdir(CHART_CACHE_DIR):
+            path = os.path.join(CHART_CACHE_DIR, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _render_batch(figs: list, paths: list, fmt: str):
+    """Write each figure to its path with one Kaleido call, or one per figure on Kaleido 0.x."""
+    try:
+        pio.write_images(figs, paths, format=fmt, scale=CHART_SCALE)
+    except ValueError as e:
+        if "write_images" not in str(e):
+            raise
+        # Kaleido < 1.0 has no batch API
+        for fig, path in zip(figs, paths):
+            fig.write_image(path, format=fmt, scale=CHART_SCALE)
+
+
+def render_images(figs: list, fmt: str = None) -> list:
+    """
+    Image bytes for every figure, in order. Cached images are read from
+    CHART_CACHE_DIR and the rest are rendered in one batch and cached.
+    """
+    fmt = fmt or CHART_FORMAT
+    keys = [chart_key(fig, fmt) for fig in figs]
+
+    cache_dir = CHART_CACHE_DIR or None
+    scratch   = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    else:
+        scratch   = tempfile.TemporaryDirectory()
+        cache_dir = scratch.name
+
+    try:
+        paths   = [os.path.join(cache_dir, f"{key}.{fmt}") for key in keys]
+        missing = {}
+        for fig, path in zip(figs, paths):
+            if not os.path.exists(path):
+                missing[path] = fig          # duplicate figures render once
+            else:
+                os.utime(path)               # keep hits out of the age pruning
+
+        if missing:
+            with _render_lock:
+                _start_renderer()
+                tmp_paths = [f"{path[:-len(fmt) - 1]}.{os.getpid()}-{threading.get_ident()}.tmp.{fmt}"
+                             for path in missing]
+                _render_batch(list(missing.values()), tmp_paths, fmt)
+            for tmp_path, path in zip(tmp_paths, missing):
+                os.replace(tmp_path, path)
+
+        images = []
+        for path in paths:
+            with open(path, "rb") as f:
+                images.append(f.read())
+        return images
+    finally:
+        if scratch:
+            scratch.cleanup()
+
+
+def img_tag(image: bytes, fmt: str = None) -> str:
+    """Inline <img> with the image as a base64 data URI."""
+    fmt = fmt or CHART_FORMAT
+    encoded = base64.b64encode(image).decode("utf-8")
+    return f'<img src="data:{MIME_TYPES[fmt]};base64,{encoded}" style="{IMG_STYLE}">'
+
+
+def plot_charts(specs: list, fmt: str = None) -> list:
+    """
+    <img> HTML for each (df, x_col, y_col, title) spec, in order — "" for an
+    empty df. All charts are rendered in a single batch.
+    """
+    figs = [bar_chart(*spec) for spec in specs]
+    rendered = iter(render_images([fig for fig in figs if fig is not None], fmt))
+    return ["" if fig is None else img_tag(next(rendered), fmt) for fig in figs]
+
+
+def plot_chart(df, x_col, y_col, title, top_n=10):
+    """Generate a modern Plotly bar chart and return base64 image string."""
+    return plot_charts([(df, x_col, y_col, title, top_n)])[0]
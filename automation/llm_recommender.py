@@ -8,6 +8,11 @@ from groq import Groq
 from dotenv import load_dotenv
 from sqlalchemy.engine import Engine
 
+try:
+    from stock_store import load_stock
+except ImportError:  # imported as automation.llm_recommender (tests/)
+    from automation.stock_store import load_stock
+
 load_dotenv()
 
 # ── Config ─────────────────────────────────────────────────────────────────────
@@ -952,29 +957,15 @@ def _sb(color: str, text: str) -> str:
 
 def _load_stock_csv(store_name: str, stock_dir: str) -> pd.DataFrame:
     """
-    Load the stock CSV for a store from stock_dir.
-    Tries <store_name>.csv first (exact match), then with spaces replaced by
-    underscores to match how stock.py saves files.
-    Returns an empty DataFrame on any failure.
+    The store's stock frame from stock_dir, via the shared stock_store
+    snapshot (parsed once per CSV version, numeric columns coerced to 0.0).
+    Tries "/" replaced by "_" first, then the exact name, to match how
+    stock.py saves files. Returns an empty DataFrame on any failure.
     """
-    safe_name = store_name.replace("/", "_")
-    candidates = [
-        os.path.join(stock_dir, f"{safe_name}.csv"),
-        os.path.join(stock_dir, f"{store_name}.csv"),
-    ]
-    for path in candidates:
-        if os.path.exists(path):
-            try:
-                df = pd.read_csv(path)
-                for col in ["quantity", "sellingPrice", "costPrice", "printedMrp", "totalAmount"]:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-                return df
-            except Exception as e:
-                print(f"      ⚠️  Stock CSV read error for {store_name}: {e}")
-                return pd.DataFrame()
-    print(f"      ℹ️  No stock CSV found for {store_name} in {stock_dir} — stock insight skipped.")
-    return pd.DataFrame()
+    stock = load_stock(store_name, stock_dir)
+    if stock.path is None:
+        print(f"      ℹ️  No stock CSV found for {store_name} in {stock_dir} — stock insight skipped.")
+    return stock.frame
 
 
 def _compute_stock_intelligence(
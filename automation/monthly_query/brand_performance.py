@@ -1,58 +1,44 @@
 import pandas as pd
 from connector import get_db_connection
-from trend import get_monthly_trend_arrow  
-from monthly_query.date_utils import CURRENT_MONTH, PREVIOUS_TWO_MONTHS
+from trend import trend_arrows, format_amount
+from monthly_query.date_utils import report_month_window
 
-def brand_sales():
-    """Fetch brand sales data for February 2025 and compare to average sales of previous two months."""
+def brand_sales(window=None):
+    """
+    Fetch brand sales data for the report month and compare to average sales of
+    the previous two months (window defaults to date_utils.report_month_window()).
+    """
     engine = get_db_connection()
+    window = window or report_month_window()
 
-    last_month = "2025-05"
-
-    # Fetch total sales for February 2025
+    # Report month and the two months before it in one grouped scan
     query_sales = """
-        SELECT "brandname", SUM("sales") AS total_sales 
-        FROM brand_sales 
-        WHERE TO_CHAR("orderdate", 'YYYY-MM') = %(current_month)s
-        GROUP BY "brandname";
-    """
-    sales_df = pd.read_sql(query_sales, engine, params={'current_month': CURRENT_MONTH})
-
-
-    # Fetch total sales for the previous two months (December 2024, January 2025)
-    query_sales_previous_months = """
-        SELECT "brandname", SUM("sales") AS total_sales 
+        SELECT
+            "brandname",
+            SUM("sales") FILTER (WHERE "orderdate" >= %(current_start)s) AS total_sales,
+            SUM("sales") FILTER (WHERE "orderdate" < %(current_start)s) AS previous_sales
         FROM brand_sales
-        WHERE TO_CHAR("orderdate", 'YYYY-MM') = ANY(%(previous_two_months)s)
-        GROUP BY "brandname";
+        WHERE "orderdate" >= %(previous_start)s AND "orderdate" < %(current_end)s
+        GROUP BY "brandname"
+        HAVING COUNT(*) FILTER (WHERE "orderdate" >= %(current_start)s) > 0;
     """
-    sales_previous_months_df = pd.read_sql(query_sales_previous_months, engine, params={'previous_two_months': PREVIOUS_TWO_MONTHS})
-    # Calculate average sales for the previous two months by dividing by 2
-    avg_sales_previous_months = sales_previous_months_df.groupby('brandname')['total_sales'].sum().reset_index()
-    avg_sales_previous_months['avg_monthly_sales'] = avg_sales_previous_months['total_sales'] / 2
-    avg_sales_previous_months.drop(columns=['total_sales'], inplace=True)
-
-    engine.dispose()
+    sales_df = pd.read_sql(query_sales, engine, params=window.params())
 
-    # Merge current and previous sales data
-    sales_df = sales_df.merge(avg_sales_previous_months, on="brandname", how="left").fillna(0)
-
-    # Calculate growth trend using the specified formula
-    def calculate_growth_arrow(row):
-        if row["avg_monthly_sales"] == 0:
-            return "→ (N/A)"  # No growth calculation possible
-        change_percent = ((row["total_sales"] - row["avg_monthly_sales"]) / row["avg_monthly_sales"]) * 100
-        arrow = "🡅" if change_percent > 0 else "🡇" if change_percent < 0 else "→"
-        return f"{arrow} ({change_percent:.1f}%)"
+    # Calculate average sales for the previous two months by dividing by 2
+    sales_df['avg_monthly_sales'] = sales_df['previous_sales'] / 2
+    sales_df = sales_df[["brandname", "total_sales", "avg_monthly_sales"]].fillna(0)
 
-    sales_df["growth_arrow"] = sales_df.apply(calculate_growth_arrow, axis=1)
+    # Calculate growth trend ("→ (N/A)" when there is no previous-months baseline)
+    sales_df["growth_arrow"] = trend_arrows(
+        sales_df["total_sales"], sales_df["avg_monthly_sales"], no_baseline="→ (N/A)"
+    )
     
     # Sort by total sales in descending order and keep the top 100 brands
     sales_df = sales_df.sort_values(by="total_sales", ascending=False).head(100)
 
     # Prepare the final DataFrame with serial numbers
     sales_df.insert(0, "S.No", range(1, len(sales_df) + 1))
-    sales_df["Sales & Trend"] = sales_df.apply(lambda row: f"{row['total_sales']:,.2f} {row['growth_arrow']}", axis=1)
+    sales_df["Sales & Trend"] = format_amount(sales_df["total_sales"]) + " " + sales_df["growth_arrow"]
     result_df = sales_df[["S.No", "brandname", "Sales & Trend"]].rename(columns={"brandname": "Brand"})
 
 
@@ -1,52 +1,32 @@
 import pandas as pd
 from connector import get_db_connection
-from trend import get_monthly_trend_arrow
-from monthly_query.date_utils import CURRENT_MONTH, PREVIOUS_TWO_MONTHS
+from trend import trend_arrows
+from monthly_query.date_utils import report_month_window
 
 
-def fetch_subcategory_data_monthly():
-    """Fetch subcategory sales data for February 2025 and compare to the average of the last two months (December 2024 and January 2025)."""
+def fetch_subcategory_data_monthly(window=None):
+    """
+    Fetch subcategory sales data for the report month and compare to the average
+    of the last two months (window defaults to date_utils.report_month_window()).
+    """
     engine = get_db_connection()
+    window = window or report_month_window()
 
+    # Report month and the two months before it in one grouped scan; a
+    # subcategory seen in only one of the periods gets 0 for the other
     query = """
-    WITH monthly_sales AS (
-        SELECT 
-            "subcategoryof",
-            SUM("sales") AS total_sales
-        FROM category_sales
-        WHERE TO_CHAR("orderdate", 'YYYY-MM') = %(current_month)s
-        GROUP BY "subcategoryof"
-    ),
-    previous_two_months AS (
-        SELECT 
-            "subcategoryof",
-            SUM("sales") AS total_sales
-        FROM category_sales
-        WHERE TO_CHAR("orderdate", 'YYYY-MM') = ANY(%(previous_two_months)s)
-        GROUP BY "subcategoryof"
-    )
-    SELECT 
-        COALESCE(m."subcategoryof", p."subcategoryof") AS "subcategoryof",
-        COALESCE(m.total_sales, 0) AS total_sales,
-        COALESCE(p.total_sales / 2, 0) AS avg_sales_previous_two_months
-    FROM monthly_sales m
-    LEFT JOIN previous_two_months p ON m."subcategoryof" = p."subcategoryof"
-    
-    UNION
-    
-    SELECT 
-        p."subcategoryof",
-        0 AS total_sales,
-        p.total_sales / 2 AS avg_sales_previous_two_months
-    FROM previous_two_months p
-    LEFT JOIN monthly_sales m ON p."subcategoryof" = m."subcategoryof"
-    WHERE m."subcategoryof" IS NULL
-    
+    SELECT
+        "subcategoryof",
+        COALESCE(SUM("sales") FILTER (WHERE "orderdate" >= %(current_start)s), 0) AS total_sales,
+        COALESCE(SUM("sales") FILTER (WHERE "orderdate" < %(current_start)s) / 2, 0)
+            AS avg_sales_previous_two_months
+    FROM category_sales
+    WHERE "orderdate" >= %(previous_start)s AND "orderdate" < %(current_end)s
+    GROUP BY "subcategoryof"
     ORDER BY total_sales DESC;
-    """ 
+    """
 
-    df = pd.read_sql(query, engine, params={'current_month': CURRENT_MONTH, 'previous_two_months': PREVIOUS_TWO_MONTHS})
-    engine.dispose()
+    df = pd.read_sql(query, engine, params=window.params())
 
     if df.empty:
         return pd.DataFrame(columns=["S.No", "Subcategory", "Sales"])
@@ -55,15 +35,10 @@ def fetch_subcategory_data_monthly():
     print("Total Sales and Average Sales for Comparison:")
     print(df[['subcategoryof', 'total_sales', 'avg_sales_previous_two_months']])
 
-    # Calculate trend comparison
-    def calculate_growth_arrow(row):
-        if row["avg_sales_previous_two_months"] == 0:
-            return "→ (N/A)"  # No growth calculation possible
-        change_percent = ((row["total_sales"] - row["avg_sales_previous_two_months"]) / row["avg_sales_previous_two_months"]) * 100
-        arrow = "🡅" if change_percent > 0 else "🡇" if change_percent < 0 else "→"
-        return f"{arrow} ({change_percent:.1f}%)"
-
-    df["salesTrend"] = df.apply(calculate_growth_arrow, axis=1)
+    # Calculate trend comparison ("→ (N/A)" when there is no previous-months baseline)
+    df["salesTrend"] = trend_arrows(
+        df["total_sales"], df["avg_sales_previous_two_months"], no_baseline="→ (N/A)"
+    )
     df["total_sales"] = df["total_sales"].round(2).astype(str) + " " + df["salesTrend"]
 
     # Add Serial Number column
@@ -8,5 +8,4 @@ def get_last_date():
     FROM sales_data
     """
     df = pd.read_sql(query, engine)
-    engine.dispose()
     return df['last_date'].iloc[0]
\ No newline at end of file
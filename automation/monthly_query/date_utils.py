@@ -1,5 +1,66 @@
-# Define the current month for which sales data is being fetched
-CURRENT_MONTH = "2025-09"
+import os
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple
 
-# Define the previous two months for comparison
-PREVIOUS_TWO_MONTHS = ["2025-07", "2025-08"]
\ No newline at end of file
+import pandas as pd
+from connector import get_db_connection
+
+
+# =============================================================================
+# MONTH WINDOWS
+# -----------------------------------------------------------------------------
+# The monthly tables compare one month against the average of the two
+# months before it. Every query filters on half-open date ranges
+#   [previous_start, current_start)  → the two comparison months
+#   [current_start,  current_end)    → the reported month
+# so the planner can use an index on the date column (or prune partitions)
+# instead of evaluating TO_CHAR(date, 'YYYY-MM') on every row.
+#
+# The reported month is the month of the latest billing_data orderDate,
+# unless pinned in your .env file:
+#   REPORT_MONTH=2025-09   → report on September 2025 (vs July + August)
+# =============================================================================
+
+REPORT_MONTH = os.getenv("REPORT_MONTH", "").strip()
+
+
+class MonthWindow(NamedTuple):
+    previous_start: date   # first day of the month two months back
+    current_start: date    # first day of the reported month
+    current_end: date      # first day of the month after it (exclusive)
+
+    @property
+    def current_month(self) -> str:
+        return self.current_start.strftime("%Y-%m")
+
+    @property
+    def previous_months(self) -> list:
+        return [d.strftime("%Y-%m") for d in
+                pd.date_range(self.previous_start, self.current_start, freq="MS", inclusive="left")]
+
+    def params(self) -> dict:
+        """Query parameters for %(previous_start)s / %(current_start)s / %(current_end)s."""
+        return self._asdict()
+
+
+def month_window(month) -> MonthWindow:
+    """Window for a month given as "YYYY-MM", a date or a Timestamp."""
+    start = pd.Timestamp(month).to_period("M").start_time
+    return MonthWindow(
+        previous_start=(start - pd.DateOffset(months=2)).date(),
+        current_start=start.date(),
+        current_end=(start + pd.DateOffset(months=1)).date(),
+    )
+
+
+@lru_cache(maxsize=1)
+def report_month_window() -> MonthWindow:
+    """REPORT_MONTH if set, otherwise the month of the latest loaded orderDate."""
+    if REPORT_MONTH:
+        return month_window(REPORT_MONTH)
+    latest = pd.read_sql('SELECT MAX("orderDate") AS last_date FROM billing_data;',
+                         get_db_connection())["last_date"].iloc[0]
+    if latest is None or pd.isna(latest):
+        raise RuntimeError("billing_data is empty — set REPORT_MONTH to pick the report month")
+    return month_window(latest)
@@ -1,51 +1,36 @@
 import pandas as pd
 from connector import get_db_connection
-from trend import get_monthly_trend_arrow
-from monthly_query.date_utils import CURRENT_MONTH, PREVIOUS_TWO_MONTHS
+from trend import trend_arrows
+from monthly_query.date_utils import report_month_window
 
-def fetch_product_data_monthly():
-    """Fetch product sales data for February 2025 and compare to the average of the last two months (December 2024 and January 2025)."""
-    engine = get_db_connection()
-
-    # Fetch total sales and quantity for the current month
-    query_current_month = """
-        SELECT "productname", SUM("sales") AS total_sales, SUM("quantitysold") AS total_quantity
-        FROM product_sales
-        WHERE TO_CHAR("orderdate", 'YYYY-MM') = %(current_month)s
-        GROUP BY "productname";
+def fetch_product_data_monthly(window=None):
     """
-    current_month_df = pd.read_sql(query_current_month, engine, params={'current_month': CURRENT_MONTH})
-
-    # Fetch total sales and quantity for the previous two months
-    query_previous_months = """
-        SELECT "productname", SUM("sales") AS total_sales, SUM("quantitysold") AS total_quantity
+    Fetch product sales data for the report month and compare to the average of
+    the last two months (window defaults to date_utils.report_month_window()).
+    """
+    engine = get_db_connection()
+    window = window or report_month_window()
+
+    # Report month and the two months before it in one grouped scan
+    query = """
+        SELECT
+            "productname",
+            SUM("sales") FILTER (WHERE "orderdate" >= %(current_start)s) AS total_sales,
+            SUM("quantitysold") FILTER (WHERE "orderdate" >= %(current_start)s) AS total_quantity,
+            SUM("sales") FILTER (WHERE "orderdate" < %(current_start)s) AS previous_sales
         FROM product_sales
-        WHERE TO_CHAR("orderdate", 'YYYY-MM') = ANY(%(previous_two_months)s)
-        GROUP BY "productname";
+        WHERE "orderdate" >= %(previous_start)s AND "orderdate" < %(current_end)s
+        GROUP BY "productname"
+        HAVING COUNT(*) FILTER (WHERE "orderdate" >= %(current_start)s) > 0;
     """
-    previous_months_df = pd.read_sql(query_previous_months, engine, params={'previous_two_months': PREVIOUS_TWO_MONTHS})
-
-    # Calculate average sales and quantity for the previous two months
-    avg_previous_months = previous_months_df.groupby('productname').agg(
-        avg_sales_previous_two_months=('total_sales', 'sum'),
-        avg_quantity_previous_two_months=('total_quantity', 'sum')
-    ).reset_index()
-    avg_previous_months['avg_sales_previous_two_months'] /= 2
-
-    engine.dispose()
-
-    # Merge current and previous sales data
-    df = current_month_df.merge(avg_previous_months, on="productname", how="left").fillna(0)
+    df = pd.read_sql(query, engine, params=window.params())
 
-    # Calculate sales and quantity trends
-    def calculate_growth_arrow(row):
-        if row["avg_sales_previous_two_months"] == 0:
-            return "→ (0%)"  # Display 0% when no growth calculation is possible
-        change_percent = ((row["total_sales"] - row["avg_sales_previous_two_months"]) / row["avg_sales_previous_two_months"]) * 100
-        arrow = "🡅" if change_percent > 0 else "🡇" if change_percent < 0 else "→"
-        return f"{arrow} ({change_percent:.1f}%)"
+    # Calculate average sales for the previous two months
+    df['avg_sales_previous_two_months'] = df['previous_sales'] / 2
+    df = df[["productname", "total_sales", "total_quantity", "avg_sales_previous_two_months"]].fillna(0)
 
-    df["salesTrend"] = df.apply(calculate_growth_arrow, axis=1)
+    # Calculate sales trend ("→ (0%)" when there is no previous-months baseline)
+    df["salesTrend"] = trend_arrows(df["total_sales"], df["avg_sales_previous_two_months"])
 
     # Format display values with trends - Round sales to 2 decimal places
     df["sales_display"] = df["total_sales"].round(2).astype(str) + " " + df["salesTrend"]
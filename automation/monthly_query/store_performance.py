@@ -1,56 +1,46 @@
 import pandas as pd
 from connector import get_db_connection
-from trend import get_monthly_trend_arrow  
-from monthly_query.date_utils import CURRENT_MONTH, PREVIOUS_TWO_MONTHS
+from trend import trend_arrows, format_amount
+from monthly_query.date_utils import report_month_window
 
 
-def fetch_monthly_sales():
-    """Fetch total sales for February 2025 and calculate average monthly growth percentage from the previous two months (December 2024 and January 2025)."""
-    engine = get_db_connection()
-
-    query_sales_current_month = """
-        SELECT 
-            COUNT(DISTINCT "invoice") AS unique_invoices,
-            SUM("totalProductPrice") AS total_sales
-        FROM billing_data
-        WHERE TO_CHAR("orderDate", 'YYYY-MM') = %(current_month)s;
+def fetch_monthly_sales(window=None):
     """
-    sales_current_month_df = pd.read_sql(query_sales_current_month, engine, params={'current_month': CURRENT_MONTH})
-
-    total_unique_invoices = sales_current_month_df['unique_invoices'].iloc[0]
-    total_monthly_sales = sales_current_month_df['total_sales'].iloc[0]
-
-    # Fetch total sales for the current month
-    query_sales_february = """
-        SELECT "storeName", SUM("totalProductPrice") AS total_sales 
-        FROM billing_data 
-        WHERE TO_CHAR("orderDate", 'YYYY-MM') = %(current_month)s
-        GROUP BY "storeName";
+    Fetch total sales for the report month and calculate average monthly growth
+    percentage from the previous two months (window defaults to
+    date_utils.report_month_window()).
     """
-    sales_february_df = pd.read_sql(query_sales_february, engine, params={'current_month': CURRENT_MONTH})
-
-    # Fetch total sales for the previous two months
-    query_sales_previous_months = """
-        SELECT "storeName", SUM("totalProductPrice") AS total_sales 
-        FROM billing_data 
-        WHERE TO_CHAR("orderDate", 'YYYY-MM') IN %(previous_two_months)s
-        GROUP BY "storeName";
+    engine = get_db_connection()
+    window = window or report_month_window()
+
+    # One scan over all three months: per-store rows plus a grand-total row
+    # (the () grouping set) carrying the month's distinct invoices and sales
+    query = """
+        SELECT
+            "storeName",
+            GROUPING("storeName") AS is_total,
+            COUNT(*) FILTER (WHERE "orderDate" >= %(current_start)s) AS current_rows,
+            COUNT(DISTINCT "invoice") FILTER (WHERE "orderDate" >= %(current_start)s) AS unique_invoices,
+            SUM("totalProductPrice") FILTER (WHERE "orderDate" >= %(current_start)s) AS total_sales,
+            SUM("totalProductPrice") FILTER (WHERE "orderDate" < %(current_start)s) AS previous_sales
+        FROM billing_data
+        WHERE "orderDate" >= %(previous_start)s AND "orderDate" < %(current_end)s
+        GROUP BY GROUPING SETS (("storeName"), ());
     """
-    sales_previous_months_df = pd.read_sql(query_sales_previous_months, engine, params={'previous_two_months': tuple(PREVIOUS_TWO_MONTHS)})
-
-    avg_sales_previous_months = sales_previous_months_df.groupby('storeName')['total_sales'].sum().reset_index()
-    avg_sales_previous_months['avg_monthly_sales'] = avg_sales_previous_months['total_sales'] / 2
-    avg_sales_previous_months.drop(columns=['total_sales'], inplace=True)
-
+    df = pd.read_sql(query, engine, params=window.params())
 
-    engine.dispose()
+    totals = df[df["is_total"] == 1].iloc[0]
+    total_unique_invoices = totals['unique_invoices']
+    total_monthly_sales = totals['total_sales']
 
-    # Merge with previous sales data to avoid looping
-    sales_february_df = sales_february_df.merge(avg_sales_previous_months, on="storeName", how="left").fillna(0)
+    # Stores that sold in the report month, against half their two-month total
+    sales_february_df = df[(df["is_total"] == 0) & (df["current_rows"] > 0)].copy()
+    sales_february_df['avg_monthly_sales'] = sales_february_df['previous_sales'] / 2
+    sales_february_df = sales_february_df[["storeName", "total_sales", "avg_monthly_sales"]].fillna(0)
 
     # Calculate growth trend
-    sales_february_df["growth_arrow"] = sales_february_df.apply(
-        lambda row: get_monthly_trend_arrow(row["total_sales"], row["avg_monthly_sales"]), axis=1
+    sales_february_df["growth_arrow"] = trend_arrows(
+        sales_february_df["total_sales"], sales_february_df["avg_monthly_sales"]
     )
 
     # Sort by total sales in descending order
@@ -58,7 +48,7 @@ def fetch_monthly_sales():
 
     # Prepare final DataFrame
     sales_february_df.insert(0, "S.No", range(1, len(sales_february_df) + 1))
-    sales_february_df["Sales & Trend"] = sales_february_df.apply(lambda row: f"{row['total_sales']:,.2f} {row['growth_arrow']}", axis=1)
+    sales_february_df["Sales & Trend"] = format_amount(sales_february_df["total_sales"]) + " " + sales_february_df["growth_arrow"]
     result_df = sales_february_df[["S.No", "storeName", "Sales & Trend"]].rename(columns={"storeName": "Store"})
 
     return result_df, total_unique_invoices, total_monthly_sales
\ No newline at end of file
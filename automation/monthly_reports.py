@@ -1,11 +1,9 @@
 import pandas as pd
 import pdfkit
-import plotly.graph_objects as go
-import base64
 import os
 import time
-from io import BytesIO
 from datetime import date, timedelta
+from typing import NamedTuple
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import create_engine
 from sqlalchemy.exc import OperationalError
@@ -22,6 +20,9 @@ from llm_recommender import (
     product_recommendation,
     save_monthly_snapshot,
 )
+from report_pool import RenderPool, StageTimings
+from chart_render import plot_charts
+from report_html import df_to_html_with_stock, render_report_html, report_section
 
 load_dotenv()
 
@@ -59,6 +60,7 @@ JDBC_PROPERTIES = {
 }
 
 PDFKIT_CONFIG = pdfkit.configuration(wkhtmltopdf="/usr/bin/wkhtmltopdf")
+LOGO_SRC      = "file:///base/dir/sales_analysis_algorithm/tns.png"
 
 
 # =============================================================================
@@ -468,56 +470,27 @@ def compute_total_sales_profit(df_month) -> dict:
 
 
 # =============================================================================
-# CHART GENERATION  (Plotly — unchanged, operates on Pandas DataFrames)
+# REPORT GENERATOR
 # =============================================================================
 
-def plot_chart(df, x_col, y_col, title, top_n=10):
-    """Generate a modern Plotly bar chart and return base64 image string."""
-    if df.empty:
-        return ""
-    df_plot = df.head(top_n)
-
-    fig = go.Figure(
-        data=[
-            go.Bar(
-                x=df_plot[x_col],
-                y=df_plot[y_col],
-                text=[f"₹{v:,.0f}" for v in df_plot[y_col]],
-                textposition="outside",
-                marker=dict(color="#0078d7"),
-            )
-        ]
-    )
-    fig.update_layout(
-        title=dict(text=title, font=dict(size=18, color="#0078d7", family="Segoe UI")),
-        xaxis=dict(title="", tickangle=-45, automargin=True),
-        yaxis=dict(title="Sales (₹)", gridcolor="rgba(200,200,200,0.3)"),
-        plot_bgcolor="white",
-        paper_bgcolor="white",
-        margin=dict(l=40, r=40, t=50, b=80),
-        height=500,
-    )
-
-    buffer = BytesIO()
-    fig.write_image(buffer, format="png", scale=2)
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.read()).decode("utf-8")
-    return f'<img src="data:image/png;base64,{img_base64}" style="display:block;margin:auto;width:90%;max-height:500px;">'
+class StoreMonth(NamedTuple):
+    month_start: date
+    month_end:   date
+    comparison:  dict           # current_month_sales, prev_3_months_avg
+    brand_df:    pd.DataFrame
+    category_df: pd.DataFrame
+    product_df:  pd.DataFrame
+    financials:  dict           # compute_total_sales_profit keys
 
 
-# =============================================================================
-# REPORT GENERATOR
-# =============================================================================
-
-def generate_store_report(spark, store_name: str):
+def compute_store_month(spark, store_name: str):
     """
-    Generate monthly PDF report for one store — previous complete month.
+    Data stage for one store — previous complete month. Returns its
+    StoreMonth, or None to skip the store.
 
     Layer split:
       - Date resolution:   SQLAlchemy (single-row metadata query)
       - Data fetch + agg:  PySpark JDBC (all heavy computation)
-      - LLM calls:         Python (operates on Pandas DataFrames)
-      - Charts + HTML+PDF: Plotly + pdfkit (unchanged)
     """
 
     # ── Step 1: Resolve report month (SQLAlchemy metadata query) ─────────────
@@ -525,23 +498,51 @@ def generate_store_report(spark, store_name: str):
 
     if month_start is None:
         print(f"  ⚠️ Could not determine report month for {store_name} — skipping.")
-        return
-
-    month_start_str = month_start.strftime('%d %b %Y')
-    month_end_str   = month_end.strftime('%d %b %Y')
+        return None
 
     # ── Step 2: Load store's monthly data into Spark (one JDBC read, cached) ──
     df_month = load_store_month_data(spark, store_name, month_start, month_end)
 
     if df_month.count() == 0:
-        print(f"  ⚠️ No data found for {store_name} in {month_start_str} — skipping.")
+        print(f"  ⚠️ No data found for {store_name} in {month_start.strftime('%d %b %Y')} — skipping.")
         df_month.unpersist()
-        return
+        return None
 
     # ── Step 3: Comparison stats (current month vs prev 3-month avg) ─────────
     comparison = compute_comparison(spark, store_name, month_start)
-    current_month_sales = comparison["current_month_sales"]
-    prev_3_months_avg   = comparison["prev_3_months_avg"]
+
+    # ── Step 4: All aggregations via PySpark (reusing cached df_month) ────────
+    brand_df    = compute_brand_agg(df_month)
+    category_df = compute_category_agg(df_month)
+    product_df  = compute_product_agg(df_month)
+    financials  = compute_total_sales_profit(df_month)
+
+    # ── Step 5: Release cached Spark data — all aggregations done ─────────────
+    df_month.unpersist()
+
+    return StoreMonth(
+        month_start, month_end, comparison, brand_df, category_df, product_df, financials,
+    )
+
+
+def render_store_report(store_name: str, month: StoreMonth, timings: StageTimings = None):
+    """
+    Render and save one store's monthly PDF from its aggregates. Runs on a
+    RenderPool worker thread; each step is timed into `timings`.
+
+    Layer split:
+      - LLM calls:         Python (operates on Pandas DataFrames)
+      - Charts + HTML+PDF: Plotly + pdfkit (unchanged)
+    """
+    timings = timings or StageTimings()
+    month_start, month_end = month.month_start, month.month_end
+    brand_df, category_df, product_df = month.brand_df, month.category_df, month.product_df
+
+    month_start_str = month_start.strftime('%d %b %Y')
+    month_end_str   = month_end.strftime('%d %b %Y')
+
+    current_month_sales = month.comparison["current_month_sales"]
+    prev_3_months_avg   = month.comparison["prev_3_months_avg"]
 
     if current_month_sales > 0:
         if prev_3_months_avg > 0:
@@ -561,27 +562,19 @@ def generate_store_report(spark, store_name: str):
     else:
         comparison_text = '<div style="text-align: center; margin-top: 10px;"><span style="font-size: 18px; color: #666;">No sales data available</span></div>'
 
-    # ── Step 4: All aggregations via PySpark (reusing cached df_month) ────────
-    brand_df    = compute_brand_agg(df_month)
-    category_df = compute_category_agg(df_month)
-    product_df  = compute_product_agg(df_month)
-    financials  = compute_total_sales_profit(df_month)
-
-    total_monthly_sales       = financials["total_monthly_sales"]
-    total_monthly_cost        = financials["total_monthly_cost"]
-    total_monthly_profit      = financials["total_monthly_profit"]
-    avg_profit_margin_percent = financials["avg_profit_margin_percent"]
-
-    # ── Step 5: Release cached Spark data — all aggregations done ─────────────
-    df_month.unpersist()
+    total_monthly_sales       = month.financials["total_monthly_sales"]
+    total_monthly_profit      = month.financials["total_monthly_profit"]
+    avg_profit_margin_percent = month.financials["avg_profit_margin_percent"]
 
     # ── Step 6: LLM recommendations (Pandas DataFrames — unchanged) ──────────
     print(f"  🤖 Generating LLM recommendations for {store_name}...")
-    brand_rec    = brand_recommendation(store_name, brand_df,    total_monthly_sales, month_start=month_start, engine=engine, report_type="monthly")
-    category_rec = category_recommendation(store_name, category_df, total_monthly_sales, month_start=month_start, engine=engine, report_type="monthly")
-    product_rec  = product_recommendation(store_name, product_df,  total_monthly_sales, month_start=month_start, engine=engine, report_type="monthly")
+    with timings.stage("llm"):
+        brand_rec    = brand_recommendation(store_name, brand_df,    total_monthly_sales, month_start=month_start, engine=engine, report_type="monthly")
+        category_rec = category_recommendation(store_name, category_df, total_monthly_sales, month_start=month_start, engine=engine, report_type="monthly")
+        product_rec  = product_recommendation(store_name, product_df,  total_monthly_sales, month_start=month_start, engine=engine, report_type="monthly")
 
-    save_monthly_snapshot(store_name, month_start, brand_df, category_df, product_df, engine)
+    with timings.stage("snapshot"):
+        save_monthly_snapshot(store_name, month_start, brand_df, category_df, product_df, engine)
 
     # ── Step 7: Add % suffix AFTER LLM calls (unchanged) ─────────────────────
     for df in [brand_df, category_df, product_df]:
@@ -593,130 +586,36 @@ def generate_store_report(spark, store_name: str):
             if 'PROFIT_MARGIN' in df.columns:
                 df['PROFIT_MARGIN'] = df['PROFIT_MARGIN'].astype(str) + '%'
 
-    # ── Step 8: Charts (Plotly on Pandas — unchanged) ─────────────────────────
-    brand_chart    = plot_chart(brand_df,    "brandName",    "total_sales", "Top 10 Brands by Sales")
-    category_chart = plot_chart(category_df, "categoryName", "total_sales", "Top 10 Categories by Sales")
-    product_chart  = plot_chart(product_df,  "productName",  "total_sales", "Top 10 Products by Sales")
-
-    # ── Step 9: HTML template (unchanged) ────────────────────────────────────
-    html_template = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>{store_name} - Monthly Store Report</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', sans-serif;
-                margin: 20px;
-                background-color: #f6f8fa;
-                position: relative;
-            }}
-            .logo {{
-                position: absolute;
-                top: 40px;
-                right: 20px;
-                width: 100px;
-                height: auto;
-            }}
-            h1 {{
-                text-align: center;
-                color: #333;
-                margin-bottom: 10px;
-                padding-top: 0px;
-            }}
-            h2 {{
-                text-align: center;
-                color: #0078d7;
-                margin-bottom: 5px;
-            }}
-            .date-range {{
-                text-align: center;
-                color: #666;
-                font-size: 16px;
-                margin-bottom: 20px;
-            }}
-            .profit-section {{
-                text-align: center;
-                margin: 15px 0;
-            }}
-            .profit-label {{
-                font-size: 18px;
-                color: #666;
-                display: inline-block;
-                margin-right: 10px;
-            }}
-            .profit-value {{
-                font-size: 20px;
-                font-weight: bold;
-                color: #28a745;
-            }}
-            .profit-margin {{
-                font-size: 20px;
-                font-weight: bold;
-                color: #0078d7;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 20px;
-                background-color: white;
-                border-radius: 8px;
-                overflow: hidden;
-                box-shadow: 0 0 10px rgba(0,0,0,0.1);
-            }}
-            th, td {{
-                padding: 10px 12px;
-                text-align: left;
-                border-bottom: 1px solid #ddd;
-            }}
-            th {{
-                background-color: #0078d7;
-                color: white;
-                text-transform: uppercase;
-            }}
-            tr:hover {{ background-color: #f1f1f1; }}
-            .table-title {{
-                color: #0078d7;
-                font-size: 22px;
-                font-weight: bold;
-                text-align: center;
-                margin: 20px 0 10px;
-            }}
-        </style>
-    </head>
-    <body>
-        <img src="file:///base/dir/sales_analysis_algorithm/tns.png" class="logo" alt="Company Logo">
-        <h1>📊 Monthly Store Report – {store_name}</h1>
-        <div class="date-range">Month: {month_start_str} to {month_end_str}</div>
-        <h2>Total Monthly Sales: ₹{total_monthly_sales:,.2f}</h2>
-
-        <div class="profit-section">
-            <span class="profit-label">Total Profit:</span>
-            <span class="profit-value">₹{total_monthly_profit:,.2f}</span>
-            <span style="margin: 0 15px;">|</span>
-            <span class="profit-label">Average Profit Margin:</span>
-            <span class="profit-margin">{avg_profit_margin_percent:.2f}%</span>
-        </div>
-
-        {comparison_text}
-
-        <div class="table-title">Top 50 Brands (by Sales)</div>
-        {brand_df.to_html(index=False, classes="styled-table")}
-        {brand_chart}
-        {brand_rec}
-
-        <div class="table-title">Top 50 Categories (by Sales)</div>
-        {category_df.to_html(index=False, classes="styled-table")}
-        {category_chart}
-        {category_rec}
-
-        <div class="table-title">Top 100 Products (by Sales)</div>
-        {product_df.to_html(index=False, classes="styled-table")}
-        {product_chart}
-        {product_rec}
-    </body>
-    </html>
-    """
+    # ── Step 8: Charts (one cached Kaleido batch — chart_render.py) ───────────
+    with timings.stage("charts"):
+        brand_chart, category_chart, product_chart = plot_charts([
+            (brand_df,    "brandName",    "total_sales", "Top 10 Brands by Sales"),
+            (category_df, "categoryName", "total_sales", "Top 10 Categories by Sales"),
+            (product_df,  "productName",  "total_sales", "Top 10 Products by Sales"),
+        ])
+
+    # ── Step 9: HTML page (precompiled template — report_html.py) ────────────
+    with timings.stage("html"):
+        html_template = render_report_html(
+            store_name=store_name,
+            report_label="Monthly",
+            period_label="Month",
+            logo_src=LOGO_SRC,
+            start_str=month_start_str,
+            end_str=month_end_str,
+            total_sales=total_monthly_sales,
+            total_profit=total_monthly_profit,
+            avg_profit_margin=avg_profit_margin_percent,
+            comparison_html=comparison_text,
+            sections=[
+                report_section("Top 50 Brands (by Sales)", df_to_html_with_stock(brand_df),
+                               brand_chart, brand_rec),
+                report_section("Top 50 Categories (by Sales)", df_to_html_with_stock(category_df),
+                               category_chart, category_rec),
+                report_section("Top 100 Products (by Sales)", df_to_html_with_stock(product_df),
+                               product_chart, product_rec),
+            ],
+        )
 
     # ── Step 10: Save PDF (unchanged) ─────────────────────────────────────────
     os.makedirs("/base/dir/sales_analysis_algorithm/monthly_reports", exist_ok=True)
@@ -724,11 +623,12 @@ def generate_store_report(spark, store_name: str):
         "/base/dir/sales_analysis_algorithm/monthly_reports",
         f"{store_name.replace(' ', '_')}_monthly_report.pdf"
     )
-    pdfkit.from_string(
-        html_template, pdf_path,
-        configuration=PDFKIT_CONFIG,
-        options={"enable-local-file-access": ""}
-    )
+    with timings.stage("pdf"):
+        pdfkit.from_string(
+            html_template, pdf_path,
+            configuration=PDFKIT_CONFIG,
+            options={"enable-local-file-access": ""}
+        )
     print(f"✅ Saved {store_name} report → {pdf_path}")
 
 
@@ -738,17 +638,22 @@ def generate_store_report(spark, store_name: str):
 
 if __name__ == "__main__":
     store_names = get_unique_stores()
-    print(f"Found {len(store_names)} stores.\nGenerating reports...\n")
 
     # Start Spark once — reused across all store reports
     spark = get_spark()
 
-    for store in store_names:
-        try:
-            generate_store_report(spark, store)
-            time.sleep(1)
-        except Exception as e:
-            print(f"❌ Error generating report for {store}: {e}")
+    with RenderPool(render_store_report, "monthly") as pool:
+        print(f"Found {len(store_names)} stores.\nGenerating reports ({pool.workers} at a time)...\n")
+        # Spark stays on this thread; each store renders while the next aggregates
+        for store in store_names:
+            try:
+                with pool.timings.stage("aggregate (per store)"):
+                    month = compute_store_month(spark, store)
+            except Exception as e:
+                pool.record_failure(store, "aggregate", e)
+                continue
+            if month is not None:
+                pool.submit(store, month)
 
     spark.stop()
-    print("\n✅ All store reports generated successfully inside /monthly_reports/")
\ No newline at end of file
+    print("\n✅ All store reports generated successfully inside /monthly_reports/")
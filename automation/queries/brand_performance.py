@@ -1,19 +1,32 @@
 import pandas as pd
 from connector import get_db_connection
-from queries.trend import get_trend_arrow
+from queries.cache import cached_query
+from queries.comparison import fetch_daily_comparison
+from queries.trend import trend_arrows
 import plotly.graph_objs as go
 
-def fetch_brand_data(default_start_date=None, default_end_date=None):
-    """Fetch brand sales data dynamically from brand_sales table."""
+# brand_sales_daily_comparison columns under the live query's names
+BRAND_COMPARISON_COLUMNS = """
+    "brandname", nooforders_today AS orders_today, sales_today, aov_today,
+    avg_nooforders AS avg_orders_previous_days, avg_sales AS avg_sales_previous_days,
+    avg_aov AS avg_aov_previous_days
+"""
+
+@cached_query("brand_sales")
+def fetch_brand_data(default_start_date=None, default_end_date=None, last_date=None):
+    """
+    Fetch brand sales data dynamically from brand_sales table.
+    Pass last_date (MAX(orderdate) of brand_sales) to skip looking it up.
+    """
     engine = get_db_connection()
 
     try:
         # Get the latest available orderDate dynamically
-        last_date_query = 'SELECT MAX("orderdate") FROM brand_sales;'
-        last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
+        if last_date is None:
+            last_date_query = 'SELECT MAX("orderdate") FROM brand_sales;'
+            last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
 
         if last_date is None:
-            engine.dispose()
             return pd.DataFrame(columns=["S.No", "Brand Name", "Number of Orders", "Sales", "Average Order Value"])
 
         # Set default_end_date to the latest available orderDate
@@ -78,9 +91,10 @@ def fetch_brand_data(default_start_date=None, default_end_date=None):
             LIMIT 50;
         """
 
-        # Fixed: Use 'end_date' to match the parameter name in the query
-        df = pd.read_sql(query, engine, params={'end_date': end_date})
-        engine.dispose()
+        # Precomputed by the ETL (7-day window); live query if not refreshed yet
+        df = fetch_daily_comparison("brand_sales", BRAND_COMPARISON_COLUMNS, end_date, 7, limit=50)
+        if df is None:
+            df = pd.read_sql(query, engine, params={'end_date': end_date})
 
         if df.empty:
             return pd.DataFrame(columns=["S.No", "Brand Name", "Number of Orders", "Sales", "Average Order Value"])
@@ -109,9 +123,9 @@ def fetch_brand_data(default_start_date=None, default_end_date=None):
                 df[col] = 0
 
         # Calculate trend comparison
-        df["ordersTrend"] = df.apply(lambda row: get_trend_arrow(row["orders_today"], row["avg_orders_previous_days"]), axis=1)
-        df["salesTrend"] = df.apply(lambda row: get_trend_arrow(row["sales_today"], row["avg_sales_previous_days"]), axis=1)
-        df["AOVTrend"] = df.apply(lambda row: get_trend_arrow(row["AOV_today"], row["avg_AOV_previous_days"]), axis=1)
+        df["ordersTrend"] = trend_arrows(df["orders_today"], df["avg_orders_previous_days"])
+        df["salesTrend"] = trend_arrows(df["sales_today"], df["avg_sales_previous_days"])
+        df["AOVTrend"] = trend_arrows(df["AOV_today"], df["avg_AOV_previous_days"])
 
         # Format the display values with trend arrows
         df["orders_today"] = df["orders_today"].astype(str) + " " + df["ordersTrend"]
@@ -128,7 +142,6 @@ def fetch_brand_data(default_start_date=None, default_end_date=None):
 
     except Exception as e:
         print(f"Error in fetch_brand_data: {e}")
-        engine.dispose()
         return pd.DataFrame(columns=["S.No", "Brand Name", "Number of Orders", "Sales", "Average Order Value"])
 
 
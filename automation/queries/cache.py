@@ -0,0 +1,154 @@
+import atexit
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+from connector import get_db_connection
+
+try:
+    from monitoring.metrics import record_query_cache
+except ImportError:
+    record_query_cache = None
+
+
+# =============================================================================
+# QUERY RESULT CACHE
+# -----------------------------------------------------------------------------
+# In-process LRU + TTL cache for the queries/* fetch functions. Entries are
+# keyed on (function, arguments, MAX(orderdate) of the source table), so the
+# first call after the ETL loads a new date misses and re-queries; the TTL
+# bounds staleness when an already-loaded date is re-ingested.
+# Tune in your .env file:
+#   QUERY_CACHE_SIZE=128            → max cached results per process
+#   QUERY_CACHE_TTL=900             → seconds a result stays valid
+#   QUERY_CACHE_FRESHNESS_TTL=30    → seconds a MAX(orderdate) lookup is reused
+#
+# Empty results are not cached, so a fetch that failed (the fetch functions
+# return empty frames / zeros on error) is retried on the next call.
+#
+# A miss hands the MAX(orderdate) it looked up to the fetch function as
+# last_date, so the lookup runs once per call. If the lookup itself fails the
+# fetch runs uncached and handles the error as it always has.
+#
+# Hit/miss counts are kept per process and pushed to monitoring once at exit.
+# =============================================================================
+
+QUERY_CACHE_SIZE          = int(os.getenv("QUERY_CACHE_SIZE", "128"))
+QUERY_CACHE_TTL           = float(os.getenv("QUERY_CACHE_TTL", "900"))
+QUERY_CACHE_FRESHNESS_TTL = float(os.getenv("QUERY_CACHE_FRESHNESS_TTL", "30"))
+
+_results    = OrderedDict()   # key → (stored_at, value)
+_freshness  = {}              # table → (checked_at, max orderdate)
+_requests   = {}              # function → {"hit": n, "miss": n}
+_cache_lock = threading.Lock()
+
+
+def _latest_orderdate(table: str):
+    """MAX(orderdate) of table, re-read at most every QUERY_CACHE_FRESHNESS_TTL seconds."""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _freshness.get(table)
+        if cached and now - cached[0] < QUERY_CACHE_FRESHNESS_TTL:
+            return cached[1]
+    column = "orderDate" if table == "billing_data" else "orderdate"
+    latest = pd.read_sql(f'SELECT MAX("{column}") FROM {table};', get_db_connection()).iloc[0, 0]
+    with _cache_lock:
+        _freshness[table] = (now, latest)
+    return latest
+
+
+def _is_empty(value) -> bool:
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    if isinstance(value, tuple):
+        return all(_is_empty(v) for v in value)
+    return not value
+
+
+def _copy(value):
+    """Callers may mutate what they get back — hand out copies of cached frames."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+def _record(function: str, hit: bool):
+    with _cache_lock:
+        counts = _requests.setdefault(function, {"hit": 0, "miss": 0})
+        counts["hit" if hit else "miss"] += 1
+
+
+def query_cache_stats() -> dict:
+    """Cached fetch calls so far in this process: {function: {"hit": n, "miss": n}}."""
+    with _cache_lock:
+        return {function: dict(counts) for function, counts in _requests.items()}
+
+
+def _push_cache_stats():
+    stats = query_cache_stats()
+    if record_query_cache and stats:
+        record_query_cache(stats)
+
+
+atexit.register(_push_cache_stats)
+
+
+def cached_query(table: str):
+    """
+    Cache a fetch function's result on (arguments, MAX(orderdate) of table).
+    A last_date argument, when given, is used as the freshness
+    token directly instead of looking it up.
+    """
+    def decorator(fn):
+        name      = fn.__name__
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call   = signature.bind(*args, **kwargs)
+            latest = call.arguments.get("last_date")
+            if latest is None:
+                try:
+                    latest = _latest_orderdate(table)
+                except Exception as e:
+                    print(f"Error in {name} cache freshness check: {e}")
+                    return fn(*args, **kwargs)
+                call.arguments["last_date"] = latest
+            key = (name, args, tuple(sorted(kwargs.items())), latest)
+            now = time.monotonic()
+
+            with _cache_lock:
+                entry = _results.get(key)
+                if entry and now - entry[0] < QUERY_CACHE_TTL:
+                    _results.move_to_end(key)
+                    hit = True
+                else:
+                    _results.pop(key, None)
+                    hit = False
+            _record(name, hit)
+            if hit:
+                return _copy(entry[1])
+
+            value = fn(*call.args, **call.kwargs)
+            if not _is_empty(value):
+                with _cache_lock:
+                    _results[key] = (now, _copy(value))
+                    while len(_results) > QUERY_CACHE_SIZE:
+                        _results.popitem(last=False)
+            return value
+
+        return wrapper
+    return decorator
+
+
+def clear_query_cache():
+    """Drop every cached result and freshness lookup (hit/miss counts stay)."""
+    with _cache_lock:
+        _results.clear()
+        _freshness.clear()
@@ -1,19 +1,28 @@
 import pandas as pd
 from connector import get_db_connection
-from queries.trend import get_trend_arrow
+from queries.cache import cached_query
+from queries.comparison import fetch_daily_comparison
+from queries.trend import trend_arrows
 import plotly.graph_objs as go
 
-def fetch_subcategory_data(default_start_date=None, default_end_date=None):
-    """Fetch subcategory sales data dynamically from category_sales table."""
+# category_sales_daily_comparison columns under the live query's names
+CATEGORY_COMPARISON_COLUMNS = '"subcategoryof", sales_today, avg_sales AS avg_sales_previous_days'
+
+@cached_query("category_sales")
+def fetch_subcategory_data(default_start_date=None, default_end_date=None, last_date=None):
+    """
+    Fetch subcategory sales data dynamically from category_sales table.
+    Pass last_date (MAX(orderdate) of category_sales) to skip looking it up.
+    """
     engine = get_db_connection()
 
     try:
         # Get the latest available orderDate dynamically
-        last_date_query = 'SELECT MAX("orderdate") FROM category_sales;'
-        last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
+        if last_date is None:
+            last_date_query = 'SELECT MAX("orderdate") FROM category_sales;'
+            last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
 
         if last_date is None:
-            engine.dispose()
             return pd.DataFrame(columns=["S.No", "Subcategory", "Sales"])
 
         # Set default_end_date to the latest available orderDate
@@ -66,15 +75,16 @@ def fetch_subcategory_data(default_start_date=None, default_end_date=None):
             ORDER BY sales_today DESC;
         """
 
-        # Fixed: Use 'end_date' to match the parameter name in the query
-        df = pd.read_sql(query, engine, params={'end_date': end_date})
-        engine.dispose()
+        # Precomputed by the ETL (7-day window); live query if not refreshed yet
+        df = fetch_daily_comparison("category_sales", CATEGORY_COMPARISON_COLUMNS, end_date, 7)
+        if df is None:
+            df = pd.read_sql(query, engine, params={'end_date': end_date})
 
         if df.empty:
             return pd.DataFrame(columns=["S.No", "Subcategory", "Sales"])
 
         # Calculate trend comparison
-        df["salesTrend"] = df.apply(lambda row: get_trend_arrow(row["sales_today"], row["avg_sales_previous_days"]), axis=1)
+        df["salesTrend"] = trend_arrows(df["sales_today"], df["avg_sales_previous_days"])
         df["sales_today"] = df["sales_today"].astype(str) + " " + df["salesTrend"]
 
         # Add Serial Number column
@@ -88,7 +98,6 @@ def fetch_subcategory_data(default_start_date=None, default_end_date=None):
 
     except Exception as e:
         print(f"Error in fetch_subcategory_data: {e}")
-        engine.dispose()
         return pd.DataFrame(columns=["S.No", "Subcategory", "Sales"])
 
 
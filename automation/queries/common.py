@@ -9,5 +9,4 @@ def get_last_date():
     FROM billing_data;
     """
     df = pd.read_sql(query, engine)
-    engine.dispose()
     return df['last_date'].iloc[0]
\ No newline at end of file
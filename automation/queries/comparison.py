@@ -0,0 +1,41 @@
+import pandas as pd
+from sqlalchemy.exc import ProgrammingError
+from connector import get_db_connection
+
+
+# =============================================================================
+# DAILY COMPARISON LOOKUPS
+# -----------------------------------------------------------------------------
+# The ETL keeps <table>_daily_comparison up to date (etl/agg_insert.py,
+# refresh_daily_comparisons): per key and orderdate, the day's values, the
+# trailing ROUND(AVG, 2) over window_days days and the % change. A dashboard
+# fetch reads one (orderdate, window_days) slice of the primary key instead
+# of re-aggregating the trailing window.
+#
+# fetch_daily_comparison returns None when the table does not exist or has
+# no rows for that slice (date not refreshed yet, or a window the ETL does
+# not keep — see DAILY_COMPARISON_WINDOWS); callers then run the live query.
+# =============================================================================
+
+def fetch_daily_comparison(table: str, columns: str, end_date, window_days: int,
+                           limit: int = None):
+    """
+    SELECT `columns` from table's comparison slice for (end_date, window_days),
+    ordered by sales_today DESC. None if the slice is not precomputed.
+    """
+    query = f"""
+        SELECT {columns}
+        FROM {table}_daily_comparison
+        WHERE "orderdate" = %(end_date)s AND "window_days" = %(window_days)s
+        ORDER BY sales_today DESC
+        {f"LIMIT {int(limit)}" if limit else ""};
+    """
+    try:
+        df = pd.read_sql(query, get_db_connection(), params={
+            'end_date': end_date,
+            'window_days': int(window_days),
+        })
+    except ProgrammingError:
+        # Comparison table not created yet (ETL has not run since the upgrade)
+        return None
+    return None if df.empty else df
@@ -0,0 +1,68 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import NamedTuple
+
+from connector import get_db_connection
+from queries.store_performance import fetch_sales_data, fetch_total_sales
+from queries.category_performance import fetch_subcategory_data
+from queries.brand_performance import fetch_brand_data
+from queries.product_performance import fetch_product_data
+
+
+class DashboardBundle(NamedTuple):
+    """Everything analysis.update_tables renders, fetched in one go."""
+    last_date: date                  # MAX("orderDate") of billing_data
+    store_data: pd.DataFrame
+    store_chart: pd.DataFrame
+    category_data: pd.DataFrame
+    brand_data: pd.DataFrame
+    product_data: pd.DataFrame
+    total_sales: float
+    weekly_growth: float
+
+
+def fetch_last_dates() -> dict:
+    """Latest orderdate of every dashboard table in a single round trip."""
+    query = """
+        SELECT
+            (SELECT MAX("orderDate") FROM billing_data)   AS billing_data,
+            (SELECT MAX("orderdate") FROM store_sales)    AS store_sales,
+            (SELECT MAX("orderdate") FROM category_sales) AS category_sales,
+            (SELECT MAX("orderdate") FROM brand_sales)    AS brand_sales,
+            (SELECT MAX("orderdate") FROM product_sales)  AS product_sales;
+    """
+    return pd.read_sql(query, get_db_connection()).iloc[0].to_dict()
+
+
+def fetch_dashboard_bundle(start_date=None, end_date=None, max_workers: int = 5) -> DashboardBundle:
+    """
+    Resolve the last dates once, then run the five dashboard fetches
+    concurrently on pooled connections (see connector.DB_POOL_SIZE).
+    Wall time is roughly the slowest fetch rather than the sum of all.
+    """
+    last_dates = fetch_last_dates()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        store    = pool.submit(fetch_sales_data, start_date, end_date,
+                               last_date=last_dates["store_sales"])
+        category = pool.submit(fetch_subcategory_data, start_date, end_date,
+                               last_date=last_dates["category_sales"])
+        brand    = pool.submit(fetch_brand_data, start_date, end_date,
+                               last_date=last_dates["brand_sales"])
+        product  = pool.submit(fetch_product_data, start_date, end_date,
+                               last_date=last_dates["product_sales"])
+        totals   = pool.submit(fetch_total_sales, last_date=last_dates["store_sales"])
+
+        store_data, store_chart    = store.result()
+        total_sales, weekly_growth = totals.result()
+        return DashboardBundle(
+            last_date=last_dates["billing_data"],
+            store_data=store_data,
+            store_chart=store_chart,
+            category_data=category.result(),
+            brand_data=brand.result(),
+            product_data=product.result(),
+            total_sales=total_sales,
+            weekly_growth=weekly_growth,
+        )
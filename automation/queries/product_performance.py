@@ -1,15 +1,28 @@
 import pandas as pd
 from connector import get_db_connection
-from queries.trend import get_trend_arrow
+from queries.cache import cached_query
+from queries.comparison import fetch_daily_comparison
+from queries.trend import trend_arrows
 import plotly.graph_objs as go
 
-def fetch_product_data(default_start_date=None, default_end_date=None):
-    """Fetch product sales data dynamically from product_sales table, limited to top 100 products by sales."""
+# product_sales_daily_comparison columns under the live query's names
+PRODUCT_COMPARISON_COLUMNS = """
+    "productname", sales_today, quantitysold_today AS quantity_today,
+    avg_sales AS avg_sales_previous_days, avg_quantitysold AS avg_quantity_previous_days
+"""
+
+@cached_query("product_sales")
+def fetch_product_data(default_start_date=None, default_end_date=None, last_date=None):
+    """
+    Fetch product sales data dynamically from product_sales table, limited to top 100 products by sales.
+    Pass last_date (MAX(orderdate) of product_sales) to skip looking it up.
+    """
     engine = get_db_connection()
 
     # Get the latest available orderDate dynamically
-    last_date_query = 'SELECT MAX("orderdate") FROM "product_sales";'
-    last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
+    if last_date is None:
+        last_date_query = 'SELECT MAX("orderdate") FROM "product_sales";'
+        last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
 
     if last_date is None:
         return pd.DataFrame(columns=["S.No", "Product Name", "Sales", "Quantity Sold"])
@@ -61,15 +74,20 @@ def fetch_product_data(default_start_date=None, default_end_date=None):
     LIMIT 100;
     """
 
-    df = pd.read_sql(query, engine, params={'default_end_date': default_end_date, 'default_start_date': default_start_date})
-    engine.dispose()
+    # Precomputed by the ETL for its standard windows; live query otherwise
+    end_date, start_date = pd.to_datetime(default_end_date).date(), pd.to_datetime(default_start_date).date()
+    df = fetch_daily_comparison(
+        "product_sales", PRODUCT_COMPARISON_COLUMNS, end_date, (end_date - start_date).days, limit=100
+    )
+    if df is None:
+        df = pd.read_sql(query, engine, params={'default_end_date': default_end_date, 'default_start_date': default_start_date})
 
     if df.empty:
         return pd.DataFrame(columns=["S.No", "Product Name", "Sales", "Quantity Sold"])
 
     # Calculate trend comparison
-    df["salesTrend"] = df.apply(lambda row: get_trend_arrow(row["sales_today"], row["avg_sales_previous_days"]), axis=1)
-    df["quantityTrend"] = df.apply(lambda row: get_trend_arrow(row["quantity_today"], row["avg_quantity_previous_days"]), axis=1)
+    df["salesTrend"] = trend_arrows(df["sales_today"], df["avg_sales_previous_days"])
+    df["quantityTrend"] = trend_arrows(df["quantity_today"], df["avg_quantity_previous_days"])
 
     # Format display values with trends
     df["sales_display"] = df["sales_today"].astype(str) + " " + df["salesTrend"]
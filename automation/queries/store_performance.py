@@ -1,18 +1,25 @@
 import pandas as pd
 import plotly.graph_objs as go
 from connector import get_db_connection
-from queries.trend import get_trend_arrow
+from queries.cache import cached_query
+from queries.comparison import fetch_daily_comparison
+from queries.trend import trend_arrows, format_count, format_amount
 from datetime import timedelta
 
-def fetch_total_sales():
-    """Fetch total sales for the latest date and calculate average weekly growth percentage."""
+@cached_query("store_sales")
+def fetch_total_sales(last_date=None):
+    """
+    Fetch total sales for the latest date and calculate average weekly growth percentage.
+    Pass last_date (MAX(orderdate) of store_sales) to skip looking it up.
+    """
     engine = get_db_connection()
     
     try:
         # Get the latest available date
-        query_last_date = 'SELECT MAX("orderdate") AS last_date FROM store_sales;'
-        last_date_df = pd.read_sql(query_last_date, engine)
-        last_date = last_date_df['last_date'].iloc[0]
+        if last_date is None:
+            query_last_date = 'SELECT MAX("orderdate") AS last_date FROM store_sales;'
+            last_date_df = pd.read_sql(query_last_date, engine)
+            last_date = last_date_df['last_date'].iloc[0]
 
         # Fetch total sales for the last available day
         query_sales_today = f'''
@@ -38,8 +45,6 @@ def fetch_total_sales():
         avg_sales_last_week_df = pd.read_sql(query_sales_last_week, engine, params={'last_date': last_date})
         avg_sales_last_week = avg_sales_last_week_df['avg_weekly_sales'].iloc[0] or 0
 
-        engine.dispose()
-
         # Calculate percentage growth
         weekly_growth = ((sales_today - avg_sales_last_week) / avg_sales_last_week * 100) if avg_sales_last_week > 0 else 0
 
@@ -47,13 +52,21 @@ def fetch_total_sales():
     
     except Exception as e:
         print(f"Error in fetch_total_sales: {e}")
-        engine.dispose()
         return 0, 0
 
 
-def fetch_sales_data(default_start_date=None, default_end_date=None):
+# store_sales_daily_comparison columns under the live query's names
+STORE_COMPARISON_COLUMNS = """
+    "storename", nooforder_today AS orders_today, sales_today AS totalsales, aov_today,
+    avg_nooforder AS avg_orders_last_7_days, avg_sales AS avg_sales_last_7_days,
+    avg_aov AS avg_aov_last_7_days
+"""
+
+@cached_query("store_sales")
+def fetch_sales_data(default_start_date=None, default_end_date=None, last_date=None):
     """
     Fetch store sales data from store_sales table based on selected date range.
+    Pass last_date (MAX(orderdate) of store_sales) to skip looking it up.
     Returns:
         formatted_df: DataFrame for table display
         chart_data: DataFrame with columns ['storename', 'totalSales'] for charting
@@ -62,13 +75,13 @@ def fetch_sales_data(default_start_date=None, default_end_date=None):
 
     try:
         # Get the latest orderDate dynamically
-        last_date_query = 'SELECT MAX("orderdate") FROM store_sales;'
-        last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
+        if last_date is None:
+            last_date_query = 'SELECT MAX("orderdate") FROM store_sales;'
+            last_date = pd.read_sql(last_date_query, engine).iloc[0, 0]
 
         if last_date is None:
             empty_df = pd.DataFrame(columns=["S.No", "Store Name", "Number of Orders", "Sales", "Average Order Value"])
             empty_chart = pd.DataFrame(columns=["storename", "totalSales"])
-            engine.dispose()
             return empty_df, empty_chart
 
         # Set default_end_date to last available date
@@ -119,14 +132,16 @@ def fetch_sales_data(default_start_date=None, default_end_date=None):
             ORDER BY COALESCE(l.sales_today, 0) DESC;
             """
 
-        # Execute query with parameters
-        df = pd.read_sql(query, engine, params={
-            'start_date': start_date,
-            'prev_end_date': end_date - timedelta(days=1),
-            'end_date': end_date
-        })
-
-        engine.dispose()
+        # Precomputed by the ETL for its standard windows; live query otherwise
+        df = fetch_daily_comparison(
+            "store_sales", STORE_COMPARISON_COLUMNS, end_date, (end_date - start_date).days
+        )
+        if df is None:
+            df = pd.read_sql(query, engine, params={
+                'start_date': start_date,
+                'prev_end_date': end_date - timedelta(days=1),
+                'end_date': end_date
+            })
 
         if df.empty:
             empty_df = pd.DataFrame(columns=["S.No", "Store Name", "Number of Orders", "Sales", "Average Order Value"])
@@ -172,14 +187,14 @@ def fetch_sales_data(default_start_date=None, default_end_date=None):
             chart_data = pd.DataFrame(columns=["storename", "totalSales"])
 
         # Add trend calculations for table
-        df["ordersTrend"] = df.apply(lambda row: get_trend_arrow(row["orders_today"], row["avg_orders_last_7_days"]), axis=1)
-        df["salesTrend"] = df.apply(lambda row: get_trend_arrow(row["totalSales"], row["avg_sales_last_7_days"]), axis=1)
-        df["AOVTrend"] = df.apply(lambda row: get_trend_arrow(row["AOV_today"], row["avg_AOV_last_7_days"]), axis=1)
+        df["ordersTrend"] = trend_arrows(df["orders_today"], df["avg_orders_last_7_days"])
+        df["salesTrend"] = trend_arrows(df["totalSales"], df["avg_sales_last_7_days"])
+        df["AOVTrend"] = trend_arrows(df["AOV_today"], df["avg_AOV_last_7_days"])
 
         # Format numbers for table
-        df["orders_today"] = df["orders_today"].apply(lambda x: f"{int(x):,}")
-        df["totalSales_formatted"] = df["totalSales"].apply(lambda x: f"{float(x):,.2f}")
-        df["AOV_today"] = df["AOV_today"].apply(lambda x: f"{float(x):,.2f}")
+        df["orders_today"] = format_count(df["orders_today"])
+        df["totalSales_formatted"] = format_amount(df["totalSales"])
+        df["AOV_today"] = format_amount(df["AOV_today"])
 
         # Format display for table
         df["Number of Orders"] = df["orders_today"] + " " + df["ordersTrend"]
@@ -197,7 +212,6 @@ def fetch_sales_data(default_start_date=None, default_end_date=None):
 
     except Exception as e:
         print(f"Error in fetch_sales_data: {e}")
-        engine.dispose()
         empty_df = pd.DataFrame(columns=["S.No", "Store Name", "Number of Orders", "Sales", "Average Order Value"])
         empty_chart = pd.DataFrame(columns=["storename", "totalSales"])
         return empty_df, empty_chart
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 
+UP, DOWN, FLAT = "🡅", "🡇", "→"
+
+
 def get_trend_arrow(today, avg_last_7_days):
     if avg_last_7_days == 0 or pd.isna(avg_last_7_days):
         return "→ (0%)"
@@ -12,4 +16,52 @@ def get_monthly_trend_arrow(current_month_sales, avg_last_two_months_sales):
         return "→ (0%)"
     change_percent = ((current_month_sales - avg_last_two_months_sales) / avg_last_two_months_sales) * 100
     arrow = "🡅" if change_percent > 0 else "🡇" if change_percent < 0 else "→"
-    return f"{arrow} ({change_percent:.1f}%)"
\ No newline at end of file
+    return f"{arrow} ({change_percent:.1f}%)"
+
+
+# =============================================================================
+# VECTORIZED FORMATTING
+# -----------------------------------------------------------------------------
+# Column-at-a-time versions of the helpers above, for the queries/* and
+# monthly_query/* tables. Percent change is computed with NumPy on float64
+# (the same IEEE operations, in the same order, as the scalar versions),
+# arrows are picked with np.select, and the strings are built in one list
+# comprehension per column — output is byte-identical to
+# df.apply(lambda row: get_trend_arrow(...), axis=1).
+# =============================================================================
+
+def _like(values, strings) -> pd.Series:
+    """Wrap strings as a Series carrying values' index, if it had one."""
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(strings, index=index, dtype=object)
+
+
+def trend_arrows(today, average, no_baseline: str = "→ (0%)") -> pd.Series:
+    """
+    Vectorized get_trend_arrow / get_monthly_trend_arrow: "🡅 (12.3%)" per
+    row, or no_baseline where the average is 0 or missing.
+    """
+    today_arr = np.asarray(today, dtype="float64")
+    avg_arr   = np.asarray(average, dtype="float64")
+    no_avg    = (avg_arr == 0) | np.isnan(avg_arr)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = ((today_arr - avg_arr) / avg_arr) * 100
+    arrows = np.select([change > 0, change < 0], [UP, DOWN], default=FLAT)
+
+    strings = [
+        no_baseline if skip else f"{arrow} ({pct:.1f}%)"
+        for skip, arrow, pct in zip(no_avg.tolist(), arrows.tolist(), change.tolist())
+    ]
+    return _like(today, strings)
+
+
+def format_count(values) -> pd.Series:
+    """f"{int(x):,}" for every value — e.g. 1234 → "1,234"."""
+    return _like(values, [f"{int(v):,}" for v in np.asarray(values).tolist()])
+
+
+def format_amount(values) -> pd.Series:
+    """f"{float(x):,.2f}" for every value — e.g. 1234.5 → "1,234.50"."""
+    return _like(values, [f"{v:,.2f}" for v in np.asarray(values, dtype="float64").tolist()])
+
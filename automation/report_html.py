@@ -0,0 +1,216 @@
+import pandas as pd
+from jinja2 import Environment
+from markupsafe import Markup, escape
+
+
+# =============================================================================
+# STORE REPORT HTML  (weekly_reports.py + monthly_reports.py)
+# -----------------------------------------------------------------------------
+# Both report scripts render their PDF HTML here. The table and page
+# templates are compiled by Jinja2 once, at import, and reused for every
+# store. Table cells are formatted column by column before rendering:
+#   - current_stock → "N/A" when missing, otherwise a whole number, with
+#     negative stock in bold red,
+#   - every other column → f"{value}" (the % columns are already strings
+#     by then),
+# so the template only joins pre-built rows instead of walking the
+# DataFrame with iterrows(). Cell text is HTML-escaped. Report fragments
+# (charts, LLM and stock insights, comparison text) are inserted as-is.
+# =============================================================================
+
+# Short display names for all table columns
+COLUMN_LABELS = {
+    "brandName":       "Brand",
+    "categoryName":    "Category",
+    "productName":     "Product",
+    "total_sales":     "Sales (₹)",
+    "quantity_sold":   "Qty Sold",
+    "current_stock":   "Stock",
+    "contrib_percent": "Contrib%",
+    "profit_margin":   "Margin%",
+    "PROFIT_MARGIN":   "Margin%",
+}
+
+NEGATIVE_STOCK_STYLE = "color:#dc3545;font-weight:bold;"
+
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+_env.filters["amount"] = lambda value: f"{value:,.2f}"
+_env.filters["two_dp"] = lambda value: f"{value:.2f}"
+
+TABLE_TEMPLATE = _env.from_string(
+    '<table class="styled-table">'
+    "<thead><tr>{% for header in headers %}<th>{{ header }}</th>{% endfor %}</tr></thead>"
+    "<tbody>{% for row in rows %}<tr>{{ row }}</tr>{% endfor %}</tbody>"
+    "</table>"
+)
+
+REPORT_TEMPLATE = _env.from_string("""
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>{{ store_name }} - {{ report_label }} Store Report</title>
+        <style>
+            body {
+                font-family: 'Segoe UI', sans-serif;
+                margin: 20px;
+                background-color: #f6f8fa;
+                position: relative;
+            }
+            .logo {
+                position: absolute;
+                top: 40px;
+                right: 20px;
+                width: 100px;
+                height: auto;
+            }
+            h1 {
+                text-align: center;
+                color: #333;
+                margin-bottom: 10px;
+                padding-top: 0px;
+            }
+            h2 {
+                text-align: center;
+                color: #0078d7;
+                margin-bottom: 5px;
+            }
+            .date-range {
+                text-align: center;
+                color: #666;
+                font-size: 16px;
+                margin-bottom: 20px;
+            }
+            .profit-section {
+                text-align: center;
+                margin: 15px 0;
+            }
+            .profit-label {
+                font-size: 18px;
+                color: #666;
+                display: inline-block;
+                margin-right: 10px;
+            }
+            .profit-value {
+                font-size: 20px;
+                font-weight: bold;
+                color: #28a745;
+            }
+            .profit-margin {
+                font-size: 20px;
+                font-weight: bold;
+                color: #0078d7;
+            }
+            table {
+                width: 100%;
+                border-collapse: collapse;
+                margin-bottom: 20px;
+                background-color: white;
+                border-radius: 8px;
+                overflow: hidden;
+                box-shadow: 0 0 10px rgba(0,0,0,0.1);
+            }
+            th, td {
+                padding: 10px 12px;
+                text-align: left;
+                border-bottom: 1px solid #ddd;
+            }
+            th {
+                background-color: #0078d7;
+                color: white;
+                text-transform: uppercase;
+            }
+            tr:hover { background-color: #f1f1f1; }
+            .table-title {
+                color: #0078d7;
+                font-size: 22px;
+                font-weight: bold;
+                text-align: center;
+                margin: 20px 0 10px;
+            }
+        </style>
+    </head>
+    <body>
+        <img src="{{ logo_src }}" class="logo" alt="Company Logo">
+        <h1>📊 {{ report_label }} Store Report – {{ store_name }}</h1>
+        <div class="date-range">{{ period_label }}: {{ start_str }} to {{ end_str }}</div>
+        <h2>Total {{ report_label }} Sales: ₹{{ total_sales | amount }}</h2>
+
+        <div class="profit-section">
+            <span class="profit-label">Total Profit:</span>
+            <span class="profit-value">₹{{ total_profit | amount }}</span>
+            <span style="margin: 0 15px;">|</span>
+            <span class="profit-label">Average Profit Margin:</span>
+            <span class="profit-margin">{{ avg_profit_margin | two_dp }}%</span>
+        </div>
+
+        {{ comparison_html | safe }}
+
+        {% for section in sections %}
+        {% if section.spacer_before %}
+        <div style="height: 240px;"></div>
+        {% endif %}
+        <div class="table-title">{{ section.title }}</div>
+        {{ section.table | safe }}
+        {{ section.chart | safe }}
+        {% for block in section.blocks %}
+        {{ block | safe }}
+        {% endfor %}
+
+        {% endfor %}
+        {% for block in footer_blocks %}
+        {{ block | safe }}
+        {% endfor %}
+    </body>
+    </html>
+""")
+
+
+def _format_column(values: pd.Series, col: str) -> list:
+    """One column's <td> cells, formatted and escaped in a single pass."""
+    if col == "current_stock":
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+        return [
+            "<td>N/A</td>" if v != v
+            else f'<td style="{NEGATIVE_STOCK_STYLE}">{v:.0f}</td>' if v < 0
+            else f"<td>{v:.0f}</td>"
+            for v in numbers.tolist()
+        ]
+    if pd.api.types.is_numeric_dtype(values):
+        # Numbers never need escaping
+        return [f"<td>{v}</td>" for v in values.tolist()]
+    return [f"<td>{escape(f'{v}')}</td>" for v in values.tolist()]
+
+
+def df_to_html_with_stock(df: pd.DataFrame) -> str:
+    """
+    Render DataFrame to HTML with:
+      - Short column headers (via COLUMN_LABELS)
+      - Negative 'current_stock' cells highlighted red
+      - N/A for missing stock values
+    """
+    if df.empty:
+        return ""
+
+    columns = [_format_column(df[col], col) for col in df.columns]
+    rows    = [Markup("".join(cells)) for cells in zip(*columns)]
+    return TABLE_TEMPLATE.render(
+        headers=[COLUMN_LABELS.get(c, c) for c in df.columns],
+        rows=rows,
+    )
+
+
+def report_section(title: str, table: str, chart: str, *blocks, spacer_before: bool = False) -> dict:
+    """One titled table + chart + recommendation blocks of the report body."""
+    return {"title": title, "table": table, "chart": chart,
+            "blocks": blocks, "spacer_before": spacer_before}
+
+
+def render_report_html(**context) -> str:
+    """
+    Full report page. Expects store_name, report_label ("Weekly"/"Monthly"),
+    period_label, logo_src, start_str, end_str, total_sales, total_profit,
+    avg_profit_margin, comparison_html, sections (report_section dicts) and
+    footer_blocks.
+    """
+    context.setdefault("footer_blocks", ())
+    return REPORT_TEMPLATE.render(**context)
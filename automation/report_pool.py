@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    from monitoring.metrics import record_report, record_stores_processed
+except ImportError:
+    record_report = None
+    record_stores_processed = None
+
+
+# =============================================================================
+# PER-STORE RENDER POOL
+# -----------------------------------------------------------------------------
+# Shared by weekly_reports.py and monthly_reports.py. Once a store's
+# aggregates are ready, its render (LLM calls, Plotly/Kaleido charts, HTML,
+# wkhtmltopdf, upload) is submitted to a thread pool, so several stores
+# render at once while the main thread keeps aggregating. That work mostly
+# waits on subprocesses and the network, so threads are enough and the
+# per-store DataFrames never need pickling.
+#
+# A store that raises is logged and counted as failed — the others carry on.
+# The summary printed at the end lists success/failure per store and the
+# total / mean / max seconds of every render stage.
+#
+# Tune in your .env file:
+#   REPORT_RENDER_WORKERS=4        → stores rendered concurrently (1 = serial)
+# =============================================================================
+
+REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "4"))
+
+
+class StageTimings:
+    """Wall-clock seconds per named stage, accumulated across `with` blocks."""
+
+    def __init__(self):
+        self.seconds = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+
+
+class RenderPool:
+    """
+    Render stores concurrently with render_fn(store_name, data, timings=...).
+
+        with RenderPool(render_store_report, "weekly") as pool:
+            for store in stores:
+                with pool.timings.stage("aggregate"):
+                    data = compute(store)
+                pool.submit(store, data)
+        # leaving the block waits for every render and prints the summary
+
+    pool.timings holds run-level stages timed on the main thread; each
+    render gets its own StageTimings for the per-store summary.
+    """
+
+    def __init__(self, render_fn, report_type: str, workers: int = REPORT_RENDER_WORKERS):
+        self.render_fn   = render_fn
+        self.report_type = report_type
+        self.workers     = max(1, workers)
+        self.timings     = StageTimings()
+        self.results     = []            # one dict per store, in completion order
+        self._lock       = threading.Lock()
+        self._executor   = None
+        self._started    = None
+
+    def __enter__(self):
+        self._started  = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix=f"{self.report_type}-render")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._executor.shutdown(wait=True)
+        self.print_summary()
+        return False
+
+    def submit(self, store_name: str, data):
+        self._executor.submit(self._render, store_name, data)
+
+    def record_failure(self, store_name: str, stage: str, error: Exception):
+        """Count a store that failed before reaching the pool (e.g. aggregation)."""
+        print(f"❌ Error generating report for {store_name} ({stage}): {error}")
+        self._record(store_name, False, f"{stage}: {error}", 0.0, {})
+
+    def _render(self, store_name: str, data):
+        timings = StageTimings()
+        start   = time.perf_counter()
+        try:
+            self.render_fn(store_name, data, timings=timings)
+            ok, error = True, None
+        except Exception as e:
+            print(f"❌ Error generating report for {store_name}: {e}")
+            ok, error = False, str(e)
+        self._record(store_name, ok, error, time.perf_counter() - start, timings.seconds)
+
+    def _record(self, store_name, ok, error, seconds, stages):
+        with self._lock:
+            self.results.append({
+                "store": store_name, "ok": ok, "error": error,
+                "seconds": seconds, "stages": dict(stages),
+            })
+        if record_report:
+            record_report(store_name, self.report_type, ok)
+
+    def print_summary(self):
+        succeeded = [r for r in self.results if r["ok"]]
+        failed    = [r for r in self.results if not r["ok"]]
+        if record_stores_processed:
+            record_stores_processed(self.report_type, len(succeeded), len(failed))
+
+        stage_names = []
+        for r in succeeded:
+            for name in r["stages"]:
+                if name not in stage_names:
+                    stage_names.append(name)
+
+        print(f"\n{'='*60}")
+        print(f"{self.report_type.upper()} REPORT SUMMARY  ({self.workers} render workers)")
+        for name, seconds in self.timings.seconds.items():
+            print(f"  {name:<22}{seconds:>10.2f} s")
+        if succeeded:
+            print(f"  {'Render stage':<22}{'Total s':>10}{'Mean s':>10}{'Max s':>10}")
+            for name in stage_names + ["render (store)"]:
+                values = [
+                    r["seconds"] if name == "render (store)" else r["stages"].get(name, 0.0)
+                    for r in succeeded
+                ]
+                print(f"  {name:<22}{sum(values):>10.2f}"
+                      f"{sum(values) / len(values):>10.2f}{max(values):>10.2f}")
+        for r in failed:
+            print(f"  ❌ {r['store']}: {r['error']}")
+        print(f"  Stores: {len(succeeded)} succeeded, {len(failed)} failed "
+              f"in {time.perf_counter() - self._started:.2f} seconds")
+        print(f"{'='*60}\n")
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (needed by DataFrame.to_parquet / read_parquet)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# =============================================================================
+# STOCK DATA STORE
+# -----------------------------------------------------------------------------
+# stock.py writes one CSV per store to STOCK_DIR. The weekly report reads it
+# for the Stock column (weekly_reports.load_stock_lookups) and for the three
+# stock insights (llm_recommender._load_stock_csv), and wa_stock_alert.py
+# reads it for the WhatsApp alerts. All of them go through load_stock(),
+# which parses a store's CSV once per file version and hands every caller
+# the same StockSnapshot:
+#   - frame           → the parsed CSV, numeric columns coerced (missing → 0.0)
+#   - brand_stock     → {brand        → sum(quantity)}
+#   - category_stock  → {categoryName → sum(quantity)}
+#   - product_stock   → {productName  → quantity}
+# Snapshots are shared between callers — treat them as read-only.
+#
+# A snapshot is keyed on the CSV's path, mtime and size, so a CSV re-written
+# by stock.py is parsed again on its next lookup. Parsed frames are also
+# written as Parquet to STOCK_CACHE_DIR (when pyarrow is installed), so the
+# next process (monthly report, WhatsApp alert) reads columnar data instead
+# of re-parsing the CSV.
+#
+# Tune in your .env file:
+#   STOCK_CACHE_DIR=stock_cache    → blank keeps snapshots in memory only
+#   STOCK_CACHE_SIZE=256           → stores kept in memory per process
+# =============================================================================
+
+STOCK_DIR        = os.getenv("STOCK_DIR", "store_stocks")
+STOCK_CACHE_DIR  = os.getenv("STOCK_CACHE_DIR", "stock_cache").strip()
+STOCK_CACHE_SIZE = int(os.getenv("STOCK_CACHE_SIZE", "256"))
+
+NUMERIC_COLUMNS = ["quantity", "sellingPrice", "costPrice", "printedMrp", "totalAmount"]
+
+
+class StockSnapshot(NamedTuple):
+    path: Optional[str]          # CSV the snapshot came from; None if the store has none
+    frame: pd.DataFrame
+    brand_stock: dict
+    category_stock: dict
+    product_stock: dict
+
+
+EMPTY_SNAPSHOT = StockSnapshot(None, pd.DataFrame(), {}, {}, {})
+
+_snapshots = OrderedDict()        # csv path → ((mtime_ns, size), StockSnapshot)
+_lock      = threading.Lock()
+
+
+def find_stock_csv(store_name: str, stock_dir: str = STOCK_DIR) -> Optional[str]:
+    """The store's CSV in stock_dir — "/" in the name saved as "_" first, then as-is."""
+    safe_name = store_name.replace("/", "_")
+    for path in (os.path.join(stock_dir, f"{safe_name}.csv"),
+                 os.path.join(stock_dir, f"{store_name}.csv")):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _parse_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    return df
+
+
+def _parquet_path(path: str, version: tuple) -> tuple:
+    """(cache file for this CSV version, filename prefix shared by all its versions)."""
+    prefix = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(STOCK_CACHE_DIR, f"{prefix}-{version[0]}-{version[1]}.parquet"), prefix
+
+
+def _read_frame(path: str, version: tuple) -> pd.DataFrame:
+    """Parquet copy of this CSV version if there is one, else parse the CSV and store one."""
+    if not (STOCK_CACHE_DIR and PARQUET_AVAILABLE):
+        return _parse_csv(path)
+
+    cached, prefix = _parquet_path(path, version)
+    if os.path.exists(cached):
+        try:
+            df = pd.read_parquet(cached)
+            # read_csv leaves NaN in text columns; Parquet gives None back
+            for col in df.columns[df.dtypes == object]:
+                df[col] = df[col].where(df[col].notna(), np.nan)
+            return df
+        except Exception:
+            pass
+
+    df = _parse_csv(path)
+    tmp_path = f"{cached}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(STOCK_CACHE_DIR, exist_ok=True)
+        for name in os.listdir(STOCK_CACHE_DIR):
+            if name.startswith(prefix + "-"):
+                os.remove(os.path.join(STOCK_CACHE_DIR, name))
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cached)
+    except Exception as e:
+        # e.g. a column mixing numbers and text — the CSV stays the source
+        print(f"  ℹ️  Stock cache not written for {os.path.basename(path)}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+
+def _rollups(df: pd.DataFrame) -> tuple:
+    brand_stock = (
+        df.groupby("brand")["quantity"].sum().to_dict()
+        if {"brand", "quantity"} <= set(df.columns) else {}
+    )
+    category_stock = (
+        df.groupby("categoryName")["quantity"].sum().to_dict()
+        if {"categoryName", "quantity"} <= set(df.columns) else {}
+    )
+    product_stock = (
+        df.set_index("productName")["quantity"].to_dict()
+        if {"productName", "quantity"} <= set(df.columns) else {}
+    )
+    return brand_stock, category_stock, product_stock
+
+
+def load_stock(store_name: str, stock_dir: str = STOCK_DIR) -> StockSnapshot:
+    """
+    The store's StockSnapshot, parsed once per CSV version. EMPTY_SNAPSHOT
+    if the store has no CSV; an empty frame (with path set) if it cannot be read.
+    """
+    path = find_stock_csv(store_name, stock_dir)
+    if path is None:
+        return EMPTY_SNAPSHOT
+
+    try:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with _lock:
+            cached = _snapshots.get(path)
+            if cached and cached[0] == version:
+                _snapshots.move_to_end(path)
+                return cached[1]
+
+        df = _read_frame(path, version)
+        snapshot = StockSnapshot(path, df, *_rollups(df))
+    except Exception as e:
+        print(f"  ⚠️  Stock CSV read error for {store_name}: {e}")
+        return StockSnapshot(path, pd.DataFrame(), {}, {}, {})
+
+    with _lock:
+        _snapshots[path] = (version, snapshot)
+        _snapshots.move_to_end(path)
+        while len(_snapshots) > STOCK_CACHE_SIZE:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def clear_stock_cache():
+    """Drop every in-memory snapshot (the Parquet files stay)."""
+    with _lock:
+        _snapshots.clear()
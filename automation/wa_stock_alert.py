@@ -35,6 +35,8 @@ from collections import Counter
 from dotenv import load_dotenv
 from twilio.rest import Client
 
+from stock_store import load_stock
+
 load_dotenv()
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -65,23 +67,8 @@ def _normalise_wa_number(raw: str) -> str:
 
 
 def _load_stock_csv(store_name: str) -> pd.DataFrame:
-    safe_name  = store_name.replace("/", "_")
-    candidates = [
-        os.path.join(STOCK_DIR, f"{safe_name}.csv"),
-        os.path.join(STOCK_DIR, f"{store_name}.csv"),
-    ]
-    for path in candidates:
-        if os.path.exists(path):
-            try:
-                df = pd.read_csv(path)
-                for col in ["quantity", "sellingPrice", "costPrice"]:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-                return df
-            except Exception as e:
-                print(f"  ⚠️  CSV read error for {store_name}: {e}")
-                return pd.DataFrame()
-    return pd.DataFrame()
+    """Shared stock_store frame for the store — empty if it has no readable CSV."""
+    return load_stock(store_name, STOCK_DIR).frame
 
 
 def _dominant(items: list, key: str):
@@ -0,0 +1,425 @@
+import pandas as pd
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from pyspark.sql import Window
+from pyspark.sql import functions as F
+from pyspark.sql.types import DoubleType
+
+
+# =============================================================================
+# WEEKLY REPORT AGGREGATIONS
+# -----------------------------------------------------------------------------
+# The Spark aggregations behind weekly_reports.py, kept free of the report's
+# DB, PDF and Azure setup so they can run on any DataFrame. weekly_reports.py
+# does the JDBC reads and passes the frames in:
+#   - per-store mode → comparison_from_window + compute_*_agg +
+#                      compute_total_sales_profit on one store's rows
+#   - batch mode     → aggregate_store_weeks on every store's rows at once
+# Both modes give the same StoreWeek for a store
+# (tests/test_weekly_aggregations.py).
+# =============================================================================
+
+class StoreWeek(NamedTuple):
+    week_start:  date
+    week_end:    date
+    comparison:  dict           # current_week_sales, prev_2_weeks_avg
+    brand_df:    pd.DataFrame
+    category_df: pd.DataFrame
+    product_df:  pd.DataFrame
+    financials:  dict           # compute_total_sales_profit keys
+
+
+# =============================================================================
+# PER-STORE AGGREGATIONS
+# Each function mirrors the original SQL query logic exactly.
+# All receive one store's Spark DataFrame (the cached df_week, or the 21-day
+# comparison window) and return Pandas objects (needed for stock injection,
+# LLM calls, HTML).
+# =============================================================================
+
+def comparison_from_window(df, week_end: date) -> dict:
+    """
+    Current week sales vs previous 2-week average from one store's 21 days
+    ending at week_end (totalProductPrice, orderDate).
+
+    Mirrors original comparison_query exactly:
+      current_week : orderDate > week_end - 7d  AND orderDate <= week_end
+      week_2       : orderDate > week_end - 14d AND orderDate <= week_end - 7d
+      week_3       : orderDate > week_end - 21d AND orderDate <= week_end - 14d
+      prev_2_weeks_avg = (week_2_sales + week_3_sales) / 2.0
+      Always divides by 2.0 — matching original SQL exactly.
+    """
+    # Bucket each row into the correct week period using the same
+    # exclusive-lower / inclusive-upper logic as the original SQL
+    w_end       = week_end
+    w_end_minus7  = week_end - timedelta(days=7)
+    w_end_minus14 = week_end - timedelta(days=14)
+    w_end_minus21 = week_end - timedelta(days=21)
+
+    df = df.withColumn(
+        "week_bucket",
+        F.when(
+            (F.col("orderDate") >  F.lit(str(w_end_minus7)))  &
+            (F.col("orderDate") <= F.lit(str(w_end))),
+            F.lit("current")
+        ).when(
+            (F.col("orderDate") >  F.lit(str(w_end_minus14))) &
+            (F.col("orderDate") <= F.lit(str(w_end_minus7))),
+            F.lit("week2")
+        ).when(
+            (F.col("orderDate") >  F.lit(str(w_end_minus21))) &
+            (F.col("orderDate") <= F.lit(str(w_end_minus14))),
+            F.lit("week3")
+        ).otherwise(F.lit(None))
+    ).filter(F.col("week_bucket").isNotNull())
+
+    agg = (
+        df.groupBy("week_bucket")
+        .agg(F.sum("totalProductPrice").alias("sales"))
+        .toPandas()
+    )
+
+    def get_bucket_sales(bucket: str) -> float:
+        rows = agg[agg["week_bucket"] == bucket]["sales"]
+        return float(rows.iloc[0]) if len(rows) > 0 else 0.0
+
+    current_week_sales = get_bucket_sales("current")
+    week_2_sales       = get_bucket_sales("week2")
+    week_3_sales       = get_bucket_sales("week3")
+
+    # Original SQL: (week_2_sales + week_3_sales) / 2.0
+    prev_2_weeks_avg = (week_2_sales + week_3_sales) / 2.0
+
+    return {
+        "current_week_sales": current_week_sales,
+        "prev_2_weeks_avg":   prev_2_weeks_avg,
+    }
+
+
+def compute_brand_agg(df_week) -> pd.DataFrame:
+    """
+    Brand-level aggregation — mirrors original brand_query SQL exactly.
+    Output columns: brandName, total_sales, quantity_sold,
+                    contrib_percent, profit_margin
+    Top 50 by total_sales.
+    Note: margin column is 'profit_margin' (not 'PROFIT_MARGIN' as in monthly).
+    """
+    total_sales_val = df_week.agg(
+        F.sum("totalProductPrice").alias("t")
+    ).collect()[0]["t"] or 1.0
+
+    brand_df = (
+        df_week
+        .groupBy("brandName")
+        .agg(
+            F.round(F.sum("totalProductPrice"), 2).alias("total_sales"),
+            F.sum("quantity").alias("quantity_sold"),
+            F.round(
+                F.sum("totalProductPrice") / total_sales_val * 100, 2
+            ).alias("contrib_percent"),
+            F.round(
+                F.when(
+                    F.sum("totalProductPrice") > 0,
+                    (
+                        F.sum("totalProductPrice")
+                        - F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
+                    ) / F.sum("totalProductPrice") * 100
+                ).otherwise(F.lit(0.0)),
+                2
+            ).alias("profit_margin")
+        )
+        .orderBy(F.col("total_sales").desc())
+        .limit(50)
+        .toPandas()
+    )
+    return brand_df
+
+
+def compute_category_agg(df_week) -> pd.DataFrame:
+    """
+    Category-level aggregation — mirrors original category_query SQL exactly.
+    Output columns: categoryName, total_sales, quantity_sold,
+                    contrib_percent, profit_margin
+    Top 50 by total_sales.
+    """
+    total_sales_val = df_week.agg(
+        F.sum("totalProductPrice").alias("t")
+    ).collect()[0]["t"] or 1.0
+
+    category_df = (
+        df_week
+        .groupBy("categoryName")
+        .agg(
+            F.round(F.sum("totalProductPrice"), 2).alias("total_sales"),
+            F.sum("quantity").alias("quantity_sold"),
+            F.round(
+                F.sum("totalProductPrice") / total_sales_val * 100, 2
+            ).alias("contrib_percent"),
+            F.round(
+                F.when(
+                    F.sum("totalProductPrice") > 0,
+                    (
+                        F.sum("totalProductPrice")
+                        - F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
+                    ) / F.sum("totalProductPrice") * 100
+                ).otherwise(F.lit(0.0)),
+                2
+            ).alias("profit_margin")
+        )
+        .orderBy(F.col("total_sales").desc())
+        .limit(50)
+        .toPandas()
+    )
+    return category_df
+
+
+def compute_product_agg(df_week) -> pd.DataFrame:
+    """
+    Product-level aggregation — mirrors original product_query SQL exactly.
+    Output columns: productName, total_sales, quantity_sold,
+                    contrib_percent, profit_margin
+    Top 100 by total_sales.
+    """
+    total_sales_val = df_week.agg(
+        F.sum("totalProductPrice").alias("t")
+    ).collect()[0]["t"] or 1.0
+
+    product_df = (
+        df_week
+        .groupBy("productName")
+        .agg(
+            F.round(F.sum("totalProductPrice"), 2).alias("total_sales"),
+            F.sum("quantity").alias("quantity_sold"),
+            F.round(
+                F.sum("totalProductPrice") / total_sales_val * 100, 2
+            ).alias("contrib_percent"),
+            F.round(
+                F.when(
+                    F.sum("totalProductPrice") > 0,
+                    (
+                        F.sum("totalProductPrice")
+                        - F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
+                    ) / F.sum("totalProductPrice") * 100
+                ).otherwise(F.lit(0.0)),
+                2
+            ).alias("profit_margin")
+        )
+        .orderBy(F.col("total_sales").desc())
+        .limit(100)
+        .toPandas()
+    )
+    return product_df
+
+
+def compute_total_sales_profit(df_week) -> dict:
+    """
+    Compute total weekly sales, cost, profit, and avg profit margin.
+
+    Mirrors original total_sales_profit_query SQL exactly.
+    Per-row item_cost and item_profit_margin computed via withColumn first
+    (matching the item_margins CTE), then aggregated.
+    """
+    df_with_margin = df_week.withColumn(
+        "item_cost",
+        F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity")
+    ).withColumn(
+        "item_profit_margin",
+        F.when(
+            F.col("totalProductPrice") > 0,
+            (F.col("totalProductPrice") - F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
+            / F.col("totalProductPrice") * 100
+        ).otherwise(F.lit(0.0))
+    )
+
+    result = df_with_margin.agg(
+        F.round(F.sum("totalProductPrice"),   2).alias("total_weekly_sales"),
+        F.round(F.sum("item_cost"),           2).alias("total_weekly_cost"),
+        F.round(
+            F.sum("totalProductPrice") - F.sum("item_cost"), 2
+        ).alias("total_weekly_profit"),
+        F.round(F.avg("item_profit_margin"),  2).alias("avg_profit_margin_percent")
+    ).collect()[0]
+
+    return {
+        "total_weekly_sales":       float(result["total_weekly_sales"]       or 0.0),
+        "total_weekly_cost":        float(result["total_weekly_cost"]        or 0.0),
+        "total_weekly_profit":      float(result["total_weekly_profit"]      or 0.0),
+        "avg_profit_margin_percent": float(result["avg_profit_margin_percent"] or 0.0),
+    }
+
+
+# =============================================================================
+# BATCH AGGREGATIONS  (all stores at once)
+# -----------------------------------------------------------------------------
+# Input is every store's 21 days ending at its own week_end (the store's
+# MAX(orderDate)), tagged by add_week_buckets. Comparison, financials and the
+# brand / category / product tables are computed for all stores together —
+# groupBy("storeName", ...) plus windows partitioned by storeName for the
+# contribution % denominator and the top-N cut.
+# =============================================================================
+
+# (dimension column, rows kept per store) — same limits as compute_*_agg
+BATCH_DIMENSIONS = [
+    ("brandName",    50),
+    ("categoryName", 50),
+    ("productName",  100),
+]
+
+
+def add_week_buckets(df_window):
+    """
+    Cast the numeric columns and add week_bucket from the days before each
+    row's week_end — current (0-6), week2 (7-13), week3 (14-20) — the
+    comparison_from_window buckets. Rows must already be inside the window.
+    """
+    days_back = F.datediff(F.col("week_end"), F.col("orderDate"))
+    return (
+        df_window
+        .withColumn("totalProductPrice", F.col("totalProductPrice").cast(DoubleType()))
+        .withColumn("costPrice",         F.col("costPrice").cast(DoubleType()))
+        .withColumn("quantity",          F.col("quantity").cast(DoubleType()))
+        .withColumn(
+            "week_bucket",
+            F.when(days_back < 7,  F.lit("current"))
+             .when(days_back < 14, F.lit("week2"))
+             .otherwise(F.lit("week3"))
+        )
+    )
+
+
+def _split_by_store(pdf: pd.DataFrame) -> dict:
+    """{storeName: rows without the storeName column, index reset}."""
+    return {
+        store: rows.drop(columns="storeName").reset_index(drop=True)
+        for store, rows in pdf.groupby("storeName", sort=False)
+    }
+
+
+def compute_all_comparisons(df_window) -> dict:
+    """{storeName: compute_comparison result} from the cached 21-day window."""
+    def bucket_sales(bucket: str):
+        return F.coalesce(
+            F.sum(F.when(F.col("week_bucket") == bucket, F.col("totalProductPrice"))),
+            F.lit(0.0),
+        )
+
+    rows = (
+        df_window.groupBy("storeName")
+        .agg(
+            bucket_sales("current").alias("current_week_sales"),
+            bucket_sales("week2").alias("week_2_sales"),
+            bucket_sales("week3").alias("week_3_sales"),
+        )
+        .toPandas()
+    )
+    return {
+        row.storeName: {
+            "current_week_sales": float(row.current_week_sales),
+            # Original SQL: (week_2_sales + week_3_sales) / 2.0
+            "prev_2_weeks_avg":   (float(row.week_2_sales) + float(row.week_3_sales)) / 2.0,
+        }
+        for row in rows.itertuples(index=False)
+    }
+
+
+def compute_all_financials(df_week) -> dict:
+    """{storeName: compute_total_sales_profit result} for the current week."""
+    item_cost = F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity")
+    item_profit_margin = F.when(
+        F.col("totalProductPrice") > 0,
+        (F.col("totalProductPrice") - item_cost) / F.col("totalProductPrice") * 100
+    ).otherwise(F.lit(0.0))
+
+    rows = (
+        df_week
+        .withColumn("item_cost", item_cost)
+        .withColumn("item_profit_margin", item_profit_margin)
+        .groupBy("storeName")
+        .agg(
+            F.round(F.sum("totalProductPrice"),   2).alias("total_weekly_sales"),
+            F.round(F.sum("item_cost"),           2).alias("total_weekly_cost"),
+            F.round(
+                F.sum("totalProductPrice") - F.sum("item_cost"), 2
+            ).alias("total_weekly_profit"),
+            F.round(F.avg("item_profit_margin"),  2).alias("avg_profit_margin_percent")
+        )
+        .toPandas()
+    )
+    keys = ["total_weekly_sales", "total_weekly_cost",
+            "total_weekly_profit", "avg_profit_margin_percent"]
+    return {
+        row["storeName"]: {k: float(0.0 if pd.isna(row[k]) else row[k]) for k in keys}
+        for _, row in rows.iterrows()
+    }
+
+
+def compute_all_dimension_aggs(df_week, dim_col: str, top_n: int) -> dict:
+    """
+    {storeName: compute_brand_agg / compute_category_agg / compute_product_agg
+    result} for one dimension. The contribution denominator is the store's
+    week total (1.0 when zero/missing, as in the per-store version) and the
+    top-N cut is a row_number over the store's rows by total_sales.
+    """
+    by_store = Window.partitionBy("storeName")
+    by_sales = Window.partitionBy("storeName").orderBy(F.col("_sales").desc())
+
+    sales = F.sum("totalProductPrice")
+    cost  = F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
+    store_total = F.sum("_sales").over(by_store)
+
+    pdf = (
+        df_week
+        .groupBy("storeName", dim_col)
+        .agg(
+            sales.alias("_sales"),
+            F.round(sales, 2).alias("total_sales"),
+            F.sum("quantity").alias("quantity_sold"),
+            F.round(
+                F.when(sales > 0, (sales - cost) / sales * 100).otherwise(F.lit(0.0)),
+                2
+            ).alias("profit_margin")
+        )
+        .withColumn(
+            "_store_total",
+            F.when(store_total.isNull() | (store_total == 0), F.lit(1.0)).otherwise(store_total)
+        )
+        .withColumn("contrib_percent", F.round(F.col("_sales") / F.col("_store_total") * 100, 2))
+        .withColumn("_rank", F.row_number().over(by_sales))
+        .filter(F.col("_rank") <= top_n)
+        .select("storeName", "_rank", dim_col,
+                "total_sales", "quantity_sold", "contrib_percent", "profit_margin")
+        .toPandas()
+        .sort_values(["storeName", "_rank"])
+        .drop(columns="_rank")
+    )
+    return _split_by_store(pdf)
+
+
+def aggregate_store_weeks(df_window, store_weeks: pd.DataFrame) -> dict:
+    """
+    {storeName: StoreWeek} for every store with rows in its current week.
+    df_window is add_week_buckets output; store_weeks has storeName, week_end.
+    """
+    df_week = df_window.filter(F.col("week_bucket") == "current")
+
+    comparisons = compute_all_comparisons(df_window)
+    financials  = compute_all_financials(df_week)
+    dimensions  = {
+        dim_col: compute_all_dimension_aggs(df_week, dim_col, top_n)
+        for dim_col, top_n in BATCH_DIMENSIONS
+    }
+
+    week_ends = dict(store_weeks[["storeName", "week_end"]].itertuples(index=False))
+    return {
+        store: StoreWeek(
+            week_start=week_ends[store] - timedelta(days=6),
+            week_end=week_ends[store],
+            comparison=comparisons[store],
+            brand_df=dimensions["brandName"].get(store, pd.DataFrame()),
+            category_df=dimensions["categoryName"].get(store, pd.DataFrame()),
+            product_df=dimensions["productName"].get(store, pd.DataFrame()),
+            financials=financials[store],
+        )
+        for store in financials
+    }
@@ -1,10 +1,7 @@
 import pandas as pd
 import pdfkit
-import plotly.graph_objects as go
-import base64
 import os
 import time
-from io import BytesIO
 from datetime import date, timedelta
 from sqlalchemy import create_engine
 from sqlalchemy.exc import OperationalError
@@ -20,6 +17,20 @@ from pyspark.sql import functions as F
 from pyspark.sql.types import DoubleType
 
 from llm_recommender import save_weekly_snapshot
+from report_pool import RenderPool, StageTimings
+from chart_render import plot_charts
+from stock_store import load_stock
+from report_html import df_to_html_with_stock, render_report_html, report_section
+from weekly_aggregations import (
+    StoreWeek,
+    add_week_buckets,
+    aggregate_store_weeks,
+    comparison_from_window,
+    compute_brand_agg,
+    compute_category_agg,
+    compute_product_agg,
+    compute_total_sales_profit,
+)
 from llm_recommender import (
     brand_recommendation,
     category_recommendation,
@@ -89,6 +100,7 @@ JDBC_PROPERTIES = {
 }
 
 PDFKIT_CONFIG = pdfkit.configuration(wkhtmltopdf="/usr/bin/wkhtmltopdf")
+LOGO_SRC      = "file:///home/azureuser/azure_analysis_algorithm/tns.png"
 
 
 # =============================================================================
@@ -233,63 +245,27 @@ def get_week_dates(store_name: str):
 
 
 # =============================================================================
-# STOCK HELPERS  (Pandas — unchanged, operates on local CSV files)
+# STOCK HELPERS  (Pandas — stock CSVs come from stock_store.py)
 # =============================================================================
 
-# Short display names for all table columns — unchanged
-COLUMN_LABELS = {
-    "brandName":       "Brand",
-    "categoryName":    "Category",
-    "productName":     "Product",
-    "total_sales":     "Sales (₹)",
-    "quantity_sold":   "Qty Sold",
-    "current_stock":   "Stock",
-    "contrib_percent": "Contrib%",
-    "profit_margin":   "Margin%",
-}
-
-
 def load_stock_lookups(store_name: str):
     """
-    Load the store's stock CSV once and return three dicts for O(1) lookup:
+    Return the store's three stock dicts for O(1) lookup (shared
+    stock_store snapshot — the CSV is parsed once per run):
         brand_stock    : {brandName    -> sum(quantity)}
         category_stock : {categoryName -> sum(quantity)}
         product_stock  : {productName  -> quantity}
     Returns three empty dicts if the CSV is missing (non-fatal).
     All quantities are kept as raw numbers (can be negative = no GRN).
     """
-    safe_name = store_name.replace("/", "_")
-    candidates = [
-        os.path.join(STOCK_DIR, f"{safe_name}.csv"),
-        os.path.join(STOCK_DIR, f"{store_name}.csv"),
-    ]
-    for path in candidates:
-        if os.path.exists(path):
-            try:
-                df = pd.read_csv(path)
-                df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").fillna(0)
-
-                brand_stock = (
-                    df.groupby("brand")["quantity"].sum().to_dict()
-                    if "brand" in df.columns else {}
-                )
-                category_stock = (
-                    df.groupby("categoryName")["quantity"].sum().to_dict()
-                    if "categoryName" in df.columns else {}
-                )
-                product_stock = (
-                    df.set_index("productName")["quantity"].to_dict()
-                    if "productName" in df.columns else {}
-                )
-                print(f"  📦 Stock CSV loaded for {store_name} "
-                      f"({len(df)} SKUs, {len(brand_stock)} brands, "
-                      f"{len(category_stock)} categories)")
-                return brand_stock, category_stock, product_stock
-            except Exception as e:
-                print(f"  ⚠️  Stock CSV read error for {store_name}: {e}")
-                return {}, {}, {}
-    print(f"  ℹ️  No stock CSV for {store_name} — 'Stock' column will show N/A")
-    return {}, {}, {}
+    stock = load_stock(store_name, STOCK_DIR)
+    if stock.path is None:
+        print(f"  ℹ️  No stock CSV for {store_name} — 'Stock' column will show N/A")
+    elif not stock.frame.empty:
+        print(f"  📦 Stock CSV loaded for {store_name} "
+              f"({len(stock.frame)} SKUs, {len(stock.brand_stock)} brands, "
+              f"{len(stock.category_stock)} categories)")
+    return stock.brand_stock, stock.category_stock, stock.product_stock
 
 
 def inject_stock_column(df: pd.DataFrame, name_col: str, stock_lookup: dict) -> pd.DataFrame:
@@ -311,87 +287,6 @@ def inject_stock_column(df: pd.DataFrame, name_col: str, stock_lookup: dict) ->
     return df
 
 
-def df_to_html_with_stock(df: pd.DataFrame) -> str:
-    """
-    Render DataFrame to HTML with:
-      - Short column headers (via COLUMN_LABELS)
-      - Negative 'current_stock' cells highlighted red
-      - N/A for missing stock values
-    """
-    if df.empty:
-        return ""
-
-    df = df.copy()
-    headers = "".join(
-        f"<th>{COLUMN_LABELS.get(c, c)}</th>" for c in df.columns
-    )
-
-    rows_html = []
-    for _, row in df.iterrows():
-        cells = []
-        for col in df.columns:
-            val = row[col]
-            if col == "current_stock":
-                if pd.isna(val):
-                    cells.append("<td>N/A</td>")
-                else:
-                    val_num = float(val)
-                    if val_num < 0:
-                        cells.append(
-                            f'<td style="color:#dc3545;font-weight:bold;">{val_num:.0f}</td>'
-                        )
-                    else:
-                        cells.append(f"<td>{val_num:.0f}</td>")
-            else:
-                cells.append(f"<td>{val}</td>")
-        rows_html.append("<tr>" + "".join(cells) + "</tr>")
-
-    return (
-        '<table class="styled-table">'
-        "<thead><tr>" + headers + "</tr></thead>"
-        "<tbody>" + "".join(rows_html) + "</tbody>"
-        "</table>"
-    )
-
-
-# =============================================================================
-# CHART GENERATION  (Plotly — unchanged, operates on Pandas DataFrames)
-# =============================================================================
-
-def plot_chart(df, x_col, y_col, title, top_n=10):
-    """Generate a modern Plotly bar chart and return base64 image string."""
-    if df.empty:
-        return ""
-    df_plot = df.head(top_n)
-
-    fig = go.Figure(
-        data=[
-            go.Bar(
-                x=df_plot[x_col],
-                y=df_plot[y_col],
-                text=[f"₹{v:,.0f}" for v in df_plot[y_col]],
-                textposition="outside",
-                marker=dict(color="#0078d7"),
-            )
-        ]
-    )
-    fig.update_layout(
-        title=dict(text=title, font=dict(size=18, color="#0078d7", family="Segoe UI")),
-        xaxis=dict(title="", tickangle=-45, automargin=True),
-        yaxis=dict(title="Sales (₹)", gridcolor="rgba(200,200,200,0.3)"),
-        plot_bgcolor="white",
-        paper_bgcolor="white",
-        margin=dict(l=40, r=40, t=50, b=80),
-        height=500,
-    )
-
-    buffer = BytesIO()
-    fig.write_image(buffer, format="png", scale=2)
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.read()).decode("utf-8")
-    return f'<img src="data:image/png;base64,{img_base64}" style="display:block;margin:auto;width:90%;max-height:500px;">'
-
-
 # =============================================================================
 # SPARK DATA LOADING
 # =============================================================================
@@ -442,21 +337,17 @@ def load_store_week_data(spark, store_name: str, week_start: date, week_end: dat
 
 # =============================================================================
 # SPARK AGGREGATIONS
-# Each function mirrors the original SQL query logic exactly.
-# All receive the cached df_week Spark DataFrame.
+# compute_brand_agg, compute_category_agg, compute_product_agg and
+# compute_total_sales_profit live in weekly_aggregations.py and receive the
+# cached df_week Spark DataFrame.
 # All return Pandas DataFrames (needed for stock injection, LLM calls, HTML).
 # =============================================================================
 
 def compute_comparison(spark, store_name: str, week_end: date) -> dict:
     """
     Compute current week sales vs previous 2-week average.
-
-    Mirrors original comparison_query exactly:
-      current_week : orderDate > week_end - 7d  AND orderDate <= week_end
-      week_2       : orderDate > week_end - 14d AND orderDate <= week_end - 7d
-      week_3       : orderDate > week_end - 21d AND orderDate <= week_end - 14d
-      prev_2_weeks_avg = (week_2_sales + week_3_sales) / 2.0
-      Always divides by 2.0 — matching original SQL exactly.
+    Loads the store's 21 days ending at week_end; the bucketing and the
+    prev_2_weeks_avg formula are in weekly_aggregations.comparison_from_window.
     """
     # Load 21 days of data for this store (3 weeks)
     three_weeks_start = week_end - timedelta(days=21)
@@ -482,219 +373,122 @@ def compute_comparison(spark, store_name: str, week_end: date) -> dict:
         .withColumn("orderDate", F.col("orderDate").cast("date"))
     )
 
-    # Bucket each row into the correct week period using the same
-    # exclusive-lower / inclusive-upper logic as the original SQL
-    w_end       = week_end
-    w_end_minus7  = week_end - timedelta(days=7)
-    w_end_minus14 = week_end - timedelta(days=14)
-    w_end_minus21 = week_end - timedelta(days=21)
-
-    df = df.withColumn(
-        "week_bucket",
-        F.when(
-            (F.col("orderDate") >  F.lit(str(w_end_minus7)))  &
-            (F.col("orderDate") <= F.lit(str(w_end))),
-            F.lit("current")
-        ).when(
-            (F.col("orderDate") >  F.lit(str(w_end_minus14))) &
-            (F.col("orderDate") <= F.lit(str(w_end_minus7))),
-            F.lit("week2")
-        ).when(
-            (F.col("orderDate") >  F.lit(str(w_end_minus21))) &
-            (F.col("orderDate") <= F.lit(str(w_end_minus14))),
-            F.lit("week3")
-        ).otherwise(F.lit(None))
-    ).filter(F.col("week_bucket").isNotNull())
-
-    agg = (
-        df.groupBy("week_bucket")
-        .agg(F.sum("totalProductPrice").alias("sales"))
-        .toPandas()
-    )
-
-    def get_bucket_sales(bucket: str) -> float:
-        rows = agg[agg["week_bucket"] == bucket]["sales"]
-        return float(rows.iloc[0]) if len(rows) > 0 else 0.0
+    return comparison_from_window(df, week_end)
 
-    current_week_sales = get_bucket_sales("current")
-    week_2_sales       = get_bucket_sales("week2")
-    week_3_sales       = get_bucket_sales("week3")
 
-    # Original SQL: (week_2_sales + week_3_sales) / 2.0
-    prev_2_weeks_avg = (week_2_sales + week_3_sales) / 2.0
+# =============================================================================
+# BATCH AGGREGATION  (all stores, one JDBC scan)
+# -----------------------------------------------------------------------------
+# Per-store mode issues three queries and two JDBC reads per store. Batch mode
+# instead:
+#   1. reads every store's week_end (= its own MAX(orderDate)) in one grouped
+#      query,
+#   2. reads the 21-day comparison window of every store in one partitioned
+#      JDBC scan (split on orderDate across WEEKLY_JDBC_PARTITIONS readers),
+#   3. computes comparison, financials and the brand / category / product
+#      tables for all stores at once (weekly_aggregations.aggregate_store_weeks),
+# and hands each store's StoreWeek to render_store_report. Results match the
+# per-store functions — tests/test_weekly_aggregations.py checks both modes
+# on the same rows.
+#
+# Tune in your .env file:
+#   WEEKLY_AGG_MODE=batch          → batch | per_store
+#   WEEKLY_JDBC_PARTITIONS=4       → parallel JDBC readers for the batch scan
+# =============================================================================
 
-    return {
-        "current_week_sales": current_week_sales,
-        "prev_2_weeks_avg":   prev_2_weeks_avg,
-    }
+WEEKLY_AGG_MODE        = os.getenv("WEEKLY_AGG_MODE", "batch").strip().lower()
+WEEKLY_JDBC_PARTITIONS = int(os.getenv("WEEKLY_JDBC_PARTITIONS", "4"))
 
 
-def compute_brand_agg(df_week) -> pd.DataFrame:
-    """
-    Brand-level aggregation — mirrors original brand_query SQL exactly.
-    Output columns: brandName, total_sales, quantity_sold,
-                    contrib_percent, profit_margin
-    Top 50 by total_sales.
-    Note: margin column is 'profit_margin' (not 'PROFIT_MARGIN' as in monthly).
+def get_store_week_ends() -> pd.DataFrame:
+    """storeName and week_end (that store's MAX(orderDate)) for every store."""
+    query = """
+        SELECT "storeName", MAX("orderDate")::date AS week_end
+        FROM "billing_data"
+        WHERE "storeName" IS NOT NULL
+        GROUP BY "storeName"
+        ORDER BY "storeName";
     """
-    total_sales_val = df_week.agg(
-        F.sum("totalProductPrice").alias("t")
-    ).collect()[0]["t"] or 1.0
-
-    brand_df = (
-        df_week
-        .groupBy("brandName")
-        .agg(
-            F.round(F.sum("totalProductPrice"), 2).alias("total_sales"),
-            F.sum("quantity").alias("quantity_sold"),
-            F.round(
-                F.sum("totalProductPrice") / total_sales_val * 100, 2
-            ).alias("contrib_percent"),
-            F.round(
-                F.when(
-                    F.sum("totalProductPrice") > 0,
-                    (
-                        F.sum("totalProductPrice")
-                        - F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
-                    ) / F.sum("totalProductPrice") * 100
-                ).otherwise(F.lit(0.0)),
-                2
-            ).alias("profit_margin")
-        )
-        .orderBy(F.col("total_sales").desc())
-        .limit(50)
-        .toPandas()
-    )
-    return brand_df
+    df = safe_read_sql(query)
+    df["week_end"] = pd.to_datetime(df["week_end"]).dt.date
+    return df
 
 
-def compute_category_agg(df_week) -> pd.DataFrame:
-    """
-    Category-level aggregation — mirrors original category_query SQL exactly.
-    Output columns: categoryName, total_sales, quantity_sold,
-                    contrib_percent, profit_margin
-    Top 50 by total_sales.
+def load_all_stores_window(spark, store_weeks: pd.DataFrame):
     """
-    total_sales_val = df_week.agg(
-        F.sum("totalProductPrice").alias("t")
-    ).collect()[0]["t"] or 1.0
-
-    category_df = (
-        df_week
-        .groupBy("categoryName")
-        .agg(
-            F.round(F.sum("totalProductPrice"), 2).alias("total_sales"),
-            F.sum("quantity").alias("quantity_sold"),
-            F.round(
-                F.sum("totalProductPrice") / total_sales_val * 100, 2
-            ).alias("contrib_percent"),
-            F.round(
-                F.when(
-                    F.sum("totalProductPrice") > 0,
-                    (
-                        F.sum("totalProductPrice")
-                        - F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
-                    ) / F.sum("totalProductPrice") * 100
-                ).otherwise(F.lit(0.0)),
-                2
-            ).alias("profit_margin")
-        )
-        .orderBy(F.col("total_sales").desc())
-        .limit(50)
-        .toPandas()
-    )
-    return category_df
+    Load the 21 days ending at each store's week_end, for every store, in one
+    JDBC read partitioned on orderDate. The per-store lower bound is pushed
+    into PostgreSQL by joining a VALUES list of (storeName, week_end).
 
-
-def compute_product_agg(df_week) -> pd.DataFrame:
-    """
-    Product-level aggregation — mirrors original product_query SQL exactly.
-    Output columns: productName, total_sales, quantity_sold,
-                    contrib_percent, profit_margin
-    Top 100 by total_sales.
+    Adds week_bucket via weekly_aggregations.add_week_buckets.
+    Spark 2.4+ accepts a DATE partitionColumn, unlike the per-store reads.
+    Result is .cache()'d — reused by every batch aggregation.
     """
-    total_sales_val = df_week.agg(
-        F.sum("totalProductPrice").alias("t")
-    ).collect()[0]["t"] or 1.0
-
-    product_df = (
-        df_week
-        .groupBy("productName")
-        .agg(
-            F.round(F.sum("totalProductPrice"), 2).alias("total_sales"),
-            F.sum("quantity").alias("quantity_sold"),
-            F.round(
-                F.sum("totalProductPrice") / total_sales_val * 100, 2
-            ).alias("contrib_percent"),
-            F.round(
-                F.when(
-                    F.sum("totalProductPrice") > 0,
-                    (
-                        F.sum("totalProductPrice")
-                        - F.sum(F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
-                    ) / F.sum("totalProductPrice") * 100
-                ).otherwise(F.lit(0.0)),
-                2
-            ).alias("profit_margin")
-        )
-        .orderBy(F.col("total_sales").desc())
-        .limit(100)
-        .toPandas()
+    values = ",\n            ".join(
+        "('{}', DATE '{}')".format(name.replace("'", "''"), week_end)
+        for name, week_end in store_weeks[["storeName", "week_end"]].itertuples(index=False)
     )
-    return product_df
+    subquery = f"""(
+        SELECT b."storeName", b."orderDate"::date AS "orderDate",
+               b."brandName", b."categoryName", b."productName",
+               b."totalProductPrice", b."costPrice", b."quantity",
+               w.week_end
+        FROM billing_data b
+        JOIN (VALUES
+            {values}
+        ) AS w("storeName", week_end) ON w."storeName" = b."storeName"
+        WHERE b."orderDate" >  w.week_end - 21
+          AND b."orderDate" <= w.week_end
+    ) AS all_stores_window"""
+
+    lower = min(store_weeks["week_end"]) - timedelta(days=20)
+    upper = max(store_weeks["week_end"]) + timedelta(days=1)
+    print(f"  📥 Loading {len(store_weeks)} stores ({lower} → {upper - timedelta(days=1)}) "
+          f"via Spark JDBC, {WEEKLY_JDBC_PARTITIONS} partitions...")
+
+    df = add_week_buckets(
+        spark.read
+        .format("jdbc")
+        .option("url",             JDBC_URL)
+        .option("dbtable",         subquery)
+        .option("user",            JDBC_PROPERTIES["user"])
+        .option("password",        JDBC_PROPERTIES["password"])
+        .option("driver",          JDBC_PROPERTIES["driver"])
+        .option("partitionColumn", "orderDate")
+        .option("lowerBound",      str(lower))
+        .option("upperBound",      str(upper))
+        .option("numPartitions",   max(1, WEEKLY_JDBC_PARTITIONS))
+        .load()
+    ).cache()
 
+    row_count = df.count()
+    print(f"  Loaded {row_count} rows for {len(store_weeks)} stores.")
+    return df
 
-def compute_total_sales_profit(df_week) -> dict:
-    """
-    Compute total weekly sales, cost, profit, and avg profit margin.
 
-    Mirrors original total_sales_profit_query SQL exactly.
-    Per-row item_cost and item_profit_margin computed via withColumn first
-    (matching the item_margins CTE), then aggregated.
+def compute_all_stores(spark, store_weeks: pd.DataFrame) -> dict:
     """
-    df_with_margin = df_week.withColumn(
-        "item_cost",
-        F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity")
-    ).withColumn(
-        "item_profit_margin",
-        F.when(
-            F.col("totalProductPrice") > 0,
-            (F.col("totalProductPrice") - F.coalesce(F.col("costPrice"), F.lit(0.0)) * F.col("quantity"))
-            / F.col("totalProductPrice") * 100
-        ).otherwise(F.lit(0.0))
-    )
-
-    result = df_with_margin.agg(
-        F.round(F.sum("totalProductPrice"),   2).alias("total_weekly_sales"),
-        F.round(F.sum("item_cost"),           2).alias("total_weekly_cost"),
-        F.round(
-            F.sum("totalProductPrice") - F.sum("item_cost"), 2
-        ).alias("total_weekly_profit"),
-        F.round(F.avg("item_profit_margin"),  2).alias("avg_profit_margin_percent")
-    ).collect()[0]
-
-    return {
-        "total_weekly_sales":       float(result["total_weekly_sales"]       or 0.0),
-        "total_weekly_cost":        float(result["total_weekly_cost"]        or 0.0),
-        "total_weekly_profit":      float(result["total_weekly_profit"]      or 0.0),
-        "avg_profit_margin_percent": float(result["avg_profit_margin_percent"] or 0.0),
-    }
+    Batch mode data stage: {storeName: StoreWeek} for every store with rows in
+    its window, from one cached JDBC scan.
+    """
+    df_window = load_all_stores_window(spark, store_weeks)
+    try:
+        return aggregate_store_weeks(df_window, store_weeks)
+    finally:
+        df_window.unpersist()
 
 
 # =============================================================================
 # REPORT GENERATOR
 # =============================================================================
 
-def generate_store_report(spark, store_name: str):
+def compute_store_week(spark, store_name: str):
     """
-    Generate weekly PDF report for one store.
+    Per-store mode data stage: one store's StoreWeek, or None to skip it.
 
     Layer split:
       - Date resolution:        SQLAlchemy (single-row metadata query)
       - Data fetch + agg:       PySpark JDBC (all heavy computation)
-      - Stock CSV injection:    Pandas (local CSV, unchanged)
-      - LLM + stock + RTV calls: Python (Pandas DataFrames, unchanged)
-      - Charts + HTML + PDF:    Plotly + pdfkit (unchanged)
     """
 
     # ── Step 1: Resolve week dates (SQLAlchemy metadata query) ────────────────
@@ -702,23 +496,53 @@ def generate_store_report(spark, store_name: str):
 
     if week_start is None:
         print(f"  ⚠️ Could not determine week dates for {store_name} — skipping.")
-        return
-
-    week_start_str = week_start.strftime('%d %b %Y')
-    week_end_str   = week_end.strftime('%d %b %Y')
+        return None
 
     # ── Step 2: Load store's weekly data into Spark (one JDBC read, cached) ───
     df_week = load_store_week_data(spark, store_name, week_start, week_end)
 
     if df_week.count() == 0:
-        print(f"  ⚠️ No data found for {store_name} in week {week_start_str} — skipping.")
+        print(f"  ⚠️ No data found for {store_name} in week {week_start.strftime('%d %b %Y')} — skipping.")
         df_week.unpersist()
-        return
+        return None
 
     # ── Step 3: Comparison stats (current week vs prev 2-week avg) ───────────
     comparison = compute_comparison(spark, store_name, week_end)
-    current_week_sales = comparison["current_week_sales"]
-    prev_2_weeks_avg   = comparison["prev_2_weeks_avg"]
+
+    # ── Step 4: All aggregations via PySpark (reusing cached df_week) ─────────
+    brand_df    = compute_brand_agg(df_week)
+    category_df = compute_category_agg(df_week)
+    product_df  = compute_product_agg(df_week)
+    financials  = compute_total_sales_profit(df_week)
+
+    # ── Step 5: Release cached Spark data — all aggregations done ─────────────
+    df_week.unpersist()
+
+    return StoreWeek(
+        week_start, week_end, comparison, brand_df, category_df, product_df, financials,
+    )
+
+
+def render_store_report(store_name: str, week: StoreWeek, timings: StageTimings = None):
+    """
+    Render and upload one store's weekly PDF from its aggregates — the same
+    for both aggregation modes. Runs on a RenderPool worker thread; each
+    step is timed into `timings` for the run summary.
+
+    Layer split:
+      - Stock CSV injection:    Pandas (local CSV, unchanged)
+      - LLM + stock + RTV calls: Python (Pandas DataFrames, unchanged)
+      - Charts + HTML + PDF:    Plotly + pdfkit (unchanged)
+    """
+    timings = timings or StageTimings()
+    week_start, week_end = week.week_start, week.week_end
+    brand_df, category_df, product_df = week.brand_df, week.category_df, week.product_df
+
+    week_start_str = week_start.strftime('%d %b %Y')
+    week_end_str   = week_end.strftime('%d %b %Y')
+
+    current_week_sales = week.comparison["current_week_sales"]
+    prev_2_weeks_avg   = week.comparison["prev_2_weeks_avg"]
 
     if current_week_sales > 0:
         if prev_2_weeks_avg > 0:
@@ -738,43 +562,37 @@ def generate_store_report(spark, store_name: str):
     else:
         comparison_text = '<div style="text-align: center; margin-top: 10px;"><span style="font-size: 18px; color: #666;">No sales data available</span></div>'
 
-    # ── Step 4: All aggregations via PySpark (reusing cached df_week) ─────────
-    brand_df    = compute_brand_agg(df_week)
-    category_df = compute_category_agg(df_week)
-    product_df  = compute_product_agg(df_week)
-    financials  = compute_total_sales_profit(df_week)
-
-    total_weekly_sales        = financials["total_weekly_sales"]
-    total_weekly_cost         = financials["total_weekly_cost"]
-    total_weekly_profit       = financials["total_weekly_profit"]
-    avg_profit_margin_percent = financials["avg_profit_margin_percent"]
-
-    # ── Step 5: Release cached Spark data — all aggregations done ─────────────
-    df_week.unpersist()
+    total_weekly_sales        = week.financials["total_weekly_sales"]
+    total_weekly_profit       = week.financials["total_weekly_profit"]
+    avg_profit_margin_percent = week.financials["avg_profit_margin_percent"]
 
     # ── Step 6: Load stock CSV, inject current_stock column (Pandas — unchanged)
-    brand_stock_lookup, category_stock_lookup, product_stock_lookup = load_stock_lookups(store_name)
-    brand_df    = inject_stock_column(brand_df,    "brandName",    brand_stock_lookup)
-    category_df = inject_stock_column(category_df, "categoryName", category_stock_lookup)
-    product_df  = inject_stock_column(product_df,  "productName",  product_stock_lookup)
+    with timings.stage("stock"):
+        brand_stock_lookup, category_stock_lookup, product_stock_lookup = load_stock_lookups(store_name)
+        brand_df    = inject_stock_column(brand_df,    "brandName",    brand_stock_lookup)
+        category_df = inject_stock_column(category_df, "categoryName", category_stock_lookup)
+        product_df  = inject_stock_column(product_df,  "productName",  product_stock_lookup)
 
     # ── Step 7: LLM recommendations (Pandas DataFrames — unchanged) ──────────
     print(f"  🤖 Generating LLM recommendations for {store_name}...")
-    brand_rec    = brand_recommendation(store_name, brand_df,    total_weekly_sales, week_start=week_start, engine=engine, report_type="weekly")
-    category_rec = category_recommendation(store_name, category_df, total_weekly_sales, week_start=week_start, engine=engine, report_type="weekly")
-    product_rec  = product_recommendation(store_name, product_df,  total_weekly_sales, week_start=week_start, engine=engine, report_type="weekly")
+    with timings.stage("llm"):
+        brand_rec    = brand_recommendation(store_name, brand_df,    total_weekly_sales, week_start=week_start, engine=engine, report_type="weekly")
+        category_rec = category_recommendation(store_name, category_df, total_weekly_sales, week_start=week_start, engine=engine, report_type="weekly")
+        product_rec  = product_recommendation(store_name, product_df,  total_weekly_sales, week_start=week_start, engine=engine, report_type="weekly")
 
     # ── Step 8: Stock insight calls (reads per-store CSV — unchanged) ─────────
     print(f"  📦 Generating stock insights for {store_name}...")
-    brand_stock_rec    = brand_stock_insight(store_name,    STOCK_DIR, LOW_STOCK_THRESHOLD)
-    category_stock_rec = category_stock_insight(store_name, STOCK_DIR, LOW_STOCK_THRESHOLD)
-    product_stock_rec  = product_stock_insight(store_name,  STOCK_DIR, LOW_STOCK_THRESHOLD)
+    with timings.stage("insights"):
+        brand_stock_rec    = brand_stock_insight(store_name,    STOCK_DIR, LOW_STOCK_THRESHOLD)
+        category_stock_rec = category_stock_insight(store_name, STOCK_DIR, LOW_STOCK_THRESHOLD)
+        product_stock_rec  = product_stock_insight(store_name,  STOCK_DIR, LOW_STOCK_THRESHOLD)
 
-    # ── Step 9: RTV insight call (reads per-store CSV — unchanged) ────────────
-    print(f"  🔄 Generating RTV insights for {store_name}...")
-    rtv_rec = rtv_insight(store_name, RTV_DIR)
+        # ── Step 9: RTV insight call (reads per-store CSV — unchanged) ────────
+        print(f"  🔄 Generating RTV insights for {store_name}...")
+        rtv_rec = rtv_insight(store_name, RTV_DIR)
 
-    save_weekly_snapshot(store_name, week_start, brand_df, category_df, product_df, engine)
+    with timings.stage("snapshot"):
+        save_weekly_snapshot(store_name, week_start, brand_df, category_df, product_df, engine)
 
     # ── Step 10: Add % suffix AFTER LLM calls, skip current_stock (unchanged) ─
     for df in [brand_df, category_df, product_df]:
@@ -784,141 +602,43 @@ def generate_store_report(spark, store_name: str):
             if 'profit_margin' in df.columns:
                 df['profit_margin'] = df['profit_margin'].astype(str) + '%'
 
-    # ── Step 11: Charts (Plotly on Pandas — unchanged) ────────────────────────
-    brand_chart    = plot_chart(brand_df,    "brandName",    "total_sales", "Top 10 Brands by Sales")
-    category_chart = plot_chart(category_df, "categoryName", "total_sales", "Top 10 Categories by Sales")
-    product_chart  = plot_chart(product_df,  "productName",  "total_sales", "Top 10 Products by Sales")
-
-    # ── Step 12: Render tables with stock column + colour coding (unchanged) ───
-    brand_table_html    = df_to_html_with_stock(brand_df)
-    category_table_html = df_to_html_with_stock(category_df)
-    product_table_html  = df_to_html_with_stock(product_df)
-
-    # ── Step 13: HTML template (unchanged) ───────────────────────────────────
-    html_template = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>{store_name} - Weekly Store Report</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', sans-serif;
-                margin: 20px;
-                background-color: #f6f8fa;
-                position: relative;
-            }}
-            .logo {{
-                position: absolute;
-                top: 40px;
-                right: 20px;
-                width: 100px;
-                height: auto;
-            }}
-            h1 {{
-                text-align: center;
-                color: #333;
-                margin-bottom: 10px;
-                padding-top: 0px;
-            }}
-            h2 {{
-                text-align: center;
-                color: #0078d7;
-                margin-bottom: 5px;
-            }}
-            .date-range {{
-                text-align: center;
-                color: #666;
-                font-size: 16px;
-                margin-bottom: 20px;
-            }}
-            .profit-section {{
-                text-align: center;
-                margin: 15px 0;
-            }}
-            .profit-label {{
-                font-size: 18px;
-                color: #666;
-                display: inline-block;
-                margin-right: 10px;
-            }}
-            .profit-value {{
-                font-size: 20px;
-                font-weight: bold;
-                color: #28a745;
-            }}
-            .profit-margin {{
-                font-size: 20px;
-                font-weight: bold;
-                color: #0078d7;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 20px;
-                background-color: white;
-                border-radius: 8px;
-                overflow: hidden;
-                box-shadow: 0 0 10px rgba(0,0,0,0.1);
-            }}
-            th, td {{
-                padding: 10px 12px;
-                text-align: left;
-                border-bottom: 1px solid #ddd;
-            }}
-            th {{
-                background-color: #0078d7;
-                color: white;
-                text-transform: uppercase;
-            }}
-            tr:hover {{ background-color: #f1f1f1; }}
-            .table-title {{
-                color: #0078d7;
-                font-size: 22px;
-                font-weight: bold;
-                text-align: center;
-                margin: 20px 0 10px;
-            }}
-        </style>
-    </head>
-    <body>
-        <img src="file:///home/azureuser/azure_analysis_algorithm/tns.png" class="logo" alt="Company Logo">
-        <h1>📊 Weekly Store Report – {store_name}</h1>
-        <div class="date-range">Week: {week_start_str} to {week_end_str}</div>
-        <h2>Total Weekly Sales: ₹{total_weekly_sales:,.2f}</h2>
-
-        <div class="profit-section">
-            <span class="profit-label">Total Profit:</span>
-            <span class="profit-value">₹{total_weekly_profit:,.2f}</span>
-            <span style="margin: 0 15px;">|</span>
-            <span class="profit-label">Average Profit Margin:</span>
-            <span class="profit-margin">{avg_profit_margin_percent:.2f}%</span>
-        </div>
-
-        {comparison_text}
-
-        <div class="table-title">Top 50 Brands (by Sales)</div>
-        {brand_table_html}
-        {brand_chart}
-        {brand_rec}
-        {brand_stock_rec}
-
-
-        <div style="height: 240px;"></div>
-        <div class="table-title">Top 50 Categories (by Sales)</div>
-        {category_table_html}
-        {category_chart}
-        {category_rec}
-        {category_stock_rec}
-
-        <div class="table-title">Top 100 Products (by Sales)</div>
-        {product_table_html}
-        {product_chart}
-        {product_rec}
-        {product_stock_rec}
-        {rtv_rec}
-    </body>
-    </html>
-    """
+    # ── Step 11: Charts (one cached Kaleido batch — chart_render.py) ──────────
+    with timings.stage("charts"):
+        brand_chart, category_chart, product_chart = plot_charts([
+            (brand_df,    "brandName",    "total_sales", "Top 10 Brands by Sales"),
+            (category_df, "categoryName", "total_sales", "Top 10 Categories by Sales"),
+            (product_df,  "productName",  "total_sales", "Top 10 Products by Sales"),
+        ])
+
+    # ── Step 12: Render tables with stock column + colour coding (report_html) ─
+    with timings.stage("tables"):
+        brand_table_html    = df_to_html_with_stock(brand_df)
+        category_table_html = df_to_html_with_stock(category_df)
+        product_table_html  = df_to_html_with_stock(product_df)
+
+    # ── Step 13: HTML page (precompiled template — report_html.py) ───────────
+    with timings.stage("html"):
+        html_template = render_report_html(
+            store_name=store_name,
+            report_label="Weekly",
+            period_label="Week",
+            logo_src=LOGO_SRC,
+            start_str=week_start_str,
+            end_str=week_end_str,
+            total_sales=total_weekly_sales,
+            total_profit=total_weekly_profit,
+            avg_profit_margin=avg_profit_margin_percent,
+            comparison_html=comparison_text,
+            sections=[
+                report_section("Top 50 Brands (by Sales)", brand_table_html, brand_chart,
+                               brand_rec, brand_stock_rec),
+                report_section("Top 50 Categories (by Sales)", category_table_html, category_chart,
+                               category_rec, category_stock_rec, spacer_before=True),
+                report_section("Top 100 Products (by Sales)", product_table_html, product_chart,
+                               product_rec, product_stock_rec),
+            ],
+            footer_blocks=[rtv_rec],
+        )
 
     # ── Step 14: Save PDF (unchanged) ─────────────────────────────────────────
     # ── Upload PDF to Azure Blob Storage ─────────────────────────────
@@ -930,48 +650,50 @@ def generate_store_report(spark, store_name: str):
         tmp_path = tmp.name
 
     try:
-        # Generate PDF in temp file
-        pdfkit.from_string(
-            html_template,
-            tmp_path,
-            configuration=PDFKIT_CONFIG,
-            options={"enable-local-file-access": ""}
-        )
+        with timings.stage("pdf"):
+            # Generate PDF in temp file
+            pdfkit.from_string(
+                html_template,
+                tmp_path,
+                configuration=PDFKIT_CONFIG,
+                options={"enable-local-file-access": ""}
+            )
 
-        # Upload to Azure Blob
-        service_client = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
-        container_client = service_client.get_container_client(AZURE_CONTAINER)
+        with timings.stage("upload"):
+            # Upload to Azure Blob
+            service_client = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
+            container_client = service_client.get_container_client(AZURE_CONTAINER)
 
-        try:
-            container_client.create_container()
-        except Exception:
-            pass  # already exists
+            try:
+                container_client.create_container()
+            except Exception:
+                pass  # already exists
 
-        blob_client = container_client.get_blob_client(blob_name)
+            blob_client = container_client.get_blob_client(blob_name)
 
-        with open(tmp_path, "rb") as f:
-            blob_client.upload_blob(
-                f,
-                overwrite=True,
-                content_settings=ContentSettings(content_type="application/pdf")
-            )
+            with open(tmp_path, "rb") as f:
+                blob_client.upload_blob(
+                    f,
+                    overwrite=True,
+                    content_settings=ContentSettings(content_type="application/pdf")
+                )
 
-        # Generate SAS URL
-        sas_token = generate_blob_sas(
-            account_name=AZURE_ACCOUNT_NAME,
-            container_name=AZURE_CONTAINER,
-            blob_name=blob_name,
-            account_key=AZURE_ACCOUNT_KEY,
-            permission=BlobSasPermissions(read=True),
-            expiry=datetime.now(timezone.utc) + timedelta(days=SAS_EXPIRY_DAYS),
-        )
+            # Generate SAS URL
+            sas_token = generate_blob_sas(
+                account_name=AZURE_ACCOUNT_NAME,
+                container_name=AZURE_CONTAINER,
+                blob_name=blob_name,
+                account_key=AZURE_ACCOUNT_KEY,
+                permission=BlobSasPermissions(read=True),
+                expiry=datetime.now(timezone.utc) + timedelta(days=SAS_EXPIRY_DAYS),
+            )
 
-        shareable_url = (
-            f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net/"
-            f"{AZURE_CONTAINER}/{blob_name}?{sas_token}"
-        )
+            shareable_url = (
+                f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net/"
+                f"{AZURE_CONTAINER}/{blob_name}?{sas_token}"
+            )
 
-        print(f"✅ Uploaded {store_name} → {shareable_url}")
+            print(f"✅ Uploaded {store_name} → {shareable_url}")
 
     finally:
         os.remove(tmp_path)
@@ -982,18 +704,34 @@ def generate_store_report(spark, store_name: str):
 # =============================================================================
 
 if __name__ == "__main__":
-    store_names = get_unique_stores()
-    print(f"Found {len(store_names)} stores.\nGenerating reports...\n")
-
     # Start Spark once — reused across all store reports
     spark = get_spark()
 
-    for store in store_names:
-        try:
-            generate_store_report(spark, store)
-            time.sleep(1)
-        except Exception as e:
-            print(f"❌ Error generating report for {store}: {e}")
+    with RenderPool(render_store_report, "weekly") as pool:
+        if WEEKLY_AGG_MODE == "batch":
+            store_weeks = get_store_week_ends()
+            print(f"Found {len(store_weeks)} stores.\nAggregating all stores in one pass...\n")
+            with pool.timings.stage("aggregate (all stores)"):
+                store_results = compute_all_stores(spark, store_weeks)
+            print(f"\nGenerating reports ({pool.workers} at a time)...\n")
+            for store in store_weeks["storeName"]:
+                if store in store_results:
+                    pool.submit(store, store_results.pop(store))
+                else:
+                    print(f"  ⚠️ No data found for {store} in its latest week — skipping.")
+        else:
+            store_names = get_unique_stores()
+            print(f"Found {len(store_names)} stores.\nGenerating reports ({pool.workers} at a time)...\n")
+            # Spark stays on this thread; each store renders while the next aggregates
+            for store in store_names:
+                try:
+                    with pool.timings.stage("aggregate (per store)"):
+                        week = compute_store_week(spark, store)
+                except Exception as e:
+                    pool.record_failure(store, "aggregate", e)
+                    continue
+                if week is not None:
+                    pool.submit(store, week)
 
     spark.stop()
-    print("\n✅ All store reports generated successfully inside azure Blob Storage")
\ No newline at end of file
+    print("\n✅ All store reports generated successfully inside azure Blob Storage")
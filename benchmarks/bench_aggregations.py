@@ -0,0 +1,105 @@
+"""
+benchmarks/bench_aggregations.py
+─────────────────────────────────────────────────────────────────────────────
+Micro-benchmark: the former four-groupby Pandas aggregation vs the
+single-pass pandas_compute_aggregates in agg_insert.py.
+Asserts all four rollups are identical (values, dtypes and row order).
+
+No DB or API access — dummy DB env vars are set before importing agg_insert.
+
+Run:  python benchmarks/bench_aggregations.py [rows]   (default 1,000,000)
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_transform import make_raw_frame, etl_pip  # noqa: E402  (sets env + sys.path)
+
+import agg_insert  # noqa: E402
+
+
+def legacy_aggregates(df_agg: pd.DataFrame) -> dict:
+    """Frozen copy of the former per-dimension groupby passes."""
+    brand_df = df_agg.groupby(['brandName', 'orderDate'], as_index=False).agg(
+        nooforders=('invoice', 'nunique'),
+        sales=('totalProductPrice', 'sum')
+    )
+    brand_df['sales'] = pd.to_numeric(brand_df['sales'], errors='coerce')
+    brand_df['aov']   = (brand_df['sales'] / brand_df['nooforders']).round(2)
+    brand_df.rename(columns={'brandName': 'brandname', 'orderDate': 'orderdate'}, inplace=True)
+
+    store_df = df_agg.groupby(['storeName', 'orderDate'], as_index=False).agg(
+        nooforder=('invoice', 'nunique'),
+        sales=('totalProductPrice', 'sum')
+    )
+    store_df['sales'] = pd.to_numeric(store_df['sales'], errors='coerce')
+    store_df['aov']   = (store_df['sales'] / store_df['nooforder']).round(2)
+    store_df.rename(columns={'storeName': 'storename', 'orderDate': 'orderdate'}, inplace=True)
+
+    category_df = df_agg.groupby(['subCategoryOf', 'orderDate'], as_index=False).agg(
+        nooforder=('invoice', 'nunique'),
+        sales=('totalProductPrice', 'sum')
+    )
+    category_df.rename(columns={'subCategoryOf': 'subcategoryof', 'orderDate': 'orderdate'}, inplace=True)
+
+    product_df = df_agg.groupby(['productName', 'orderDate'], as_index=False).agg(
+        nooforders=('invoice', 'nunique'),
+        sales=('totalProductPrice', 'sum'),
+        quantitysold=('quantity', 'sum')
+    )
+    product_df.rename(columns={'productName': 'productname', 'orderDate': 'orderdate'}, inplace=True)
+
+    return {
+        "brand_sales":    brand_df,
+        "store_sales":    store_df,
+        "category_sales": category_df,
+        "product_sales":  product_df,
+    }
+
+
+def make_agg_input(rows: int) -> pd.DataFrame:
+    """Transformed billing frame prepared the way load_aggregates_to_postgres does."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = etl_pip.pandas_transform_data(make_raw_frame(rows))
+    df['totalProductPrice'] = pd.to_numeric(df['totalProductPrice'], errors='coerce')
+    return df[df['totalProductPrice'].notna()]
+
+
+def _best_of(fn, df, repeats=3):
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out   = fn(df)
+        best  = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def main(rows: int) -> None:
+    print(f"Building synthetic aggregate input: {rows:,} rows...")
+    df = make_agg_input(rows)
+
+    old, old_secs = _best_of(legacy_aggregates, df)
+    new, new_secs = _best_of(agg_insert.pandas_compute_aggregates, df)
+
+    for table, _, _, _, db_columns in agg_insert.PANDAS_AGG_DIMENSIONS:
+        pd.testing.assert_frame_equal(
+            old[table][db_columns].reset_index(drop=True),
+            new[table][db_columns].reset_index(drop=True),
+            check_exact=True, obj=table,
+        )
+
+    print(f"  four groupby passes       : {old_secs:8.3f} s")
+    print(f"  single-pass factorized    : {new_secs:8.3f} s")
+    print(f"  speedup                   : {old_secs / new_secs:8.1f}x")
+    print("  ✓ all four rollups identical")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
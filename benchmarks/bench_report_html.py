@@ -0,0 +1,177 @@
+"""
+benchmarks/bench_report_html.py
+─────────────────────────────────────────────────────────────────────────────
+Micro-benchmark: per-store HTML render time of the weekly report, comparing
+the former iterrows df_to_html_with_stock + f-string page with the
+column-wise formatting + precompiled Jinja2 templates in report_html.py.
+
+Each store has the report's table shapes: top 50 brands, top 50
+categories and top 100 products. The tables include a current_stock
+column with missing and negative values, and % columns already turned
+into strings. Asserts both paths give identical table HTML. The
+synthetic names contain no characters that need HTML escaping, which the
+new path now applies.
+
+No DB, Spark or wkhtmltopdf — HTML strings only.
+
+Run:  python benchmarks/bench_report_html.py [stores]  (default 100)
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "automation"))
+
+from report_html import COLUMN_LABELS, df_to_html_with_stock, render_report_html, report_section  # noqa: E402
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Synthetic store tables — shaped like render_store_report's frames at Step 12
+# ══════════════════════════════════════════════════════════════════════════════
+
+def make_table(name_col: str, rows: int, rng) -> pd.DataFrame:
+    sales = np.sort(np.round(rng.gamma(2.0, 4000.0, rows), 2))[::-1]
+    stock = rng.integers(-20, 200, rows).astype("float64")
+    stock[rng.random(rows) < 0.15] = np.nan
+    return pd.DataFrame({
+        name_col:          [f"{name_col[:-4].title()} {i:03d}" for i in range(rows)],
+        "total_sales":     sales,
+        "quantity_sold":   rng.integers(1, 500, rows).astype("float64"),
+        "current_stock":   stock,
+        "contrib_percent": (np.round(sales / sales.sum() * 100, 2)).astype(str),
+        "profit_margin":   np.round(rng.uniform(-5, 40, rows), 2).astype(str),
+    }).assign(
+        contrib_percent=lambda d: d["contrib_percent"] + "%",
+        profit_margin=lambda d: d["profit_margin"] + "%",
+    )
+
+
+def make_store(rng) -> dict:
+    return {
+        "brand":    make_table("brandName",    50,  rng),
+        "category": make_table("categoryName", 50,  rng),
+        "product":  make_table("productName",  100, rng),
+    }
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Frozen copy of the former rendering
+# ══════════════════════════════════════════════════════════════════════════════
+
+def legacy_df_to_html_with_stock(df: pd.DataFrame) -> str:
+    if df.empty:
+        return ""
+
+    df = df.copy()
+    headers = "".join(
+        f"<th>{COLUMN_LABELS.get(c, c)}</th>" for c in df.columns
+    )
+
+    rows_html = []
+    for _, row in df.iterrows():
+        cells = []
+        for col in df.columns:
+            val = row[col]
+            if col == "current_stock":
+                if pd.isna(val):
+                    cells.append("<td>N/A</td>")
+                else:
+                    val_num = float(val)
+                    if val_num < 0:
+                        cells.append(
+                            f'<td style="color:#dc3545;font-weight:bold;">{val_num:.0f}</td>'
+                        )
+                    else:
+                        cells.append(f"<td>{val_num:.0f}</td>")
+            else:
+                cells.append(f"<td>{val}</td>")
+        rows_html.append("<tr>" + "".join(cells) + "</tr>")
+
+    return (
+        '<table class="styled-table">'
+        "<thead><tr>" + headers + "</tr></thead>"
+        "<tbody>" + "".join(rows_html) + "</tbody>"
+        "</table>"
+    )
+
+
+def legacy_page(store_name: str, tables: dict) -> str:
+    """The former f-string page, minus the CSS block (identical in both)."""
+    return f"""
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>{store_name} - Weekly Store Report</title>
+    </head>
+    <body>
+        <h1>📊 Weekly Store Report – {store_name}</h1>
+        <h2>Total Weekly Sales: ₹{123456.789:,.2f}</h2>
+        <div class="table-title">Top 50 Brands (by Sales)</div>
+        {tables["brand"]}
+        <div style="height: 240px;"></div>
+        <div class="table-title">Top 50 Categories (by Sales)</div>
+        {tables["category"]}
+        <div class="table-title">Top 100 Products (by Sales)</div>
+        {tables["product"]}
+    </body>
+    </html>
+    """
+
+
+def legacy_render(store_name: str, store: dict) -> tuple:
+    tables = {key: legacy_df_to_html_with_stock(df) for key, df in store.items()}
+    return tables, legacy_page(store_name, tables)
+
+
+def new_render(store_name: str, store: dict) -> tuple:
+    tables = {key: df_to_html_with_stock(df) for key, df in store.items()}
+    page = render_report_html(
+        store_name=store_name, report_label="Weekly", period_label="Week",
+        logo_src="file:///tns.png", start_str="01 Jan 2025", end_str="07 Jan 2025",
+        total_sales=123456.789, total_profit=23456.7, avg_profit_margin=18.2,
+        comparison_html="",
+        sections=[
+            report_section("Top 50 Brands (by Sales)", tables["brand"], ""),
+            report_section("Top 50 Categories (by Sales)", tables["category"], "",
+                           spacer_before=True),
+            report_section("Top 100 Products (by Sales)", tables["product"], ""),
+        ],
+    )
+    return tables, page
+
+
+def _time_per_store(render, stores, repeats=3):
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out   = [render(f"Store {i}", store) for i, store in enumerate(stores)]
+        best  = min(best, time.perf_counter() - start)
+    return out, best / len(stores)
+
+
+def main(n_stores: int) -> None:
+    rng    = np.random.default_rng(11)
+    stores = [make_store(rng) for _ in range(n_stores)]
+    print(f"Rendering {n_stores} stores × (50 + 50 + 100 table rows)...")
+
+    old, old_secs = _time_per_store(legacy_render, stores)
+    new, new_secs = _time_per_store(new_render, stores)
+
+    for (old_tables, _), (new_tables, new_page) in zip(old, new):
+        assert old_tables == new_tables, "table HTML differs"
+        assert all(table in new_page for table in new_tables.values())
+
+    print(f"  iterrows + f-string       : {old_secs * 1000:8.2f} ms / store")
+    print(f"  column-wise + Jinja2      : {new_secs * 1000:8.2f} ms / store")
+    print(f"  speedup                   : {old_secs / new_secs:8.1f}x")
+    print("  ✓ table HTML identical")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
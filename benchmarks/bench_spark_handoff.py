@@ -0,0 +1,86 @@
+"""
+benchmarks/bench_spark_handoff.py
+─────────────────────────────────────────────────────────────────────────────
+Micro-benchmark: legacy Pandas→Spark handoff (astype(str) + schema inference,
+no Arrow) vs etl_pip.spark_from_pandas (typed StructType + Arrow), on the
+same synthetic billing CSV frame used by bench_transform.py.
+
+Each side is timed from the raw pandas frame up to a materialised Spark
+DataFrame (createDataFrame + count), then both are pushed through
+spark_validate_schema / spark_transform_data and checked to produce the
+same rows (exceptAll both ways).
+
+Needs pyspark, pyarrow and a Java runtime; no DB or API access — dummy DB
+env vars are set before importing etl_pip.
+
+Run:  python benchmarks/bench_spark_handoff.py [rows]   (default 1,000,000)
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+for var in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(var, "benchmark")
+
+import etl_pip  # noqa: E402
+from bench_transform import make_raw_frame  # noqa: E402
+
+
+def legacy_handoff(spark, pandas_df):
+    """Frozen copy of the pre-Arrow handoff from etl_pip.main."""
+    spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "false")
+    try:
+        spark_df = spark.createDataFrame(pandas_df.astype(str).replace("nan", None))
+        spark_df.count()
+    finally:
+        spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+    return spark_df
+
+
+def arrow_handoff(spark, pandas_df):
+    spark_df = etl_pip.spark_from_pandas(spark, pandas_df)
+    spark_df.count()
+    return spark_df
+
+
+def transformed(spark_df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        spark_df, _ = etl_pip.spark_transform_data(etl_pip.spark_validate_schema(spark_df))
+    return spark_df
+
+
+def main(rows: int):
+    spark = etl_pip.get_spark()
+    spark.sparkContext.setLogLevel("ERROR")
+    raw   = make_raw_frame(rows)
+    print(f"Synthetic frame: {len(raw):,} rows × {raw.shape[1]} columns\n")
+
+    t0 = time.perf_counter()
+    legacy_df = legacy_handoff(spark, raw)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    arrow_df = arrow_handoff(spark, raw)
+    arrow_s = time.perf_counter() - t0
+
+    legacy_out = transformed(legacy_df)
+    arrow_out  = transformed(arrow_df)
+    assert legacy_out.exceptAll(arrow_out).count() == 0, "rows only in legacy output"
+    assert arrow_out.exceptAll(legacy_out).count() == 0, "rows only in arrow output"
+    print("✓ Transformed outputs match\n")
+
+    print(f"  legacy astype(str) handoff : {legacy_s:8.2f} s")
+    print(f"  typed Arrow handoff        : {arrow_s:8.2f} s")
+    print(f"  speed-up                   : {legacy_s / arrow_s:8.2f}x")
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
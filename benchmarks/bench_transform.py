@@ -0,0 +1,161 @@
+"""
+benchmarks/bench_transform.py
+─────────────────────────────────────────────────────────────────────────────
+Micro-benchmark: legacy row-wise pandas_transform_data vs the vectorized
+nullable-dtype version in etl_pip.py, on a synthetic billing CSV frame.
+Also checks both produce the same values column by column.
+
+No DB or API access — dummy DB env vars are set before importing etl_pip.
+
+Run:  python benchmarks/bench_transform.py [rows]      (default 1,000,000)
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+for var in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(var, "benchmark")
+
+import etl_pip  # noqa: E402
+from etl_pip import (  # noqa: E402
+    POSTGRES_COLUMNS, INTEGER_COLUMNS, BIGINT_COLUMNS, NUMERIC_COLUMNS,
+)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Synthetic input — shaped like pd.read_csv output of the order report export
+# ══════════════════════════════════════════════════════════════════════════════
+
+def make_raw_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    def with_nans(values, frac=0.02):
+        values = pd.Series(values)
+        return values.mask(rng.random(rows) < frac)
+
+    dates = pd.Timestamp("2024-12-01") + pd.to_timedelta(rng.integers(0, 7, rows), unit="D")
+    df = pd.DataFrame({
+        "invoice":           [f"INV{i // 3:08d}" for i in range(rows)],
+        "orderDate":         with_nans(dates.strftime("%d-%m-%Y")),
+        "time":              with_nans(pd.Series(rng.integers(0, 86400, rows)).map(
+                                 lambda s: f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}.000")),
+        "productId":         with_nans(rng.integers(1, 50_000, rows).astype(float)),
+        "productName":       with_nans(rng.choice([f"Product {i}" for i in range(5000)], rows)),
+        "barcode":           with_nans(rng.integers(10**11, 10**12, rows).astype(float)),
+        "quantity":          rng.integers(1, 10, rows),
+        "productMrp":        rng.random(rows) * 500,
+        "totalProductPrice": rng.random(rows) * 1000,
+        "GST":               with_nans(rng.choice([5.0, 12.0, 18.0], rows)),
+        "cess":              with_nans(rng.random(rows)),
+        "brandName":         rng.choice([f"Brand {i}" for i in range(400)], rows),
+        "subCategoryOf":     rng.choice([f"Category {i}" for i in range(60)], rows),
+        "storeName":         rng.choice([f"Store {i}" for i in range(120)], rows),
+        "customerNumber":    with_nans(rng.integers(6 * 10**9, 10**10, rows).astype(float), 0.3),
+        "orderType":         "online",
+    })
+    return df
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Legacy transform — frozen copy of the pre-vectorization implementation
+# ══════════════════════════════════════════════════════════════════════════════
+
+def legacy_transform(df: pd.DataFrame) -> pd.DataFrame:
+    if "productMrp" in df.columns:
+        df = df.drop(columns=["productMrp"])
+
+    if "orderDate" in df.columns:
+        formats_to_try = ["%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d"]
+        df['orderDate_parsed'] = None
+        for fmt in formats_to_try:
+            mask = df['orderDate_parsed'].isna() & df['orderDate'].notna()
+            if mask.any():
+                parsed_dates = pd.to_datetime(df.loc[mask, 'orderDate'], format=fmt, errors='coerce')
+                if parsed_dates.notna().sum() > 0:
+                    df.loc[mask & parsed_dates.notna(), 'orderDate_parsed'] = parsed_dates[parsed_dates.notna()]
+        df['orderDate'] = df['orderDate_parsed'].apply(lambda x: x.date() if pd.notnull(x) else None)
+        df = df.drop(columns=['orderDate_parsed'])
+
+    if "time" in df.columns:
+        df["time"] = df["time"].astype(str).str[:8]
+        df["time"] = df["time"].replace(["nan", "NaT"], None)
+
+    for col in INTEGER_COLUMNS + BIGINT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = df[col].apply(lambda x: int(x) if pd.notnull(x) else None)
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = df[col].apply(lambda x: float(x) if pd.notnull(x) else None)
+
+    string_cols = [
+        c for c in df.columns
+        if c in POSTGRES_COLUMNS
+        and c not in INTEGER_COLUMNS + BIGINT_COLUMNS + NUMERIC_COLUMNS + ["orderDate", "time"]
+    ]
+    for col in string_cols:
+        df[col] = df[col].astype(str).replace("nan", None)
+
+    df = df[[c for c in POSTGRES_COLUMNS if c in df.columns]]
+    for col in POSTGRES_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    return df[POSTGRES_COLUMNS]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Equivalence check
+# ══════════════════════════════════════════════════════════════════════════════
+
+def assert_same_values(old: pd.DataFrame, new: pd.DataFrame) -> None:
+    assert list(old.columns) == list(new.columns), "column order differs"
+    for col in POSTGRES_COLUMNS:
+        if col in INTEGER_COLUMNS + BIGINT_COLUMNS + NUMERIC_COLUMNS:
+            a = pd.to_numeric(old[col]).astype("Float64")
+            b = new[col].astype("Float64")
+        elif col == "orderDate":
+            a = pd.to_datetime(old[col])
+            b = new[col]
+        else:
+            a = old[col].astype(object).where(old[col].notna(), None)
+            b = new[col].astype(object).where(new[col].notna(), None)
+        pd.testing.assert_series_equal(
+            a.reset_index(drop=True), b.reset_index(drop=True),
+            check_dtype=False, check_names=False, obj=col,
+        )
+
+
+def _timed(fn, df):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn(df.copy())
+    return out, time.perf_counter() - start
+
+
+def main(rows: int) -> None:
+    print(f"Building synthetic frame: {rows:,} rows...")
+    raw = make_raw_frame(rows)
+
+    old, old_secs = _timed(legacy_transform, raw)
+    new, new_secs = _timed(etl_pip.pandas_transform_data, raw)
+    assert_same_values(old, new)
+
+    print(f"  legacy row-wise transform : {old_secs:8.2f} s")
+    print(f"  vectorized transform      : {new_secs:8.2f} s")
+    print(f"  speedup                   : {old_secs / new_secs:8.1f}x")
+    print("  ✓ outputs match column by column")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,8 +1,19 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
+import atexit
 import os
+import sys
+import threading
+import time
 from dotenv import load_dotenv
 
+try:
+    from monitoring.metrics import record_db_pool_checkouts
+except ImportError:
+    record_db_pool_checkouts = None
+
 load_dotenv()
 
 
@@ -13,33 +24,134 @@ def require_env(name: str) -> str:
     return value
 
 
+# =============================================================================
+# SHARED CONNECTION POOL
+# -----------------------------------------------------------------------------
+# One SQLAlchemy engine per process, created on first use and reused by every
+# queries/* and monthly_query/* fetch — callers must not dispose() it.
+# Tune in your .env file:
+#   DB_POOL_SIZE=5         → connections kept open in the pool
+#   DB_MAX_OVERFLOW=5      → extra connections allowed under burst load
+#   DB_POOL_TIMEOUT=30     → seconds to wait for a free connection
+#   DB_POOL_RECYCLE=1800   → reconnect connections older than this (seconds)
+#
+# Checkout latency (time spent waiting for a pooled connection) is tracked
+# per process and pushed to monitoring once at exit.
+# =============================================================================
+
+DB_POOL_SIZE    = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+_engine      = None
+_engine_lock = threading.Lock()
+_checkouts   = {"count": 0, "total": 0.0, "max": 0.0}
+_stats_lock  = threading.Lock()
+
+
+def _record_checkout(seconds: float):
+    with _stats_lock:
+        _checkouts["count"] += 1
+        _checkouts["total"] += seconds
+        _checkouts["max"]    = max(_checkouts["max"], seconds)
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_checkout(time.perf_counter() - start)
+
+
+def pool_checkout_stats() -> dict:
+    """Checkouts so far in this process: count, mean and max wait in seconds."""
+    with _stats_lock:
+        count = _checkouts["count"]
+        return {
+            "count": count,
+            "mean":  _checkouts["total"] / count if count else 0.0,
+            "max":   _checkouts["max"],
+        }
+
+
+def _push_checkout_stats():
+    stats = pool_checkout_stats()
+    if record_db_pool_checkouts and stats["count"]:
+        script = os.path.splitext(os.path.basename(sys.argv[0]))[0] or "python"
+        record_db_pool_checkouts(script, stats["count"], stats["mean"], stats["max"])
+
+
+atexit.register(_push_checkout_stats)
+
 
 def get_db_connection():
-    try:
-        db_user = require_env("DB_USER")
-        db_password = require_env("DB_PASSWORD")
-        db_host = require_env("DB_HOST")
-        db_name = require_env("DB_NAME")
-        db_port = os.getenv("DB_PORT", "5432")
-
-        db_url = (
-            f"postgresql+psycopg2://{db_user}:{db_password}"
-            f"@{db_host}:{db_port}/{db_name}"
-        )
-
-        engine = create_engine(
-            db_url,
-            echo=False,
-            pool_pre_ping=True,
-        )
-
-        # Test connection
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-
-        return engine
-
-    except SQLAlchemyError as exc:
-        print(f"Database connection failed: {exc}")
-        return None
+    """Return the process-wide pooled engine, creating it on first call (None on failure)."""
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+        try:
+            db_user = require_env("DB_USER")
+            db_password = require_env("DB_PASSWORD")
+            db_host = require_env("DB_HOST")
+            db_name = require_env("DB_NAME")
+            db_port = os.getenv("DB_PORT", "5432")
+
+            db_url = (
+                f"postgresql+psycopg2://{db_user}:{db_password}"
+                f"@{db_host}:{db_port}/{db_name}"
+            )
+
+            engine = create_engine(
+                db_url,
+                echo=False,
+                poolclass=_TimedQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+
+            # Test connection once, when the pool is created
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+            _engine = engine
+            return _engine
+
+        except SQLAlchemyError as exc:
+            print(f"Database connection failed: {exc}")
+            return None
+
+
+@contextmanager
+def borrow_connection():
+    """
+    Borrow a pooled connection for the duration of a with-block.
+
+        with borrow_connection() as conn:
+            df = pd.read_sql(query, conn)
+    """
+    engine = get_db_connection()
+    if engine is None:
+        raise RuntimeError("Database connection unavailable")
+    with engine.connect() as conn:
+        yield conn
+
 
+def dispose_engine():
+    """Close every pooled connection, e.g. after a fork or at shutdown."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
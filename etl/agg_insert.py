@@ -1,6 +1,7 @@
 import psycopg2
 import psycopg2.extras
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import time
 import os
@@ -48,6 +49,12 @@ AGG_REQUIRED_COLUMNS = [
 # Threshold — mirrors etl_pip.py
 PANDAS_ROW_THRESHOLD = int(os.getenv("PANDAS_ROW_THRESHOLD", "500000"))
 
+# How aggregate rows are written (Pandas path):
+#   AGG_WRITE_MODE=replace      → delete the batch's dates, reinsert (default)
+#   AGG_WRITE_MODE=incremental  → upsert on (dimension, orderdate); only keys
+#                                 whose values changed or disappeared are written
+AGG_WRITE_MODE = os.getenv("AGG_WRITE_MODE", "replace").strip().lower()
+
 
 # =============================================================================
 # ENGINE SELECTOR  (reads USE_ENGINE / PANDAS_ROW_THRESHOLD from .env)
@@ -175,110 +182,609 @@ def exclude_ho_marlboro(pandas_df: pd.DataFrame) -> pd.DataFrame:
     return df_agg
 
 
+# =============================================================================
+# NAME ALIASES  (maintained by product_update.py)
+# -----------------------------------------------------------------------------
+# name_aliases maps retired product/store names to their canonical name.
+# Aggregates are computed on canonical names, so renamed products merge into
+# one (name, date) row at write time and product_update.py has nothing left
+# to rewrite for new dates. If the table does not exist yet, names are
+# written as they arrive.
+# =============================================================================
+
+NAME_ALIAS_TABLE   = "name_aliases"
+NAME_ALIAS_COLUMNS = {"product": "productName", "store": "storeName"}
+
+
+def load_name_aliases(cur) -> dict:
+    """Return {source column: {old_name: canonical_name}} from name_aliases."""
+    cur.execute("SELECT to_regclass(%s)", (NAME_ALIAS_TABLE,))
+    if cur.fetchone()[0] is None:
+        print(f"No {NAME_ALIAS_TABLE} table — aggregating names as-is.")
+        return {}
+    cur.execute(f"SELECT dimension, old_name, canonical_name FROM {NAME_ALIAS_TABLE}")
+    aliases = {}
+    for dimension, old_name, canonical_name in cur.fetchall():
+        if dimension in NAME_ALIAS_COLUMNS:
+            aliases.setdefault(NAME_ALIAS_COLUMNS[dimension], {})[old_name] = canonical_name
+    return aliases
+
+
+def apply_name_aliases_pandas(df_agg: pd.DataFrame, aliases: dict) -> pd.DataFrame:
+    """Rewrite aliased names to canonical in place (df_agg is already a copy)."""
+    for col, mapping in aliases.items():
+        if col not in df_agg.columns:
+            continue
+        hit = df_agg[col].isin(mapping.keys())
+        if hit.any():
+            df_agg.loc[hit, col] = df_agg.loc[hit, col].map(mapping)
+            print(f"  {col}: {int(hit.sum())} row(s) mapped to canonical names")
+    return df_agg
+
+
+def apply_name_aliases_spark(spark_df, aliases: dict):
+    """Spark equivalent of apply_name_aliases_pandas."""
+    for col, mapping in aliases.items():
+        if col in spark_df.columns and mapping:
+            spark_df = spark_df.replace(mapping, subset=[col])
+    return spark_df
+
+
+# =============================================================================
+# DAILY COMPARISON TABLES
+# -----------------------------------------------------------------------------
+# One <table>_daily_comparison per aggregate table, keyed on
+# (orderdate, window_days, dimension), holding each key's values for the day,
+# its ROUND(AVG, 2) over the window_days days before it and the % change.
+# Keys seen only in the trailing window get a row with today's values at 0,
+# matching the dashboard queries' FULL OUTER / UNION shape, so the
+# queries/*_performance.py fetches become a primary-key range lookup.
+#
+# Refreshed after every aggregate write for the batch's dates plus every
+# later date whose trailing window covers one of them.
+# Tune in your .env file:
+#   DAILY_COMPARISON_WINDOWS=7,8   → trailing windows kept (days); 7 is the
+#                                    brand/category window, 8 the dashboard's
+#                                    default store/product date range
+# =============================================================================
+
+DAILY_COMPARISON_WINDOWS = sorted({
+    int(w) for w in os.getenv("DAILY_COMPARISON_WINDOWS", "7,8").split(",") if w.strip()
+})
+
+# (aggregate table, key column, [(metric, aggregate for the day's value)])
+# There is one row per (key, orderdate), so the day aggregate just picks it —
+# except category_sales, whose dashboard query sums the day explicitly.
+DAILY_COMPARISON_DIMENSIONS = [
+    ("brand_sales",    "brandname",     [("nooforders", "SUM"), ("sales", "SUM"), ("aov", "MAX")]),
+    ("store_sales",    "storename",     [("nooforder", "SUM"),  ("sales", "SUM"), ("aov", "MAX")]),
+    ("category_sales", "subcategoryof", [("sales", "SUM")]),
+    ("product_sales",  "productname",   [("sales", "SUM"), ("quantitysold", "SUM")]),
+]
+
+
+def _daily_comparison_select(table: str, key_col: str, metrics: list) -> str:
+    """SELECT producing comparison rows for %(dates)s × %(windows)s."""
+    today_cols = ", ".join(f'{agg}("{m}") AS {m}_today' for m, agg in metrics)
+    avg_cols   = ", ".join(f'ROUND(AVG("{m}")::numeric, 2) AS avg_{m}' for m, _ in metrics)
+    out_cols   = ", ".join(
+        f"COALESCE(t.{m}_today, 0) AS {m}_today, "
+        f"COALESCE(p.avg_{m}, 0) AS avg_{m}, "
+        f"CASE WHEN COALESCE(p.avg_{m}, 0) = 0 THEN NULL "
+        f"ELSE (COALESCE(t.{m}_today, 0)::float8 - p.avg_{m}::float8) "
+        f"/ p.avg_{m}::float8 * 100 END AS {m}_change_pct"
+        for m, _ in metrics
+    )
+    return f'''
+        WITH days AS (
+            SELECT d.orderdate, w.window_days
+            FROM (SELECT DISTINCT "orderdate" FROM {table}
+                  WHERE "orderdate" = ANY(%(dates)s::date[])) AS d
+            CROSS JOIN unnest(%(windows)s::int[]) AS w(window_days)
+        ),
+        today AS (
+            SELECT "{key_col}" AS key, "orderdate", {today_cols}
+            FROM {table}
+            WHERE "orderdate" = ANY(%(dates)s::date[])
+            GROUP BY "{key_col}", "orderdate"
+        ),
+        today_by_window AS (
+            SELECT t.*, d.window_days FROM today t JOIN days d USING ("orderdate")
+        ),
+        previous_period AS (
+            SELECT s."{key_col}" AS key, d.orderdate, d.window_days, {avg_cols}
+            FROM days d
+            JOIN {table} s
+              ON s."orderdate" >= d.orderdate - d.window_days
+             AND s."orderdate" <  d.orderdate
+            GROUP BY s."{key_col}", d.orderdate, d.window_days
+        )
+        SELECT
+            COALESCE(t.orderdate, p.orderdate)     AS orderdate,
+            COALESCE(t.window_days, p.window_days) AS window_days,
+            COALESCE(t.key, p.key)                 AS "{key_col}",
+            {out_cols}
+        FROM today_by_window t
+        FULL OUTER JOIN previous_period p
+          ON t.key = p.key AND t.orderdate = p.orderdate AND t.window_days = p.window_days
+    '''
+
+
+def daily_comparison_table(table: str) -> str:
+    return f"{table}_daily_comparison"
+
+
+def refresh_daily_comparisons(cur, dates: list) -> dict:
+    """
+    Recompute the comparison rows of every dimension for `dates` and each
+    later stored date within max(DAILY_COMPARISON_WINDOWS) days of them.
+    Creates the tables on first use (column types follow the aggregate
+    tables). Runs on cur without committing. Returns {table: rows written}.
+    """
+    if not dates or not DAILY_COMPARISON_WINDOWS:
+        return {}
+    dates   = [str(d)[:10] for d in dates]
+    windows = DAILY_COMPARISON_WINDOWS
+    span    = max(windows)
+
+    written = {}
+    for table, key_col, metrics in DAILY_COMPARISON_DIMENSIONS:
+        target = daily_comparison_table(table)
+        cur.execute(f'''
+            SELECT ARRAY(
+                SELECT DISTINCT s."orderdate"
+                FROM {table} s
+                JOIN unnest(%(dates)s::date[]) AS b(d)
+                  ON s."orderdate" BETWEEN b.d AND b.d + %(span)s
+            ) || %(dates)s::date[]
+        ''', {"dates": dates, "span": span})
+        refresh_dates = cur.fetchone()[0]
+        params = {"dates": refresh_dates, "windows": windows}
+        select = _daily_comparison_select(table, key_col, metrics)
+
+        cur.execute("SELECT to_regclass(%s)", (target,))
+        if cur.fetchone()[0] is None:
+            cur.execute(f"CREATE TABLE {target} AS {select} WITH NO DATA", params)
+            cur.execute(f'ALTER TABLE {target} ADD PRIMARY KEY ("orderdate", "window_days", "{key_col}")')
+
+        cur.execute(f'DELETE FROM {target} WHERE "orderdate" = ANY(%(dates)s::date[])', params)
+        cur.execute(f"INSERT INTO {target} {select}", params)
+        written[target] = cur.rowcount
+        print(f"✓ {target}: {cur.rowcount} rows for {len(set(refresh_dates))} date(s)")
+    return written
+
+
+def refresh_daily_comparisons_committed(dates: list):
+    """refresh_daily_comparisons on its own connection — for the Spark paths,
+    whose JDBC writes have already committed."""
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            refresh_daily_comparisons(cur, dates)
+        conn.commit()
+    finally:
+        conn.close()
+
+
 # =============================================================================
 # ████████████████████████████████████████████████████████████████████████████
 #  PANDAS AGGREGATION PATH
 # ████████████████████████████████████████████████████████████████████████████
 # =============================================================================
 
+# Dimension rollups written by the Pandas path:
+#   (table, source column, db key column, order-count column or None, DB columns)
+PANDAS_AGG_DIMENSIONS = [
+    ("brand_sales",    "brandName",     "brandname",     "nooforders", POSTGRES_COLUMNS_BRAND),
+    ("store_sales",    "storeName",     "storename",     "nooforder",  POSTGRES_COLUMNS_STORE),
+    ("category_sales", "subCategoryOf", "subcategoryof", None,         POSTGRES_COLUMNS_CATEGORY),
+    ("product_sales",  "productName",   "productname",   "nooforders", POSTGRES_COLUMNS_PRODUCT),
+]
+
+
+def pandas_compute_aggregates(df_agg: pd.DataFrame) -> dict:
+    """
+    Compute all 4 (dimension, orderDate) rollups in one pass over shared codes.
+
+    orderDate and invoice are factorized once and every dimension column is
+    factorized once (sorted, so output order matches groupby). Each rollup is
+    then a groupby over dense int group ids built from one int64 key
+    (dim_code * n_dates + date_code), and distinct invoices per group come
+    from pd.unique over (group_id, invoice_code) pairs instead of a per-group
+    nunique.
+
+    Returns {table: DataFrame} with the same columns, order and values the
+    former per-dimension groupby(...).agg(...) calls produced.
+    """
+    date_codes, date_values = pd.factorize(df_agg['orderDate'], sort=True)
+    inv_codes, inv_values   = pd.factorize(df_agg['invoice'])
+    n_dates, n_inv          = max(len(date_values), 1), max(len(inv_values), 1)
+
+    price    = df_agg['totalProductPrice'].array
+    quantity = df_agg['quantity'].array
+
+    results = {}
+    for table, src_col, key_col, orders_col, _ in PANDAS_AGG_DIMENSIONS:
+        dim_codes, dim_values = pd.factorize(df_agg[src_col], sort=True)
+        valid = (dim_codes >= 0) & (date_codes >= 0)
+        key   = dim_codes[valid].astype("int64") * n_dates + date_codes[valid]
+
+        # Dense, sorted group ids → same group order as groupby([dim, orderDate])
+        group_ids, keys = pd.factorize(key, sort=True)
+        sales = pd.Series(price[valid]).groupby(group_ids).sum()
+
+        out = pd.DataFrame({
+            key_col: dim_values.take(keys // n_dates).array,
+            'orderdate': date_values.take(keys % n_dates).array,
+        })
+
+        # Distinct invoices per group — NaN invoices are not counted, as in nunique
+        has_inv    = inv_codes[valid] >= 0
+        pair_group = pd.unique(group_ids[has_inv].astype("int64") * n_inv
+                               + inv_codes[valid][has_inv]) // n_inv
+        n_orders   = np.bincount(pair_group, minlength=len(keys))
+
+        if orders_col is not None:
+            out[orders_col] = n_orders
+        out['sales'] = sales.array
+        if orders_col is not None:
+            out['aov'] = (out['sales'] / out[orders_col]).round(2)
+        if table == "product_sales":
+            out['quantitysold'] = pd.Series(quantity[valid]).groupby(group_ids).sum().array
+
+        results[table] = out
+    return results
+
+
+def _frame_to_db_rows(df: pd.DataFrame) -> list:
+    """Row tuples of plain Python values (None for NA) for execute_values."""
+    df = df.copy()
+    for col in df.select_dtypes(include="datetime").columns:
+        df[col] = df[col].dt.date
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+def _pandas_verified_aggregates(df_agg: pd.DataFrame) -> dict:
+    """pandas_compute_aggregates + the Ho Marlboro safety checks."""
+    print("\nComputing brand / store / category / product sales (Pandas, single pass)...")
+    return _verify_aggregates(pandas_compute_aggregates(df_agg))
+
+
+def _verify_aggregates(aggregates: dict) -> dict:
+    """Ho Marlboro safety checks on computed rollups."""
+    # CRITICAL VERIFICATION
+    if 'Ho Marlboro' in set(aggregates["brand_sales"]['brandname']):
+        raise ValueError("❌ CRITICAL: Ho Marlboro found in brand_sales aggregates!")
+    stores = aggregates["store_sales"]['storename']
+    if 'Ho Marlboro' in set(stores):
+        raise ValueError("❌ CRITICAL ERROR: Ho Marlboro found in store_sales aggregates!")
+    print(f"✓ Verified: Ho Marlboro NOT in store aggregates")
+    print(f"  Stores included: {sorted(stores.unique())}")
+    return aggregates
+
+
 def pandas_run_aggregations(df_agg: pd.DataFrame, conn):
     """
     Run all 4 aggregations and insert via psycopg2 execute_values — Pandas path.
     Receives the already Ho-Marlboro-filtered DataFrame.
-    Idempotency delete already done before this is called.
+    Aggregates come from a single pandas_compute_aggregates pass; inserts run
+    on conn without committing, so the caller's idempotency delete and all
+    four loads share one transaction.
     """
-    cur = conn.cursor()
+    pandas_insert_aggregates(_pandas_verified_aggregates(df_agg), conn)
 
-    # ── Brand Sales ───────────────────────────────────────────────────────────
-    print("\nProcessing Brand Sales (Pandas)...")
-    brand_df = df_agg.groupby(['brandName', 'orderDate'], as_index=False).agg(
-        nooforders=('invoice', 'nunique'),
-        sales=('totalProductPrice', 'sum')
-    )
-    brand_df['sales'] = pd.to_numeric(brand_df['sales'], errors='coerce')
-    brand_df['aov']   = (brand_df['sales'] / brand_df['nooforders']).round(2)
-    brand_df.rename(columns={'brandName': 'brandname', 'orderDate': 'orderdate'}, inplace=True)
 
-    # CRITICAL VERIFICATION
-    if 'Ho Marlboro' in brand_df['brandname'].values:
-        raise ValueError("❌ CRITICAL: Ho Marlboro found in brand_sales aggregates!")
-
-    brand_cols   = ",".join([f'"{c}"' for c in POSTGRES_COLUMNS_BRAND])
-    brand_tuples = [tuple(row) for row in brand_df[POSTGRES_COLUMNS_BRAND].values]
-    if brand_tuples:
+def pandas_insert_aggregates(aggregates: dict, conn):
+    """Insert already computed {table: DataFrame} rollups on conn, without committing."""
+    cur = conn.cursor()
+    for table, _, _, _, db_columns in PANDAS_AGG_DIMENSIONS:
+        rows = _frame_to_db_rows(aggregates[table][db_columns])
+        if not rows:
+            print(f"No {table} data to insert")
+            continue
+        cols = ",".join([f'"{c}"' for c in db_columns])
         psycopg2.extras.execute_values(
-            cur, f'INSERT INTO brand_sales ({brand_cols}) VALUES %s',
-            brand_tuples, template=None, page_size=1000
+            cur, f'INSERT INTO {table} ({cols}) VALUES %s',
+            rows, template=None, page_size=5000
         )
-        print(f"✓ Inserted {len(brand_tuples)} rows into brand_sales")
-    else:
-        print("No brand data to insert")
+        print(f"✓ Inserted {len(rows)} rows into {table}")
 
-    # ── Store Sales ───────────────────────────────────────────────────────────
-    print("\nProcessing Store Sales (Pandas)...")
-    store_df = df_agg.groupby(['storeName', 'orderDate'], as_index=False).agg(
-        nooforder=('invoice', 'nunique'),
-        sales=('totalProductPrice', 'sum')
-    )
-    store_df['sales'] = pd.to_numeric(store_df['sales'], errors='coerce')
-    store_df['aov']   = (store_df['sales'] / store_df['nooforder']).round(2)
-    store_df.rename(columns={'storeName': 'storename', 'orderDate': 'orderdate'}, inplace=True)
+    cur.close()
 
-    # CRITICAL VERIFICATION
-    if 'Ho Marlboro' in store_df['storename'].values:
-        raise ValueError("❌ CRITICAL ERROR: Ho Marlboro found in store_sales aggregates!")
-    print(f"✓ Verified: Ho Marlboro NOT in store aggregates")
-    print(f"  Stores included: {sorted(store_df['storename'].unique())}")
 
-    store_cols   = ",".join([f'"{c}"' for c in POSTGRES_COLUMNS_STORE])
-    store_tuples = [tuple(row) for row in store_df[POSTGRES_COLUMNS_STORE].values]
-    if store_tuples:
-        psycopg2.extras.execute_values(
-            cur, f'INSERT INTO store_sales ({store_cols}) VALUES %s',
-            store_tuples, template=None, page_size=1000
-        )
-        print(f"✓ Inserted {len(store_tuples)} rows into store_sales")
-    else:
-        print("No store data to insert")
+# =============================================================================
+# STREAMED PARTIAL AGGREGATES  (etl_pip.py, ETL_STREAMING=true)
+# -----------------------------------------------------------------------------
+# The streaming load never holds the whole day's rows. Each chunk is reduced
+# to partial sums per (dimension, orderDate, invoice) as soon as it is in
+# billing_data; names, dates and invoices are kept as int codes into
+# dictionaries shared by all chunks, so partials carry no per-row strings.
+# aggregates() merges invoices that span chunks, maps names through
+# name_aliases and counts distinct invoices — the result equals
+# pandas_compute_aggregates over the concatenated chunks.
+# Memory follows the number of distinct (dimension, date, invoice) keys;
+# lines of one invoice collapse, so product partials stay closest to the
+# row count.
+#   STREAM_AGG_COMPACT_CHUNKS=8 → merge a table's partials every N chunks
+# =============================================================================
 
-    # ── Category Sales ────────────────────────────────────────────────────────
-    print("\nProcessing Category Sales (Pandas)...")
-    category_df = df_agg.groupby(['subCategoryOf', 'orderDate'], as_index=False).agg(
-        nooforder=('invoice', 'nunique'),
-        sales=('totalProductPrice', 'sum')
-    )
-    category_df.rename(columns={'subCategoryOf': 'subcategoryof', 'orderDate': 'orderdate'}, inplace=True)
+STREAM_AGG_COMPACT_CHUNKS = int(os.getenv("STREAM_AGG_COMPACT_CHUNKS", "8"))
+
+_PARTIAL_KEYS = ["dim", "date", "inv"]
+
+
+class _ValueCodes:
+    """Value → int code dictionary shared by every streamed chunk (NA → -1)."""
+
+    def __init__(self):
+        self.codes  = {}
+        self.values = []
+
+    def encode(self, series: pd.Series) -> np.ndarray:
+        local, uniques = pd.factorize(series)
+        lookup = np.empty(len(uniques) + 1, dtype="int32")
+        lookup[-1] = -1
+        for i, value in enumerate(uniques):
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            lookup[i] = code
+        return lookup[local]
+
+
+class StreamingAggregates:
+    """Partial (dimension, orderDate) rollups accumulated chunk by chunk."""
+
+    def __init__(self):
+        self.rows     = 0
+        self.ho_rows  = 0
+        self._chunks  = 0
+        self._dates   = _ValueCodes()
+        self._invoice = _ValueCodes()
+        self._dims    = {src_col: _ValueCodes() for _, src_col, _, _, _ in PANDAS_AGG_DIMENSIONS}
+        self._parts   = {table: [] for table, _, _, _, _ in PANDAS_AGG_DIMENSIONS}
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Reduce one transformed chunk to partials; the chunk itself is not kept."""
+        missing = [c for c in AGG_REQUIRED_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"AGG SCHEMA ERROR: Missing columns: {missing}")
+
+        # Same row filters as load_aggregates_to_postgres + exclude_ho_marlboro
+        price = pd.to_numeric(df['totalProductPrice'], errors='coerce')
+        df    = df[price.notna()].assign(totalProductPrice=price[price.notna()])
+        kept  = df[df['storeName'] != 'Ho Marlboro']
+        self.ho_rows += int((df['storeName'] == 'Ho Marlboro').sum())
+        self.rows    += len(kept)
+        self._chunks += 1
+
+        date_codes = self._dates.encode(kept['orderDate'])
+        inv_codes  = self._invoice.encode(kept['invoice'])
+
+        for table, src_col, _, _, _ in PANDAS_AGG_DIMENSIONS:
+            dim_codes = self._dims[src_col].encode(kept[src_col])
+            valid     = (dim_codes >= 0) & (date_codes >= 0)
+            part = pd.DataFrame({
+                "dim":   dim_codes[valid],
+                "date":  date_codes[valid],
+                "inv":   inv_codes[valid],
+                "sales": kept['totalProductPrice'].array[valid],
+            })
+            if table == "product_sales":
+                part["quantity"] = kept['quantity'].array[valid]
+            self._parts[table].append(part.groupby(_PARTIAL_KEYS, sort=False, as_index=False).sum())
+
+            if self._chunks % STREAM_AGG_COMPACT_CHUNKS == 0:
+                self._parts[table] = [self._merged(table)]
+
+    def _merged(self, table: str) -> pd.DataFrame:
+        parts = self._parts[table]
+        if len(parts) == 1:
+            return parts[0]
+        return pd.concat(parts, ignore_index=True).groupby(
+            _PARTIAL_KEYS, sort=False, as_index=False).sum()
+
+    def dates(self) -> list:
+        """Distinct order dates of the accumulated rows (as dates_in_data)."""
+        return list(self._dates.values)
+
+    def aggregates(self, aliases: dict = None) -> dict:
+        """
+        Combine the partials into {table: DataFrame}, in the format
+        pandas_compute_aggregates returns. aliases as from load_name_aliases.
+        """
+        aliases = aliases or {}
+        date_rank, date_values = pd.factorize(pd.Index(self._dates.values), sort=True)
+
+        results = {}
+        for table, src_col, key_col, orders_col, _ in PANDAS_AGG_DIMENSIONS:
+            labels  = pd.Index(self._dims[src_col].values, dtype=object)
+            mapping = aliases.get(src_col)
+            if mapping:
+                labels = labels.map(lambda name: mapping.get(name, name))
+            dim_rank, dim_values = pd.factorize(labels, sort=True)
+
+            # Sorted ranks → same group order as pandas_compute_aggregates;
+            # aliased names now share a rank, so merge their invoices again
+            part = pd.concat(self._parts[table], ignore_index=True)
+            part["dim"]  = dim_rank[part["dim"].to_numpy(dtype="int64")]
+            part["date"] = date_rank[part["date"].to_numpy(dtype="int64")]
+            per_invoice  = part.groupby(_PARTIAL_KEYS, sort=False).sum()
+
+            by_group = per_invoice.groupby(level=["dim", "date"], sort=True)
+            totals   = by_group.sum()
+            # Distinct invoices per group — NaN invoices (-1) are not counted
+            has_inv  = pd.Series(per_invoice.index.get_level_values("inv") >= 0,
+                                 index=per_invoice.index)
+            n_orders = has_inv.groupby(level=["dim", "date"], sort=True).sum()
+
+            out = pd.DataFrame({
+                key_col: dim_values.take(totals.index.get_level_values("dim")).array,
+                'orderdate': date_values.take(totals.index.get_level_values("date")).array,
+            })
+            if orders_col is not None:
+                out[orders_col] = n_orders.to_numpy(dtype="int64")
+            out['sales'] = totals['sales'].array
+            if orders_col is not None:
+                out['aov'] = (out['sales'] / out[orders_col]).round(2)
+            if table == "product_sales":
+                out['quantitysold'] = totals['quantity'].array
+
+            results[table] = out
+        return results
 
-    category_cols   = ",".join([f'"{c}"' for c in POSTGRES_COLUMNS_CATEGORY])
-    category_tuples = [tuple(row) for row in category_df[POSTGRES_COLUMNS_CATEGORY].values]
-    if category_tuples:
-        psycopg2.extras.execute_values(
-            cur, f'INSERT INTO category_sales ({category_cols}) VALUES %s',
-            category_tuples, template=None, page_size=1000
-        )
-        print(f"✓ Inserted {len(category_tuples)} rows into category_sales")
-    else:
-        print("No category data to insert")
 
-    # ── Product Sales ─────────────────────────────────────────────────────────
-    print("\nProcessing Product Sales (Pandas)...")
-    product_df = df_agg.groupby(['productName', 'orderDate'], as_index=False).agg(
-        nooforders=('invoice', 'nunique'),
-        sales=('totalProductPrice', 'sum'),
-        quantitysold=('quantity', 'sum')
+# =============================================================================
+# INCREMENTAL MAINTENANCE  (Pandas path, AGG_WRITE_MODE=incremental)
+# -----------------------------------------------------------------------------
+# Instead of wiping every aggregate row for the batch's dates, each table is
+# reconciled key by key against the freshly computed rollups:
+#   - new keys               → inserted
+#   - keys whose values moved → updated (ON CONFLICT ... DO UPDATE ... WHERE
+#                               the row IS DISTINCT FROM the new values)
+#   - unchanged keys         → not written at all (no new tuple, no WAL)
+#   - keys that vanished     → deleted (only within the batch's dates)
+# Distinct-invoice counts are not additive, so each key's values are
+# recomputed from the batch rather than summed onto the stored row; the
+# "delta" is the set of keys whose recomputed values differ.
+#
+# Requires a unique index on (dimension, orderdate) per table — created on
+# first use by ensure_aggregate_natural_keys(). Tables loaded in replace mode
+# can already hold duplicate keys (re-runs, renamed stores/products), so before
+# the index is built:
+#   - exact duplicate rows are collapsed to one
+#   - duplicate keys on the batch's own dates are deleted (the upsert
+#     recomputes them from the batch anyway)
+#   - any other duplicate key with differing values aborts the load with the
+#     affected dates, since there is no way to tell which row is right
+# =============================================================================
+
+def _dedupe_aggregate_keys(cur, table: str, key_col: str, db_columns: list,
+                           dates: list) -> int:
+    """Clear duplicate (key, orderdate) rows ahead of the unique index. Returns rows removed."""
+    same_row = " AND ".join(
+        [f'a."{key_col}" = b."{key_col}"', 'a."orderdate" = b."orderdate"']
+        + [f'a."{c}" IS NOT DISTINCT FROM b."{c}"'
+           for c in db_columns if c not in (key_col, "orderdate")]
     )
-    product_df.rename(columns={'productName': 'productname', 'orderDate': 'orderdate'}, inplace=True)
+    cur.execute(f'''
+        DELETE FROM {table} a USING {table} b
+        WHERE a.ctid > b.ctid AND {same_row}
+    ''')
+    removed = cur.rowcount
+
+    if dates:
+        placeholders = ",".join(["%s"] * len(dates))
+        cur.execute(f'''
+            DELETE FROM {table} t
+            WHERE t."orderdate" IN ({placeholders})
+              AND EXISTS (
+                  SELECT 1 FROM {table} d
+                  WHERE d."{key_col}" = t."{key_col}" AND d."orderdate" = t."orderdate"
+                    AND d.ctid <> t.ctid
+              )
+        ''', dates)
+        removed += cur.rowcount
+
+    cur.execute(f'''
+        SELECT "orderdate", COUNT(*) FROM (
+            SELECT "{key_col}", "orderdate" FROM {table}
+            GROUP BY "{key_col}", "orderdate" HAVING COUNT(*) > 1
+        ) dup
+        GROUP BY "orderdate" ORDER BY "orderdate"
+    ''')
+    conflicts = cur.fetchall()
+    if conflicts:
+        shown = ", ".join(f"{d} ({n} keys)" for d, n in conflicts[:10])
+        more  = f" and {len(conflicts) - 10} more dates" if len(conflicts) > 10 else ""
+        raise ValueError(
+            f"AGG KEY ERROR: {table} has duplicate ({key_col}, orderdate) rows "
+            f"with differing values on {shown}{more} — cannot create "
+            f"{table}_natural_key. Re-load those dates with AGG_WRITE_MODE=replace "
+            f"(e.g. etl_pip.py --backfill) and re-run."
+        )
+    return removed
+
+
+def ensure_aggregate_natural_keys(cur, dates: list = None):
+    """Create the (dimension, orderdate) unique indexes ON CONFLICT targets."""
+    for table, _, key_col, _, db_columns in PANDAS_AGG_DIMENSIONS:
+        cur.execute("SELECT to_regclass(%s)", (f"{table}_natural_key",))
+        if cur.fetchone()[0] is not None:
+            continue
+        removed = _dedupe_aggregate_keys(cur, table, key_col, db_columns, dates or [])
+        if removed:
+            print(f"  Removed {removed} duplicate rows from {table} before indexing")
+        cur.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS {table}_natural_key '
+            f'ON {table} ("{key_col}", "orderdate")'
+        )
+
 
-    product_cols   = ",".join([f'"{c}"' for c in POSTGRES_COLUMNS_PRODUCT])
-    product_tuples = [tuple(row) for row in product_df[POSTGRES_COLUMNS_PRODUCT].values]
-    if product_tuples:
+def upsert_aggregate_table(cur, table: str, key_col: str, db_columns: list,
+                           rows: list, dates: list) -> tuple:
+    """
+    Reconcile one aggregate table for `dates` against `rows`.
+    Returns (rows inserted or updated, rows deleted).
+    """
+    stage      = f"_stage_{table}"
+    cols       = ",".join([f'"{c}"' for c in db_columns])
+    value_cols = [c for c in db_columns if c not in (key_col, "orderdate")]
+    set_clause = ", ".join([f'"{c}" = EXCLUDED."{c}"' for c in value_cols])
+    current    = ", ".join([f't."{c}"' for c in value_cols])
+    incoming   = ", ".join([f'EXCLUDED."{c}"' for c in value_cols])
+
+    cur.execute(f'CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP')
+    if rows:
         psycopg2.extras.execute_values(
-            cur, f'INSERT INTO product_sales ({product_cols}) VALUES %s',
-            product_tuples, template=None, page_size=1000
+            cur, f'INSERT INTO {stage} ({cols}) VALUES %s',
+            rows, template=None, page_size=5000
         )
-        print(f"✓ Inserted {len(product_tuples)} rows into product_sales")
-    else:
-        print("No product data to insert")
+
+    cur.execute(f'''
+        INSERT INTO {table} AS t ({cols})
+        SELECT {cols} FROM {stage}
+        ON CONFLICT ("{key_col}", "orderdate") DO UPDATE SET {set_clause}
+        WHERE ({current}) IS DISTINCT FROM ({incoming})
+    ''')
+    written = cur.rowcount
+    if not dates:
+        return written, 0
+
+    placeholders = ",".join(["%s"] * len(dates))
+    cur.execute(f'''
+        DELETE FROM {table} t
+        WHERE t."orderdate" IN ({placeholders})
+          AND NOT EXISTS (
+              SELECT 1 FROM {stage} s
+              WHERE s."{key_col}" = t."{key_col}" AND s."orderdate" = t."orderdate"
+          )
+    ''', dates)
+    deleted = cur.rowcount
+    return written, deleted
+
+
+def pandas_upsert_aggregations(df_agg: pd.DataFrame, conn, dates: list):
+    """
+    Incremental counterpart of pandas_run_aggregations.
+    Runs on conn without committing; the caller commits all four tables together.
+    """
+    pandas_upsert_aggregates(_pandas_verified_aggregates(df_agg), conn, dates)
+
+
+def pandas_upsert_aggregates(aggregates: dict, conn, dates: list):
+    """Upsert already computed {table: DataFrame} rollups on conn, without committing."""
+    cur = conn.cursor()
+    ensure_aggregate_natural_keys(cur, dates)
+
+    for table, _, key_col, _, db_columns in PANDAS_AGG_DIMENSIONS:
+        rows = _frame_to_db_rows(aggregates[table][db_columns])
+        written, deleted = upsert_aggregate_table(cur, table, key_col, db_columns, rows, dates)
+        unchanged = len(rows) - written
+        print(f"✓ {table}: {written} inserted/updated, {deleted} removed, "
+              f"{unchanged} unchanged (not rewritten)")
 
     cur.close()
 
@@ -310,25 +816,70 @@ def get_spark():
     )
 
 
-def write_to_postgres(spark_df, table: str, row_label: str):
+# =============================================================================
+# SPARK JDBC WRITE LAYER  (shared with etl_pip.spark_load_to_postgres)
+# -----------------------------------------------------------------------------
+# Writes are repartitioned so each partition streams through its own JDBC
+# connection, and reWriteBatchedInserts lets the PostgreSQL driver collapse
+# each batch into multi-row INSERTs. Tune in your .env file:
+#   SPARK_JDBC_PARTITIONS=4            → parallel connections (all tables)
+#   SPARK_JDBC_BATCHSIZE=10000         → rows per JDBC batch (all tables)
+#   SPARK_JDBC_PARTITIONS_<TABLE>=8    → per-table override, e.g.
+#   SPARK_JDBC_BATCHSIZE_BILLING_DATA=20000
+#
+# Row counts: pass row_count when the caller already knows it. Otherwise the
+# frame is persisted and counted once, and the write reads from that cache
+# instead of re-running the lineage.
+# =============================================================================
+
+SPARK_JDBC_PARTITIONS = int(os.getenv("SPARK_JDBC_PARTITIONS", "4"))
+SPARK_JDBC_BATCHSIZE  = int(os.getenv("SPARK_JDBC_BATCHSIZE", "10000"))
+JDBC_WRITE_URL        = f"{JDBC_URL}?reWriteBatchedInserts=true"
+
+
+def _jdbc_setting(name: str, table: str, default: int) -> int:
+    return int(os.getenv(f"{name}_{table.upper()}", default))
+
+
+def jdbc_write(spark_df, table: str, row_count: int = None) -> int:
+    """Append spark_df to table over parallel batched JDBC connections. Returns rows written."""
+    partitions = _jdbc_setting("SPARK_JDBC_PARTITIONS", table, SPARK_JDBC_PARTITIONS)
+    batchsize  = _jdbc_setting("SPARK_JDBC_BATCHSIZE", table, SPARK_JDBC_BATCHSIZE)
+
+    cached = row_count is None
+    if cached:
+        spark_df  = spark_df.persist()
+        row_count = spark_df.count()
+    try:
+        if row_count == 0:
+            return 0
+        (
+            spark_df.repartition(partitions)
+            .write
+            .format("jdbc")
+            .option("url", JDBC_WRITE_URL)
+            .option("dbtable", table)
+            .option("user", JDBC_PROPERTIES["user"])
+            .option("password", JDBC_PROPERTIES["password"])
+            .option("driver", JDBC_PROPERTIES["driver"])
+            .option("batchsize", batchsize)
+            .option("numPartitions", partitions)
+            .mode("append")
+            .save()
+        )
+        print(f"  JDBC write: {table} — {partitions} partition(s), batchsize {batchsize}")
+        return row_count
+    finally:
+        if cached:
+            spark_df.unpersist()
+
+
+def write_to_postgres(spark_df, table: str, row_label: str, row_count: int = None):
     """Write Spark DataFrame to PostgreSQL via JDBC."""
-    count = spark_df.count()
+    count = jdbc_write(spark_df, table, row_count)
     if count == 0:
         print(f"No {row_label} data to insert")
         return
-    (
-        spark_df.write
-        .format("jdbc")
-        .option("url", JDBC_URL)
-        .option("dbtable", table)
-        .option("user", JDBC_PROPERTIES["user"])
-        .option("password", JDBC_PROPERTIES["password"])
-        .option("driver", JDBC_PROPERTIES["driver"])
-        .option("batchsize", 1000)
-        .option("numPartitions", 1)
-        .mode("append")
-        .save()
-    )
     print(f"✓ Inserted {count} rows into {table} ({row_label})")
 
 
@@ -339,11 +890,18 @@ def spark_run_aggregations(df_agg: pd.DataFrame):
     Converts to Spark, runs groupBy, writes via JDBC.
     Idempotency delete already done before this is called.
     """
+    print("Initialising Spark session for aggregations...")
+    spark = get_spark()
+    spark_aggregate_and_write(spark.createDataFrame(df_agg))
+
+
+def spark_aggregate_and_write(spark_df):
+    """
+    Run all 4 aggregations on a Ho-Marlboro-filtered Spark DataFrame and
+    write via JDBC. Idempotency delete already done before this is called.
+    """
     SparkSession, F, DoubleType, StringType = _import_spark()
 
-    print("Initialising Spark session for aggregations...")
-    spark    = get_spark()
-    spark_df = spark.createDataFrame(df_agg)
     spark_df = spark_df.withColumn("totalProductPrice", F.col("totalProductPrice").cast(DoubleType()))
 
     # ── Brand Sales ───────────────────────────────────────────────────────────
@@ -427,21 +985,127 @@ def spark_run_aggregations(df_agg: pd.DataFrame):
     write_to_postgres(product_df, "product_sales", "Ho Marlboro excluded")
 
 
+# =============================================================================
+# SPARK-NATIVE ENTRY POINT  (called from etl_pip.py on the PySpark path)
+# -----------------------------------------------------------------------------
+# Same flow as load_aggregates_to_postgres, but validation, Ho Marlboro
+# exclusion and all four aggregations stay in Spark on the caller's live
+# DataFrame and session — nothing is collected to the driver except the
+# distinct batch dates and one row of validation counts.
+# =============================================================================
+
+def load_aggregates_from_spark(spark_df):
+    """
+    Aggregation entry point for a transformed billing Spark DataFrame.
+    Runs on spark_df's own session; no new session or createDataFrame.
+    """
+    SparkSession, F, DoubleType, StringType = _import_spark()
+    conn = None
+    try:
+        # ── Step 1: Validation (one Spark job) ────────────────────────────────
+        print("\n" + "=" * 60)
+        print("AGG INPUT SCHEMA VALIDATION  (PySpark)")
+        print("=" * 60)
+
+        missing = [c for c in AGG_REQUIRED_COLUMNS if c not in spark_df.columns]
+        if missing:
+            raise ValueError(f"AGG SCHEMA ERROR: Missing columns: {missing}")
+        print(f"✓ All {len(AGG_REQUIRED_COLUMNS)} required columns present.")
+
+        spark_df = spark_df.withColumn(
+            "totalProductPrice", F.col("totalProductPrice").cast(DoubleType())
+        )
+        is_ho = F.col("storeName").eqNullSafe("Ho Marlboro")
+        stats = spark_df.agg(
+            F.count(F.lit(1)).alias("total_rows"),
+            F.count("totalProductPrice").alias("valid_price"),
+            F.count(F.when(F.col("totalProductPrice").isNotNull(), F.col("orderDate")))
+             .alias("valid_dates"),
+            F.sum(F.when(is_ho & F.col("totalProductPrice").isNotNull(), 1).otherwise(0))
+             .alias("ho_rows"),
+        ).first()
+
+        if stats["valid_price"] == 0:
+            raise ValueError("AGG SCHEMA ERROR: 'totalProductPrice' has no valid numeric values.")
+        print(f"✓ 'totalProductPrice' has {stats['valid_price']} valid numeric values.")
+        if stats["valid_dates"] == 0:
+            raise ValueError("AGG SCHEMA ERROR: 'orderDate' has no valid values.")
+        print(f"✓ 'orderDate' has {stats['valid_dates']} non-null values.")
+        print("✓ Agg input validation passed.")
+        print("=" * 60 + "\n")
+
+        # ── Step 2: Ho Marlboro exclusion (Spark) ─────────────────────────────
+        used_rows = stats["valid_price"] - stats["ho_rows"]
+        print(f"Ho Marlboro rows excluded: {stats['ho_rows']}")
+        print(f"Rows used for aggregates: {used_rows}")
+        if used_rows == 0:
+            raise ValueError("WARNING: No data remaining after Ho Marlboro exclusion!")
+        print("Connecting to database for idempotency check...")
+        conn = psycopg2.connect(**DB_CONFIG)
+        cur  = conn.cursor()
+        df_agg = apply_name_aliases_spark(
+            spark_df
+            .filter(F.col("totalProductPrice").isNotNull() & ~is_ho)
+            .select(AGG_REQUIRED_COLUMNS),
+            load_name_aliases(cur)
+        ).persist()
+
+        # ── Step 3: Shared idempotency delete (always psycopg2) ───────────────
+        dates_in_data = [
+            r["orderDate"]
+            for r in df_agg.select("orderDate").distinct().collect()
+            if r["orderDate"] is not None
+        ]
+        delete_existing_aggregates_for_dates(cur, dates_in_data)
+        conn.commit()
+        conn.close()
+        conn = None
+
+        # ── Step 4: Aggregation + JDBC write on the live DataFrame ────────────
+        print("\n🚀  Running PYSPARK aggregations...\n")
+        spark_aggregate_and_write(df_agg)
+        df_agg.unpersist()
+        refresh_daily_comparisons_committed(dates_in_data)
+
+        print(f"\n{'='*60}")
+        print("✓ SUCCESS: All aggregate tables populated WITHOUT Ho Marlboro")
+        print(f"{'='*60}\n")
+
+    except Exception as e:
+        print(f"\n{'='*60}")
+        print(f"❌ ERROR: Failed to insert aggregates: {e}")
+        print(f"{'='*60}\n")
+        import traceback
+        traceback.print_exc()
+        if conn:
+            conn.rollback()
+            conn.close()
+
+
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
 
-def load_aggregates_to_postgres(pandas_df: pd.DataFrame):
+def load_aggregates_to_postgres(pandas_df: pd.DataFrame, raise_errors: bool = False):
     """
-    Main aggregation entry point — called from etl_pip.py.
+    Main aggregation entry point — called from etl_pip.py for Pandas batches.
+    (PySpark batches use load_aggregates_from_spark instead.)
+    Failures are printed and rolled back; with raise_errors=True they are
+    re-raised afterwards (the backfill must not checkpoint such a window).
 
     Flow (same for both engines):
       1. Shared Pandas validation (fast, before any engine work)
-      2. Shared Ho Marlboro exclusion (Pandas, always)
-      3. Shared idempotency delete (psycopg2, always)
+      2. Shared Ho Marlboro exclusion (Pandas, always), then product/store
+         names mapped to canonical via name_aliases
+      3. Shared idempotency delete (psycopg2) — or, with
+         AGG_WRITE_MODE=incremental on the Pandas path, a per-key upsert
+         that leaves unchanged rows untouched (see INCREMENTAL MAINTENANCE)
       4. Engine-specific aggregation + insert
-         - Pandas path : psycopg2.extras.execute_values
+         - Pandas path : single-pass pandas_compute_aggregates, then
+                         execute_values in the same transaction as the delete
          - PySpark path: Spark JDBC write
+      5. Daily comparison tables refreshed for the batch's dates (same
+         transaction on the Pandas path, right after the JDBC write on Spark)
     """
     conn = None
     try:
@@ -455,29 +1119,107 @@ def load_aggregates_to_postgres(pandas_df: pd.DataFrame):
         # ── Step 2: Shared Ho Marlboro exclusion ──────────────────────────────
         df_agg = exclude_ho_marlboro(pandas_df)
 
+        print("Connecting to database for idempotency check...")
+        conn = psycopg2.connect(**DB_CONFIG)
+        with conn.cursor() as cur:
+            df_agg = apply_name_aliases_pandas(df_agg, load_name_aliases(cur))
+
         # ── Step 3: Engine selection ──────────────────────────────────────────
         engine = select_engine(df_agg)
 
-        # ── Step 4: Shared idempotency delete (always psycopg2) ───────────────
         dates_in_data = df_agg['orderDate'].dropna().unique().tolist()
-        print("Connecting to database for idempotency check...")
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur  = conn.cursor()
+
+        if engine == "pandas" and AGG_WRITE_MODE == "incremental":
+            # Upsert changed keys only — no blanket delete
+            print("\n🐼  Running PANDAS aggregations (incremental)...\n")
+            pandas_upsert_aggregations(df_agg, conn, dates_in_data)
+            refresh_daily_comparisons(conn.cursor(), dates_in_data)
+            conn.commit()
+            conn.close()
+            conn = None
+            print(f"\n{'='*60}")
+            print("✓ SUCCESS: All aggregate tables reconciled WITHOUT Ho Marlboro")
+            print(f"{'='*60}\n")
+            return
+
+        # ── Step 4: Shared idempotency delete (always psycopg2) ───────────────
+        cur = conn.cursor()
         delete_existing_aggregates_for_dates(cur, dates_in_data)
-        conn.commit()
 
         # ── Step 5: Engine-specific aggregation + insert ──────────────────────
         if engine == "pandas":
+            # Delete + all four inserts commit together
             print("\n🐼  Running PANDAS aggregations...\n")
             pandas_run_aggregations(df_agg, conn)
+            refresh_daily_comparisons(cur, dates_in_data)
             conn.commit()
             conn.close()
             conn = None
         else:
+            conn.commit()
             conn.close()
             conn = None
             print("\n🚀  Running PYSPARK aggregations...\n")
             spark_run_aggregations(df_agg)
+            refresh_daily_comparisons_committed(dates_in_data)
+
+        print(f"\n{'='*60}")
+        print("✓ SUCCESS: All aggregate tables populated WITHOUT Ho Marlboro")
+        print(f"{'='*60}\n")
+
+    except Exception as e:
+        print(f"\n{'='*60}")
+        print(f"❌ ERROR: Failed to insert aggregates: {e}")
+        print(f"{'='*60}\n")
+        import traceback
+        traceback.print_exc()
+        if conn:
+            conn.rollback()
+            conn.close()
+        if raise_errors:
+            raise
+
+
+def load_streamed_aggregates_to_postgres(partials: StreamingAggregates):
+    """
+    Aggregate entry point for the streaming load (etl_pip.py, ETL_STREAMING=true).
+
+    Same flow as load_aggregates_to_postgres on the Pandas path, but the rows
+    were reduced to StreamingAggregates partials chunk by chunk, so only the
+    combined rollups are ever materialised. Engine selection is skipped.
+    """
+    conn = None
+    try:
+        # ── Step 1: Shared validation (counts gathered while streaming) ───────
+        print(f"\nStreamed aggregate input: {partials.rows} rows used, "
+              f"{partials.ho_rows} Ho Marlboro rows excluded")
+        if partials.rows == 0:
+            raise ValueError("WARNING: No data remaining after Ho Marlboro exclusion!")
+        dates_in_data = partials.dates()
+        if not dates_in_data:
+            raise ValueError("AGG SCHEMA ERROR: 'orderDate' has no valid values.")
+
+        # ── Step 2: Combine partials on canonical names ───────────────────────
+        print("Connecting to database for idempotency check...")
+        conn = psycopg2.connect(**DB_CONFIG)
+        with conn.cursor() as cur:
+            aliases = load_name_aliases(cur)
+        print("\nCombining streamed brand / store / category / product partials...")
+        aggregates = _verify_aggregates(partials.aggregates(aliases))
+
+        cur = conn.cursor()
+        if AGG_WRITE_MODE == "incremental":
+            print("\n🐼  Writing streamed PANDAS aggregates (incremental)...\n")
+            pandas_upsert_aggregates(aggregates, conn, dates_in_data)
+        else:
+            # ── Step 3: Idempotency delete, inserts in the same transaction ───
+            delete_existing_aggregates_for_dates(cur, dates_in_data)
+            print("\n🐼  Writing streamed PANDAS aggregates...\n")
+            pandas_insert_aggregates(aggregates, conn)
+        refresh_daily_comparisons(cur, dates_in_data)
+        conn.commit()
+        conn.close()
+        conn = None
 
         print(f"\n{'='*60}")
         print("✓ SUCCESS: All aggregate tables populated WITHOUT Ho Marlboro")
@@ -491,4 +1233,4 @@ def load_aggregates_to_postgres(pandas_df: pd.DataFrame):
         traceback.print_exc()
         if conn:
             conn.rollback()
-            conn.close()
\ No newline at end of file
+            conn.close()
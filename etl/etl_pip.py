@@ -1,8 +1,12 @@
+import argparse
 import requests
 import base64
 import binascii
 import re
 import io
+import itertools
+import json
+import queue
 import pandas as pd
 import psycopg2
 import psycopg2.extras
@@ -10,9 +14,16 @@ from datetime import datetime, date, timedelta
 import time
 import os
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import agg_insert
 from dotenv import load_dotenv
 
+try:
+    from monitoring.metrics import record_etl_rows, record_etl_throughput
+except ImportError:
+    record_etl_rows = record_etl_throughput = None
+
 load_dotenv()
 
 def require_env(name: str) -> str:
@@ -45,13 +56,17 @@ JDBC_PROPERTIES = {
 # =============================================================================
 # ENGINE SELECTOR
 # -----------------------------------------------------------------------------
-# Automatically decides whether to use Pandas or PySpark based on the current
-# row count of billing_data in PostgreSQL.
+# Automatically decides whether to use Pandas or PySpark based on a cheap
+# size estimate — never a COUNT(*) scan of billing_data.
 #
 # How it works:
-#   1. At startup, query COUNT(*) from billing_data
-#   2. If row count < PANDAS_ROW_THRESHOLD  → run full Pandas pipeline
-#   3. If row count >= PANDAS_ROW_THRESHOLD → run full PySpark pipeline
+#   1. Estimate the work size with the configured estimator:
+#        ENGINE_ESTIMATOR=batch   → rows in the incoming download (default)
+#        ENGINE_ESTIMATOR=catalog → pg_class.reltuples of billing_data
+#                                   (pg_stat_user_tables.n_live_tup if the
+#                                   table has never been analyzed)
+#   2. If estimate < PANDAS_ROW_THRESHOLD  → run full Pandas pipeline
+#   3. If estimate >= PANDAS_ROW_THRESHOLD → run full PySpark pipeline
 #
 # Configure the threshold in your .env file:
 #   PANDAS_ROW_THRESHOLD=500000   (default: 500,000 rows)
@@ -63,27 +78,38 @@ JDBC_PROPERTIES = {
 # =============================================================================
 
 PANDAS_ROW_THRESHOLD = int(os.getenv("PANDAS_ROW_THRESHOLD", "500000"))
+ENGINE_ESTIMATOR     = os.getenv("ENGINE_ESTIMATOR", "batch").strip().lower()
 
 
-def get_billing_row_count() -> int:
-    """Query current row count of billing_data for engine selection."""
+def estimate_billing_row_count() -> int:
+    """Catalog estimate of billing_data rows — reads statistics, no table scan."""
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cur  = conn.cursor()
-        cur.execute('SELECT COUNT(*) FROM billing_data')
-        count = cur.fetchone()[0]
+        cur.execute("""
+            SELECT c.reltuples::bigint, s.n_live_tup
+            FROM pg_class c
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE c.oid = 'billing_data'::regclass
+        """)
+        reltuples, live_tuples = cur.fetchone()
         cur.close()
         conn.close()
-        return count
+        # reltuples is -1 (PG14+) or 0 until the table is first analyzed
+        if reltuples is not None and reltuples > 0:
+            return reltuples
+        return live_tuples or 0
     except Exception as e:
-        print(f"⚠️  Could not query billing_data row count: {e}")
+        print(f"⚠️  Could not estimate billing_data row count: {e}")
         print("    Defaulting to Pandas engine.")
         return 0
 
 
-def select_engine() -> str:
+def select_engine(batch_rows: int = None) -> str:
     """
     Determine which engine to use.
+    batch_rows is the size of the incoming download; it drives the decision
+    unless ENGINE_ESTIMATOR=catalog or it is not known.
     Returns 'pandas' or 'pyspark'.
     """
     forced = os.getenv("USE_ENGINE", "auto").strip().lower()
@@ -93,10 +119,17 @@ def select_engine() -> str:
         print(f"{'='*60}\n")
         return forced
 
-    row_count = get_billing_row_count()
+    if ENGINE_ESTIMATOR != "catalog" and batch_rows is not None:
+        estimator = "incoming batch rows"
+        row_count = batch_rows
+    else:
+        estimator = "billing_data catalog estimate"
+        row_count = estimate_billing_row_count()
+
     print(f"\n{'='*60}")
     print(f"ENGINE SELECTION")
-    print(f"  Current billing_data rows : {row_count:,}")
+    print(f"  Estimator                 : {estimator}")
+    print(f"  Estimated rows            : {row_count:,}")
     print(f"  Pandas threshold          : {PANDAS_ROW_THRESHOLD:,}")
 
     if row_count < PANDAS_ROW_THRESHOLD:
@@ -147,8 +180,69 @@ PANDAS_ROW_VALIDATION_RULES = [
 
 # =============================================================================
 # DOWNLOADER  (unchanged — API interaction always stays in Python/requests)
+# -----------------------------------------------------------------------------
+# Streaming ingestion (Pandas path only). Configure in your .env file:
+#   ETL_STREAMING=true        → read the export in chunks instead of one frame
+#   CSV_CHUNK_ROWS=100000     → rows per DataFrame chunk
+#   STREAM_BLOCK_BYTES=1048576 → HTTP read size per network block
 # =============================================================================
 
+ETL_STREAMING      = os.getenv("ETL_STREAMING", "false").strip().lower() == "true"
+CSV_CHUNK_ROWS     = int(os.getenv("CSV_CHUNK_ROWS", "100000"))
+STREAM_BLOCK_BYTES = int(os.getenv("STREAM_BLOCK_BYTES", str(1024 * 1024)))
+
+_BASE64_BLOCK_RE = re.compile(rb"[A-Za-z0-9+/=]+")
+_WHITESPACE_RE   = re.compile(rb"\s")
+
+
+class _StreamingCSVBody(io.RawIOBase):
+    """
+    Read-only byte stream over a streamed HTTP response body.
+    The first network block is sniffed: if it is pure base64 the payload is
+    decoded incrementally (4-char quanta, whitespace ignored), otherwise the
+    bytes are passed through as plain CSV. Only one block is held at a time.
+    """
+
+    def __init__(self, response, block_size: int = STREAM_BLOCK_BYTES):
+        self._blocks    = response.iter_content(chunk_size=block_size)
+        self._pending   = bytearray()
+        self._carry     = b""
+        self._exhausted = False
+
+        first = next(self._blocks, b"")
+        self.is_base64 = bool(_BASE64_BLOCK_RE.fullmatch(_WHITESPACE_RE.sub(b"", first)))
+        self._feed(first)
+
+    def readable(self):
+        return True
+
+    def _feed(self, block: bytes):
+        if not self.is_base64:
+            self._pending += block
+            return
+        data   = self._carry + _WHITESPACE_RE.sub(b"", block)
+        usable = len(data) - len(data) % 4
+        self._carry = data[usable:]
+        if usable:
+            self._pending += base64.b64decode(data[:usable], validate=True)
+
+    def readinto(self, buf) -> int:
+        while not self._pending and not self._exhausted:
+            block = next(self._blocks, None)
+            if block is None:
+                self._exhausted = True
+                if self._carry:
+                    raise binascii.Error(
+                        f"Truncated base64 payload ({len(self._carry)} trailing chars)"
+                    )
+            else:
+                self._feed(block)
+        n = min(len(buf), len(self._pending))
+        buf[:n] = self._pending[:n]
+        del self._pending[:n]
+        return n
+
+
 class CSVDownloader:
     def __init__(self, base_url="https://api.example.in", username="username", password="pwd"):
         self.base_url = base_url
@@ -232,6 +326,55 @@ class CSVDownloader:
         print(f"Downloaded {len(df)} rows")
         return df
 
+    def stream_yesterday_csv(self, order_type="online", chunk_rows=CSV_CHUNK_ROWS):
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        print(f"Streaming yesterday's data: {yesterday}")
+        return self.iter_csv_chunks(order_type, yesterday, yesterday, chunk_rows)
+
+    def iter_csv_chunks(self, order_type="online", from_date=None, to_date=None,
+                        chunk_rows=CSV_CHUNK_ROWS):
+        """
+        Streaming variant of download_csv.
+        Yields DataFrames of at most chunk_rows rows while the HTTP body is
+        still being read, so the full export is never held in memory.
+        Yields nothing if authentication or the request fails.
+        """
+        if not self.token:
+            if not self.authenticate():
+                return
+
+        csv_url = f"{self.base_url}/orders/orderReportCSV"
+        params  = {"orderType": order_type, "fromDate": from_date, "toDate": to_date}
+        headers = {"accept": "*/*", "Authorization": self.token}
+
+        print(f"Streaming CSV for {order_type} orders from {from_date} to {to_date} "
+              f"({chunk_rows:,} rows/chunk)...")
+        try:
+            response = self.session.get(
+                csv_url, params=params, headers=headers, timeout=30, stream=True
+            )
+        except requests.exceptions.RequestException as e:
+            print("Request failed:", e)
+            return
+
+        with response:
+            if response.status_code != 200:
+                print(f"Download failed: {response.status_code}")
+                print(f"Response: {response.text}")
+                return
+
+            body = _StreamingCSVBody(response)
+            print(f"Payload encoding: {'base64' if body.is_base64 else 'plain CSV'}")
+
+            total = 0
+            with pd.read_csv(io.BufferedReader(body), encoding="utf-8",
+                             chunksize=chunk_rows) as reader:
+                for chunk in reader:
+                    total += len(chunk)
+                    print(f"Downloaded chunk of {len(chunk)} rows (running total: {total})")
+                    yield chunk
+            print(f"Downloaded {total} rows")
+
 
 # =============================================================================
 # ████████████████████████████████████████████████████████████████████████████
@@ -239,12 +382,13 @@ class CSVDownloader:
 # ████████████████████████████████████████████████████████████████████████████
 # =============================================================================
 
-def pandas_validate_schema(df: pd.DataFrame) -> pd.DataFrame:
+def pandas_validate_schema(df: pd.DataFrame, allow_empty: bool = False) -> pd.DataFrame:
     """
     Schema validation — Pandas path.
     1. Hard stop if required columns are missing.
     2. Drop rows that fail row-level rules, print report.
-    3. Hard stop if DataFrame is empty after cleaning.
+    3. Hard stop if DataFrame is empty after cleaning (unless allow_empty,
+       used by the streaming path where one chunk may be entirely invalid).
     """
     print("\n" + "=" * 60)
     print("SCHEMA VALIDATION  (Pandas)")
@@ -287,7 +431,7 @@ def pandas_validate_schema(df: pd.DataFrame) -> pd.DataFrame:
     else:
         print(f"\n✓ All {total_rows} rows passed row-level validation.")
 
-    if df.empty:
+    if df.empty and not allow_empty:
         raise ValueError(
             "SCHEMA ERROR: DataFrame is empty after validation — "
             "no valid rows to insert. Aborting pipeline."
@@ -316,8 +460,46 @@ def pandas_debug_date_formats(df: pd.DataFrame):
         print("=== END DEBUG ===\n")
 
 
+# Nullable dtypes the Pandas transform produces for each billing_data column.
+# Missing values are pd.NA / NaT; everything else is a string column.
+PANDAS_COLUMN_DTYPES = {
+    **{c: "Int64"   for c in INTEGER_COLUMNS + BIGINT_COLUMNS},
+    **{c: "Float64" for c in NUMERIC_COLUMNS},
+    "orderDate": "datetime64[ns]",
+}
+
+
+def _pandas_parse_order_dates(raw: pd.Series) -> pd.Series:
+    """Parse orderDate trying each known format in turn on still-unparsed rows."""
+    formats_to_try = ["%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d"]
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns]")
+
+    for fmt in formats_to_try:
+        mask = parsed.isna() & raw.notna()
+        if mask.any():
+            try:
+                attempt    = pd.to_datetime(raw[mask], format=fmt, errors='coerce')
+                successful = attempt.notna().sum()
+                if successful > 0:
+                    print(f"  Format '{fmt}' parsed {successful} dates")
+                    parsed[mask] = attempt
+            except Exception as e:
+                print(f"  Format '{fmt}' failed: {e}")
+
+    if parsed.isna().all():
+        print("Trying pandas auto-detection...")
+        parsed = pd.to_datetime(raw, errors='coerce')
+
+    return parsed.dt.normalize()
+
+
 def pandas_transform_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Full transformation pipeline — Pandas path."""
+    """
+    Full transformation pipeline — Pandas path.
+    Fully vectorized: every column is coerced with column-wise pandas ops into
+    the nullable dtypes in PANDAS_COLUMN_DTYPES (orderDate → datetime64,
+    integers → Int64, numerics → Float64, everything else → string).
+    """
     print("Starting data transformation (Pandas)...")
 
     pandas_debug_date_formats(df)
@@ -331,51 +513,32 @@ def pandas_transform_data(df: pd.DataFrame) -> pd.DataFrame:
         original_count = df['orderDate'].notna().sum()
         print(f"Original non-null orderDate values: {original_count}")
 
-        formats_to_try = ["%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d"]
-        df['orderDate_parsed'] = None
-
-        for fmt in formats_to_try:
-            mask = df['orderDate_parsed'].isna() & df['orderDate'].notna()
-            if mask.any():
-                try:
-                    parsed_dates = pd.to_datetime(df.loc[mask, 'orderDate'], format=fmt, errors='coerce')
-                    successful   = parsed_dates.notna().sum()
-                    if successful > 0:
-                        print(f"  Format '{fmt}' parsed {successful} dates")
-                        df.loc[mask & parsed_dates.notna(), 'orderDate_parsed'] = parsed_dates[parsed_dates.notna()]
-                except Exception as e:
-                    print(f"  Format '{fmt}' failed: {e}")
-
-        if df['orderDate_parsed'].isna().all():
-            print("Trying pandas auto-detection...")
-            df['orderDate_parsed'] = pd.to_datetime(df['orderDate'], errors='coerce', infer_datetime_format=True)
-
-        df['orderDate'] = df['orderDate_parsed'].apply(lambda x: x.date() if pd.notnull(x) else None)
-        df = df.drop(columns=['orderDate_parsed'])
+        df['orderDate'] = _pandas_parse_order_dates(df['orderDate'])
 
         final_count = df['orderDate'].notna().sum()
         print(f"Final non-null orderDate values: {final_count}/{original_count}")
-        print(f"Sample converted dates: {df[df['orderDate'].notna()]['orderDate'].head(5).tolist()}")
+        print(f"Sample converted dates: {df['orderDate'].dropna().head(5).dt.date.tolist()}")
 
     if "time" in df.columns:
         print("Processing time column...")
-        df["time"] = df["time"].astype(str).str[:8]
-        df["time"] = df["time"].replace(["nan", "NaT"], None)
-        print(f"Sample time values: {df[df['time'].notna()]['time'].head(3).tolist()}")
+        time_str   = df["time"].astype("string").str[:8]
+        df["time"] = time_str.mask(df["time"].isna() | time_str.isin(["nan", "NaT"]))
+        print(f"Sample time values: {df['time'].dropna().head(3).tolist()}")
 
     print("Processing numeric columns...")
     for col in INTEGER_COLUMNS + BIGINT_COLUMNS:
         if col in df.columns:
             original = df[col].notna().sum()
-            df[col]  = pd.to_numeric(df[col], errors="coerce")
-            df[col]  = df[col].apply(lambda x: int(x) if pd.notnull(x) else None)
+            numeric  = pd.to_numeric(df[col], errors="coerce")
+            if pd.api.types.is_float_dtype(numeric):
+                numeric = np.trunc(numeric)
+            df[col]  = numeric.astype("Int64")
             print(f"  {col}: {df[col].notna().sum()}/{original} values converted")
 
     for col in NUMERIC_COLUMNS:
         if col in df.columns:
             original = df[col].notna().sum()
-            df[col]  = pd.to_numeric(df[col], errors="coerce")
-            df[col]  = df[col].apply(lambda x: float(x) if pd.notnull(x) else None)
+            df[col]  = pd.to_numeric(df[col], errors="coerce").astype("Float64")
             print(f"  {col}: {df[col].notna().sum()}/{original} values converted")
 
     print("Processing string columns...")
@@ -385,13 +548,15 @@ def pandas_transform_data(df: pd.DataFrame) -> pd.DataFrame:
         and c not in INTEGER_COLUMNS + BIGINT_COLUMNS + NUMERIC_COLUMNS + ["orderDate", "time"]
     ]
     for col in string_cols:
-        df[col] = df[col].astype(str).replace("nan", None)
+        as_str  = df[col].astype("string")
+        df[col] = as_str.mask(as_str == "nan")
 
     existing_cols = [c for c in POSTGRES_COLUMNS if c in df.columns]
-    df = df[existing_cols]
+    df = df[existing_cols].copy()
     for col in POSTGRES_COLUMNS:
         if col not in df.columns:
-            df[col] = None
+            df[col] = pd.Series(pd.NA, index=df.index,
+                                dtype=PANDAS_COLUMN_DTYPES.get(col, "string"))
     df = df[POSTGRES_COLUMNS]
 
     print("Data transformation completed.")
@@ -403,7 +568,7 @@ def pandas_transform_data(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def pandas_get_dates(df: pd.DataFrame) -> list:
-    return df['orderDate'].dropna().unique().tolist()
+    return [d.date() for d in df['orderDate'].dropna().unique()]
 
 
 def pandas_delete_existing_billing_data(cur, dates: list):
@@ -423,8 +588,101 @@ def pandas_delete_existing_billing_data(cur, dates: list):
         print("No existing rows found for those dates — clean insert.")
 
 
+# =============================================================================
+# BILLING LOADER SELECTION
+# -----------------------------------------------------------------------------
+# How the Pandas path writes billing_data. Configure in your .env file:
+#   BILLING_LOAD_METHOD=copy            → stream via COPY ... FROM STDIN (default)
+#   BILLING_LOAD_METHOD=execute_values  → psycopg2.extras.execute_values
+#   COPY_CHUNK_ROWS=50000               → rows rendered per COPY buffer
+#
+# If COPY fails, the load rolls back to a savepoint taken after the
+# idempotency delete and retries with execute_values in the same transaction.
+# =============================================================================
+
+BILLING_LOAD_METHOD = os.getenv("BILLING_LOAD_METHOD", "copy").strip().lower()
+COPY_CHUNK_ROWS     = int(os.getenv("COPY_CHUNK_ROWS", "50000"))
+COPY_NULL_MARKER    = "\\N"
+
+
+def _report_load_metrics(table: str, method: str, row_count: int, elapsed: float):
+    """Push row count and rows/sec to monitoring.metrics if it is available."""
+    rows_per_sec = row_count / elapsed if elapsed > 0 else 0.0
+    print(f"  Load throughput: {rows_per_sec:,.0f} rows/sec ({method}, {elapsed:.2f}s)")
+    if record_etl_rows is None:
+        return
+    record_etl_rows(table, row_count)
+    record_etl_throughput(table, method, rows_per_sec)
+
+
+def pandas_copy_rows(cur, df: pd.DataFrame, table: str = "billing_data",
+                     chunk_rows: int = COPY_CHUNK_ROWS):
+    """
+    Stream df into table via COPY ... FROM STDIN (CSV).
+    Each chunk is rendered into its own in-memory buffer, so only one chunk
+    of CSV text is held at a time regardless of the DataFrame size.
+    """
+    cols     = ",".join([f'"{c}"' for c in df.columns])
+    copy_sql = (
+        f"COPY {table} ({cols}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{COPY_NULL_MARKER}')"
+    )
+    for start in range(0, len(df), chunk_rows):
+        buffer = io.StringIO()
+        df.iloc[start:start + chunk_rows].to_csv(
+            buffer, index=False, header=False, na_rep=COPY_NULL_MARKER
+        )
+        buffer.seek(0)
+        cur.copy_expert(copy_sql, buffer)
+
+
+def _pandas_db_rows(df: pd.DataFrame) -> list:
+    """Row tuples of plain Python values (None for NA, date for datetime64) for psycopg2."""
+    df = df.copy()
+    for col in df.select_dtypes(include="datetime").columns:
+        df[col] = df[col].dt.date
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+def pandas_execute_values_rows(cur, df: pd.DataFrame, table: str = "billing_data"):
+    """Insert df into table via psycopg2.extras.execute_values."""
+    cols        = ",".join([f'"{c}"' for c in df.columns])
+    data_tuples = _pandas_db_rows(df)
+    insert_sql  = f'INSERT INTO {table} ({cols}) VALUES %s'
+    psycopg2.extras.execute_values(
+        cur, insert_sql, data_tuples,
+        template=None, page_size=1000
+    )
+
+
+def _pandas_insert_billing(cur, df: pd.DataFrame) -> str:
+    """
+    Insert one transformed frame into billing_data on an open transaction.
+    Returns the load method actually used ('copy' or 'execute_values').
+    """
+    if BILLING_LOAD_METHOD != "copy":
+        pandas_execute_values_rows(cur, df)
+        return "execute_values"
+
+    cur.execute("SAVEPOINT billing_copy")
+    try:
+        pandas_copy_rows(cur, df)
+        cur.execute("RELEASE SAVEPOINT billing_copy")
+        return "copy"
+    except psycopg2.Error as e:
+        print(f"  ⚠ COPY failed ({e}) — falling back to execute_values.")
+        cur.execute("ROLLBACK TO SAVEPOINT billing_copy")
+        pandas_execute_values_rows(cur, df)
+        return "execute_values"
+
+
 def pandas_load_to_postgres(df: pd.DataFrame):
-    """Bulk insert via psycopg2.extras.execute_values — Pandas path."""
+    """
+    Bulk load billing_data — Pandas path.
+    Delete + insert run in one transaction; the insert uses COPY or
+    execute_values depending on BILLING_LOAD_METHOD.
+    """
     conn = None
     try:
         print("Connecting to database for idempotency check...")
@@ -435,20 +693,80 @@ def pandas_load_to_postgres(df: pd.DataFrame):
         dates_in_data = pandas_get_dates(df)
         pandas_delete_existing_billing_data(cur, dates_in_data)
 
-        print("Preparing bulk insert (Pandas)...")
-        cols       = ",".join([f'"{c}"' for c in POSTGRES_COLUMNS])
-        data_tuples = [tuple(row) for row in df.values]
-        insert_sql  = f'INSERT INTO billing_data ({cols}) VALUES %s'
+        df = df[POSTGRES_COLUMNS]
+        print(f"Inserting {len(df)} rows (Pandas, method={BILLING_LOAD_METHOD})...")
+        load_start = time.time()
+        method     = _pandas_insert_billing(cur, df)
 
-        print(f"Inserting {len(data_tuples)} rows...")
-        psycopg2.extras.execute_values(
-            cur, insert_sql, data_tuples,
-            template=None, page_size=1000
-        )
         conn.commit()
         print(f"✓ Successfully inserted {len(df)} rows into billing_data")
+        _report_load_metrics("billing_data", method, len(df), time.time() - load_start)
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Failed to insert data: {e}")
+        if conn:
+            conn.rollback()
+        raise
+
+
+def pandas_iter_transformed(raw_chunks):
+    """Validate + transform each downloaded chunk, skipping chunks with no valid rows."""
+    for raw in raw_chunks:
+        df = pandas_validate_schema(raw, allow_empty=True)
+        if df.empty:
+            print("  Chunk has no valid rows after validation — skipping.")
+            continue
+        yield pandas_transform_data(df)
+
+
+def pandas_stream_load_to_postgres(chunks) -> agg_insert.StreamingAggregates:
+    """
+    Load an iterator of transformed chunks into billing_data — streaming path.
+    Everything runs in one transaction. Each date is cleared the first time it
+    is seen, so a later chunk never deletes rows loaded by an earlier one.
+    Each loaded chunk is reduced to agg_insert partial aggregates, so the
+    day's rows are never held at once; returns them for
+    agg_insert.load_streamed_aggregates_to_postgres.
+    """
+    conn = None
+    try:
+        print("Connecting to database for streaming load...")
+        conn = psycopg2.connect(**DB_CONFIG)
+        cur  = conn.cursor()
+
+        cleared_dates = set()
+        partials      = agg_insert.StreamingAggregates()
+        methods       = set()
+        total_rows    = 0
+        load_start    = time.time()
+
+        for df in chunks:
+            # IDEMPOTENCY — only dates this transaction has not cleared yet
+            new_dates = [d for d in pandas_get_dates(df) if d not in cleared_dates]
+            if new_dates:
+                pandas_delete_existing_billing_data(cur, new_dates)
+                cleared_dates.update(new_dates)
+
+            methods.add(_pandas_insert_billing(cur, df[POSTGRES_COLUMNS]))
+            total_rows += len(df)
+            partials.add(df[agg_insert.AGG_REQUIRED_COLUMNS])
+            print(f"  Loaded chunk of {len(df)} rows (running total: {total_rows})")
+
+        if total_rows == 0:
+            raise ValueError(
+                "SCHEMA ERROR: No valid rows in any streamed chunk — "
+                "nothing to insert. Aborting pipeline."
+            )
+
+        conn.commit()
+        print(f"✓ Successfully inserted {total_rows} rows into billing_data")
+        method = "copy" if methods == {"copy"} else "execute_values"
+        _report_load_metrics("billing_data", method, total_rows, time.time() - load_start)
         cur.close()
         conn.close()
+        return partials
 
     except Exception as e:
         print(f"Failed to insert data: {e}")
@@ -463,6 +781,15 @@ def pandas_load_to_postgres(df: pd.DataFrame):
 # ████████████████████████████████████████████████████████████████████████████
 # =============================================================================
 
+# Action budget: validation and transform each run ONE aggregation job with
+# conditional sums; the transformed frame is persisted so the date lookup,
+# JDBC write and aggregates all read from cache instead of the source.
+#   SPARK_DEBUG_SAMPLES=false   → true prints sample bad values, raw orderDate
+#                                 samples and per-format parse counts (extra jobs)
+
+SPARK_DEBUG_SAMPLES = os.getenv("SPARK_DEBUG_SAMPLES", "false").strip().lower() == "true"
+
+
 def _import_spark():
     """Lazy import of PySpark — only loaded when PySpark path is selected."""
     from pyspark.sql import SparkSession
@@ -485,14 +812,58 @@ def get_spark():
         .config("spark.jars.packages", "org.postgresql:postgresql:42.6.0")
         .config("spark.sql.session.timeZone", "UTC")
         .config("spark.driver.memory", "2g")
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+        .config("spark.sql.execution.arrow.pyspark.fallback.enabled", "false")
         .getOrCreate()
     )
 
 
+def spark_input_frame(pandas_df: pd.DataFrame):
+    """
+    Type the raw CSV frame for the Arrow handoff.
+    Returns (typed pandas frame, StructType). Numeric columns keep their
+    parsed values (Int64 when every value is whole, Float64 otherwise, so
+    validation still sees e.g. fractional quantities); everything else is a
+    nullable string. Missing values become nulls, never the string "nan".
+    """
+    from pyspark.sql.types import StructType, StructField, StringType, LongType, DoubleType
+
+    typed  = {}
+    fields = []
+    for col in pandas_df.columns:
+        if col in INTEGER_COLUMNS + BIGINT_COLUMNS + NUMERIC_COLUMNS:
+            numeric = pd.to_numeric(pandas_df[col], errors="coerce")
+            whole   = col not in NUMERIC_COLUMNS and (
+                pd.api.types.is_integer_dtype(numeric)
+                or bool((numeric.dropna() % 1 == 0).all())
+            )
+            typed[col] = numeric.astype("Int64" if whole else "Float64")
+            fields.append(StructField(col, LongType() if whole else DoubleType(), True))
+        else:
+            typed[col] = pandas_df[col].astype("string")
+            fields.append(StructField(col, StringType(), True))
+    return pd.DataFrame(typed, index=pandas_df.index), StructType(fields)
+
+
+def spark_from_pandas(spark, pandas_df: pd.DataFrame):
+    """
+    Hand the downloaded frame to Spark through Arrow with an explicit schema,
+    so there is no astype(str) round trip and no per-row schema inference.
+    Falls back to the legacy all-string conversion when pyarrow is missing.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠ pyarrow not installed — falling back to string conversion for Spark handoff")
+        return spark.createDataFrame(pandas_df.astype(str).replace("nan", None))
+
+    typed_df, schema = spark_input_frame(pandas_df)
+    return spark.createDataFrame(typed_df, schema=schema)
+
+
 def spark_validate_schema(spark_df):
-    """Schema validation — PySpark path."""
+    """Schema validation — PySpark path. Row rules are counted in one aggregation."""
     SparkSession, F, StringType, *_ = _import_spark()
-    from pyspark.sql import functions as F
 
     print("\n" + "=" * 60)
     print("SCHEMA VALIDATION  (PySpark)")
@@ -507,51 +878,57 @@ def spark_validate_schema(spark_df):
         )
     print(f"✓ All {len(REQUIRED_CSV_COLUMNS)} required columns present.")
 
-    total_rows = spark_df.count()
-    spark_df   = spark_df.withColumn("__row_id__", F.monotonically_increasing_id())
-    bad_ids    = None
-
     spark_rules = [
         ("totalProductPrice", "negative totalProductPrice",
-            lambda df: df.filter(F.col("totalProductPrice").cast("double") < 0)),
+            lambda: F.col("totalProductPrice").cast("double") < 0),
         ("quantity",          "zero/negative quantity",
-            lambda df: df.filter(F.col("quantity").cast("double") <= 0)),
+            lambda: F.col("quantity").cast("double") <= 0),
         ("invoice",           "null/blank invoice",
-            lambda df: df.filter(F.col("invoice").isNull() | (F.trim(F.col("invoice")) == ""))),
+            lambda: F.col("invoice").isNull() | (F.trim(F.col("invoice")) == "")),
     ]
 
-    for col, label, bad_filter_fn in spark_rules:
+    # A rule whose predicate is NULL (unparseable value) does not flag the row,
+    # matching DataFrame.filter semantics.
+    active = []
+    for col, label, condition_fn in spark_rules:
         if col not in spark_df.columns:
             print(f"  ⚠ Skipping rule '{label}' — column '{col}' not found.")
             continue
-        try:
-            bad_rows  = bad_filter_fn(spark_df)
-            bad_count = bad_rows.count()
-            if bad_count > 0:
-                samples = [str(r[col]) for r in bad_rows.select(col).limit(5).collect()]
-                print(f"  ⚠ {bad_count} row(s) flagged — {label}")
+        active.append((col, label, F.coalesce(condition_fn(), F.lit(False))))
+
+    def flag_sum(cond):
+        return F.sum(F.when(cond, 1).otherwise(0))
+
+    any_bad = F.lit(False)
+    for _, _, cond in active:
+        any_bad = any_bad | cond
+
+    stats = spark_df.agg(
+        F.count(F.lit(1)).alias("total_rows"),
+        flag_sum(any_bad).alias("bad_rows"),
+        *[flag_sum(cond).alias(f"rule_{i}") for i, _ in enumerate(active)],
+    ).first()
+    total_rows = stats["total_rows"]
+
+    for i, (col, label, cond) in enumerate(active):
+        bad_count = stats[f"rule_{i}"]
+        if bad_count > 0:
+            print(f"  ⚠ {bad_count} row(s) flagged — {label}")
+            if SPARK_DEBUG_SAMPLES:
+                samples = [str(r[col]) for r in spark_df.filter(cond).select(col).limit(5).collect()]
                 print(f"    Sample bad values: {samples}")
-                if bad_ids is None:
-                    bad_ids = bad_rows.select("__row_id__")
-                else:
-                    bad_ids = bad_ids.union(bad_rows.select("__row_id__"))
-            else:
-                print(f"  ✓ No issues — {label}")
-        except Exception as e:
-            print(f"  ⚠ Rule '{label}' could not be evaluated: {e}")
+        else:
+            print(f"  ✓ No issues — {label}")
 
-    if bad_ids is not None:
-        bad_ids     = bad_ids.distinct()
-        spark_df    = spark_df.join(bad_ids, on="__row_id__", how="left_anti")
-        clean_count = spark_df.count()
-        print(f"\n  Dropped {total_rows - clean_count} invalid row(s). "
+    clean_count = total_rows - stats["bad_rows"]
+    if stats["bad_rows"] > 0:
+        spark_df = spark_df.filter(~any_bad)
+        print(f"\n  Dropped {stats['bad_rows']} invalid row(s). "
               f"Remaining: {clean_count}/{total_rows} rows.")
     else:
         print(f"\n✓ All {total_rows} rows passed row-level validation.")
 
-    spark_df = spark_df.drop("__row_id__")
-
-    if spark_df.count() == 0:
+    if clean_count == 0:
         raise ValueError(
             "SCHEMA ERROR: DataFrame is empty after validation — "
             "no valid rows to insert. Aborting pipeline."
@@ -563,15 +940,17 @@ def spark_validate_schema(spark_df):
 
 
 def spark_transform_data(spark_df):
-    """Full transformation pipeline — PySpark path."""
+    """
+    Full transformation pipeline — PySpark path.
+    Returns (persisted DataFrame, row count); the summary counts come from a
+    single aggregation that also materialises the cache.
+    """
     SparkSession, F, StringType, IntegerType, LongType, DoubleType, DateType = _import_spark()
 
     print("Starting data transformation (PySpark)...")
 
-    if "orderDate" in spark_df.columns:
+    if SPARK_DEBUG_SAMPLES and "orderDate" in spark_df.columns:
         print("\n=== DEBUGGING ORDERDATE COLUMN ===")
-        non_null = spark_df.filter(F.col("orderDate").isNotNull()).count()
-        print(f"Non-null values: {non_null}")
         samples = [r["orderDate"] for r in spark_df.select("orderDate").limit(5).collect()]
         print(f"Sample values: {samples}")
         print("=== END DEBUG ===\n")
@@ -580,32 +959,31 @@ def spark_transform_data(spark_df):
         spark_df = spark_df.drop("productMrp")
         print("Dropped column: productMrp")
 
-    if "orderDate" in spark_df.columns:
+    has_order_date = "orderDate" in spark_df.columns
+    if has_order_date:
         print("Processing orderDate column...")
-        original_count = spark_df.filter(F.col("orderDate").isNotNull()).count()
         formats_to_try = ["yyyy-MM-dd", "dd-MM-yyyy", "MM/dd/yyyy", "dd/MM/yyyy", "yyyy/MM/dd"]
-        spark_df = spark_df.withColumn("orderDate_parsed", F.lit(None).cast(DateType()))
-        for fmt in formats_to_try:
-            spark_df = spark_df.withColumn(
-                "orderDate_parsed",
-                F.when(
-                    F.col("orderDate_parsed").isNull() & F.col("orderDate").isNotNull(),
-                    F.to_date(F.col("orderDate"), fmt)
-                ).otherwise(F.col("orderDate_parsed"))
-            )
-            parsed = spark_df.filter(F.col("orderDate_parsed").isNotNull()).count()
-            print(f"  After format '{fmt}': {parsed} dates parsed")
-        spark_df = spark_df.withColumn("orderDate", F.col("orderDate_parsed")).drop("orderDate_parsed")
-        final_count = spark_df.filter(F.col("orderDate").isNotNull()).count()
-        print(f"Final non-null orderDate values: {final_count}/{original_count}")
+        raw = F.col("orderDate")
+        if SPARK_DEBUG_SAMPLES:
+            parsed_by = spark_df.agg(*[
+                F.count(F.coalesce(*[F.to_date(raw, f) for f in formats_to_try[:i + 1]])).alias(f"f{i}")
+                for i in range(len(formats_to_try))
+            ]).first()
+            for i, fmt in enumerate(formats_to_try):
+                print(f"  After format '{fmt}': {parsed_by[f'f{i}']} dates parsed")
+        # First format that parses wins — same precedence as trying them in order.
+        spark_df = (
+            spark_df
+            .withColumn("__orderDate_raw__", raw)
+            .withColumn("orderDate", F.coalesce(*[F.to_date(raw, f) for f in formats_to_try]))
+        )
 
     if "time" in spark_df.columns:
         print("Processing time column...")
-        spark_df = spark_df.withColumn("time", F.col("time").cast(StringType()))
-        spark_df = spark_df.withColumn("time", F.substring(F.col("time"), 1, 8))
+        time_str = F.substring(F.col("time").cast(StringType()), 1, 8)
         spark_df = spark_df.withColumn(
             "time",
-            F.when(F.col("time").isin("nan", "NaT", "null", "None"), None).otherwise(F.col("time"))
+            F.when(time_str.isin("nan", "NaT", "null", "None"), None).otherwise(time_str)
         )
 
     print("Processing numeric columns...")
@@ -636,15 +1014,24 @@ def spark_transform_data(spark_df):
         if col not in spark_df.columns:
             spark_df = spark_df.withColumn(col, F.lit(None).cast(StringType()))
 
-    spark_df = spark_df.select(POSTGRES_COLUMNS)
+    extra    = ["__orderDate_raw__"] if has_order_date else []
+    staged   = spark_df.select(POSTGRES_COLUMNS + extra).persist()
+    summary  = staged.agg(
+        F.count(F.lit(1)).alias("total"),
+        F.count("orderDate").alias("order_date"),
+        F.count("time").alias("time"),
+        *([F.count("__orderDate_raw__").alias("order_date_raw")] if has_order_date else []),
+    ).first()
+    spark_df = staged.select(POSTGRES_COLUMNS)
 
     print("Data transformation completed.")
-    total = spark_df.count()
+    if has_order_date:
+        print(f"Final non-null orderDate values: {summary['order_date']}/{summary['order_date_raw']}")
     print(f"\nFINAL DATA SUMMARY:")
-    print(f"  Total rows     : {total}")
-    print(f"  orderDate !null: {spark_df.filter(F.col('orderDate').isNotNull()).count()}")
-    print(f"  time !null     : {spark_df.filter(F.col('time').isNotNull()).count()}")
-    return spark_df
+    print(f"  Total rows     : {summary['total']}")
+    print(f"  orderDate !null: {summary['order_date']}")
+    print(f"  time !null     : {summary['time']}")
+    return spark_df, summary["total"]
 
 
 def spark_get_dates(spark_df) -> list:
@@ -672,8 +1059,12 @@ def spark_delete_existing_billing_data(cur, dates: list):
         print("No existing rows found for those dates — clean insert.")
 
 
-def spark_load_to_postgres(spark_df):
-    """Bulk insert via Spark JDBC — PySpark path."""
+def spark_load_to_postgres(spark_df, row_count: int = None):
+    """
+    Bulk insert via Spark JDBC — PySpark path.
+    Uses agg_insert.jdbc_write (parallel partitions, batched inserts);
+    pass row_count if already known to skip the cached count.
+    """
     conn = None
     try:
         print("Connecting to database for idempotency check...")
@@ -688,20 +1079,7 @@ def spark_load_to_postgres(spark_df):
         conn.close()
 
         print("Writing billing_data via Spark JDBC...")
-        row_count = spark_df.count()
-        (
-            spark_df.write
-            .format("jdbc")
-            .option("url", JDBC_URL)
-            .option("dbtable", "billing_data")
-            .option("user", JDBC_PROPERTIES["user"])
-            .option("password", JDBC_PROPERTIES["password"])
-            .option("driver", JDBC_PROPERTIES["driver"])
-            .option("batchsize", 1000)
-            .option("numPartitions", 1)
-            .mode("append")
-            .save()
-        )
+        row_count = agg_insert.jdbc_write(spark_df, "billing_data", row_count)
         print(f"✓ Successfully inserted {row_count} rows into billing_data")
 
     except Exception as e:
@@ -711,6 +1089,194 @@ def spark_load_to_postgres(spark_df):
         raise
 
 
+# =============================================================================
+# BACKFILL
+# -----------------------------------------------------------------------------
+# Re-ingests a date range after an upstream correction:
+#   python etl_pip.py --backfill 2024-12-01 2024-12-31 --window week
+#
+# The range is split into day or week windows. Windows are downloaded
+# concurrently over a bounded pool of authenticated CSVDownloader sessions and
+# loaded strictly in order through the same per-date delete + insert as the
+# daily run, so a re-run of any window is idempotent.
+#
+# Once both the billing_data and aggregate loads of a window succeed, its end
+# date is written to BACKFILL_CHECKPOINT. A window whose download or either
+# load fails stops the backfill without advancing the checkpoint; re-running
+# the same range resumes after the last completed window.
+#
+# Configure in your .env file:
+#   BACKFILL_CONCURRENCY=4                     (parallel downloads / sessions)
+#   BACKFILL_CHECKPOINT=backfill_checkpoint.json
+# =============================================================================
+
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+BACKFILL_CHECKPOINT  = os.getenv("BACKFILL_CHECKPOINT", "backfill_checkpoint.json")
+
+
+def split_date_windows(start: date, end: date, window: str = "day") -> list:
+    """Split [start, end] (inclusive) into (from, to) windows of 1 or 7 days."""
+    if window not in ("day", "week"):
+        raise ValueError(f"Unknown backfill window '{window}' — use 'day' or 'week'.")
+    if start > end:
+        raise ValueError(f"Backfill start {start} is after end {end}.")
+    step    = timedelta(days=1 if window == "day" else 7)
+    windows = []
+    cursor  = start
+    while cursor <= end:
+        window_end = min(cursor + step - timedelta(days=1), end)
+        windows.append((cursor, window_end))
+        cursor = window_end + timedelta(days=1)
+    return windows
+
+
+def _read_backfill_checkpoint(path: str, start: date, end: date):
+    """Return the last completed window end for this exact range, or None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read checkpoint {path}: {e} — starting from scratch.")
+        return None
+    if state.get("range") != [start.isoformat(), end.isoformat()]:
+        print(f"Checkpoint {path} is for range {state.get('range')} — ignoring.")
+        return None
+    return date.fromisoformat(state["last_completed"])
+
+
+def _write_backfill_checkpoint(path: str, start: date, end: date, last_completed: date):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "range":          [start.isoformat(), end.isoformat()],
+            "last_completed": last_completed.isoformat(),
+            "updated_at":     datetime.now().isoformat(timespec="seconds"),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def _download_window(pool: queue.Queue, window: tuple, order_type: str):
+    """Download one window on a borrowed session; returns (df, seconds)."""
+    downloader = pool.get()
+    try:
+        t0 = time.time()
+        df = downloader.download_csv(
+            order_type, window[0].strftime("%Y-%m-%d"), window[1].strftime("%Y-%m-%d")
+        )
+        return df, time.time() - t0
+    finally:
+        pool.put(downloader)
+
+
+def _load_window(df: pd.DataFrame) -> int:
+    """
+    Validate, transform and load one window. Returns rows loaded.
+    Raises if the download failed (df is None) or either load failed, so
+    the caller never checkpoints a window whose data is not fully in.
+    """
+    if df is None:
+        raise RuntimeError(
+            "Download failed for window — stopping backfill. "
+            "Re-run the same range to resume from this window."
+        )
+    if df.empty:
+        print("No data downloaded for window — nothing to load.")
+        return 0
+    df = pandas_validate_schema(df, allow_empty=True)
+    if df.empty:
+        print("No valid rows in window after validation — nothing to load.")
+        return 0
+    df = pandas_transform_data(df)
+    pandas_load_to_postgres(df)
+    try:
+        agg_insert.load_aggregates_to_postgres(df, raise_errors=True)
+    except Exception as e:
+        raise RuntimeError(
+            f"Aggregate load failed for window — stopping backfill: {e}. "
+            "Re-run the same range to resume from this window."
+        ) from e
+    return len(df)
+
+
+def backfill(start: date, end: date, window: str = "day", order_type: str = "online",
+             concurrency: int = BACKFILL_CONCURRENCY,
+             checkpoint_path: str = BACKFILL_CHECKPOINT) -> list:
+    """
+    Backfill billing_data + aggregates for [start, end] — Pandas path.
+    Returns the per-window timing summary rows.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Backfill concurrency must be at least 1, got {concurrency}.")
+    run_start = time.time()
+    windows   = split_date_windows(start, end, window)
+
+    last_completed = _read_backfill_checkpoint(checkpoint_path, start, end)
+    if last_completed is not None:
+        windows = [w for w in windows if w[1] > last_completed]
+        print(f"Resuming after last completed window ending {last_completed}.")
+
+    print(f"\n{'='*60}")
+    print(f"BACKFILL {start} → {end}")
+    print(f"  Window size   : {window}")
+    print(f"  Windows to run: {len(windows)}")
+    print(f"  Concurrency   : {concurrency}")
+    print(f"{'='*60}\n")
+    if not windows:
+        print("Nothing to backfill — all windows already completed.")
+        return []
+
+    # Bounded pool of authenticated sessions, one per concurrent download
+    pool = queue.Queue()
+    for _ in range(min(concurrency, len(windows))):
+        pool.put(CSVDownloader(
+            base_url=require_env("API_BASE_URL"),
+            username=require_env("API_USERNAME"),
+            password=require_env("API_PASSWORD")
+        ))
+
+    summary = []
+    with ThreadPoolExecutor(max_workers=pool.qsize()) as executor:
+        # Keep at most `concurrency` downloads ahead of the loader so
+        # downloaded frames never pile up in memory.
+        pending = deque()
+        queued  = iter(windows)
+        for w in itertools.islice(queued, concurrency):
+            pending.append((w, executor.submit(_download_window, pool, w, order_type)))
+
+        while pending:
+            w, future = pending.popleft()
+            next_window = next(queued, None)
+            if next_window is not None:
+                pending.append(
+                    (next_window, executor.submit(_download_window, pool, next_window, order_type))
+                )
+
+            print(f"\n── Window {w[0]} → {w[1]} ──")
+            df, download_secs = future.result()
+            t0   = time.time()
+            rows = _load_window(df)
+            load_secs = time.time() - t0
+
+            _write_backfill_checkpoint(checkpoint_path, start, end, w[1])
+            summary.append({
+                "window": f"{w[0]} → {w[1]}", "rows": rows,
+                "download_s": download_secs, "load_s": load_secs,
+            })
+
+    print(f"\n{'='*60}")
+    print("BACKFILL SUMMARY")
+    print(f"  {'Window':<27}{'Rows':>10}{'Download s':>12}{'Load s':>10}")
+    for row in summary:
+        print(f"  {row['window']:<27}{row['rows']:>10,}"
+              f"{row['download_s']:>12.2f}{row['load_s']:>10.2f}")
+    total_rows = sum(r["rows"] for r in summary)
+    print(f"  Total: {total_rows:,} rows in {time.time() - run_start:.2f} seconds")
+    print(f"{'='*60}\n")
+    return summary
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -724,6 +1290,34 @@ def main():
         username=require_env("API_USERNAME"),
         password=require_env("API_PASSWORD")
     )
+
+    if ETL_STREAMING:
+        # ── STREAMING PANDAS PATH ─────────────────────────────────────────────
+        # Download, validate, transform and load overlap chunk by chunk, and
+        # each chunk is folded into partial aggregates as it is loaded;
+        # engine selection is skipped because nothing is materialised up front.
+        print("\n🐼  Running streaming PANDAS pipeline...\n")
+        raw_chunks  = downloader.stream_yesterday_csv(order_type="online")
+        first_chunk = next(raw_chunks, None)
+        if first_chunk is None or first_chunk.empty:
+            print("No data downloaded")
+            return
+        try:
+            partials = pandas_stream_load_to_postgres(
+                pandas_iter_transformed(itertools.chain([first_chunk], raw_chunks))
+            )
+        finally:
+            raw_chunks.close()
+        billing_insert_time = time.time()
+        print(f"Streamed download + billing data load completed in "
+              f"{billing_insert_time - start_time:.2f} seconds")
+
+        agg_insert.load_streamed_aggregates_to_postgres(partials)
+        aggregates_insert_time = time.time()
+        print(f"Aggregate inserts completed in {aggregates_insert_time - billing_insert_time:.2f} seconds")
+        print(f"Total ETL execution time: {aggregates_insert_time - start_time:.2f} seconds")
+        return
+
     pandas_df = downloader.download_yesterday_csv(order_type="online")
 
     if pandas_df is None or pandas_df.empty:
@@ -734,7 +1328,7 @@ def main():
     print(f"Download completed in {download_time - start_time:.2f} seconds")
 
     # ── Engine selection ──────────────────────────────────────────────────────
-    engine = select_engine()
+    engine = select_engine(batch_rows=len(pandas_df))
 
     if engine == "pandas":
         # ── PANDAS PATH ───────────────────────────────────────────────────────
@@ -762,24 +1356,22 @@ def main():
 
         spark = get_spark()
 
-        pandas_df = pandas_df.astype(str).replace("nan", None)
-        spark_df  = spark.createDataFrame(pandas_df)
-        print(f"Converted to Spark DataFrame: {spark_df.count()} rows")
+        spark_df = spark_from_pandas(spark, pandas_df)
+        print(f"Converted to Spark DataFrame: {len(pandas_df)} rows")
 
         spark_df = spark_validate_schema(spark_df)
         validate_time = time.time()
         print(f"Schema validation completed in {validate_time - download_time:.2f} seconds")
 
-        spark_df = spark_transform_data(spark_df)
+        spark_df, row_count = spark_transform_data(spark_df)
         transform_time = time.time()
         print(f"Transform completed in {transform_time - validate_time:.2f} seconds")
 
-        spark_load_to_postgres(spark_df)
+        spark_load_to_postgres(spark_df, row_count)
         billing_insert_time = time.time()
         print(f"Billing data load completed in {billing_insert_time - transform_time:.2f} seconds")
 
-        pandas_out = spark_df.toPandas()
-        agg_insert.load_aggregates_to_postgres(pandas_out)
+        agg_insert.load_aggregates_from_spark(spark_df)
         aggregates_insert_time = time.time()
         print(f"Aggregate inserts completed in {aggregates_insert_time - billing_insert_time:.2f} seconds")
 
@@ -788,5 +1380,21 @@ def main():
     print(f"Total ETL execution time: {aggregates_insert_time - start_time:.2f} seconds")
 
 
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Sales billing ETL")
+    parser.add_argument("--backfill", nargs=2, metavar=("START", "END"),
+                        type=date.fromisoformat,
+                        help="re-ingest an inclusive YYYY-MM-DD date range")
+    parser.add_argument("--window", choices=["day", "week"], default="day")
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = _parse_args()
+    if args.backfill:
+        backfill(*args.backfill, window=args.window,
+                 concurrency=args.concurrency, checkpoint_path=args.checkpoint)
+    else:
+        main()
\ No newline at end of file
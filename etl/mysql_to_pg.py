@@ -1,8 +1,13 @@
+import io
+import json
+import os
+import queue
+import threading
 import mysql.connector
 import pandas as pd
 import psycopg2
-import psycopg2.extras
 import time
+from datetime import date, datetime, timedelta
 
 
 # --- MySQL connection ---
@@ -26,67 +31,204 @@ def get_pg_connection():
     )
 
 
-def migrate_sales(start_date, end_date):
-    start_time = time.time()
+# =============================================================================
+# STREAMING MIGRATION
+# -----------------------------------------------------------------------------
+# The range is migrated one day at a time. A reader thread streams each day
+# out of MySQL through an unbuffered cursor in fixed-size chunks and hands
+# them over a bounded queue; the main thread transforms each chunk and COPYs
+# it into PostgreSQL, so MySQL reads and Postgres writes overlap while at
+# most MIGRATE_QUEUE_DEPTH chunks sit in memory.
+#
+# Each day is one PostgreSQL transaction (delete that day, then COPY), and
+# the progress file is updated after every completed day — re-running the
+# same range resumes after the last completed day. A day MySQL returns no
+# rows for is skipped without touching PostgreSQL.
+#   MIGRATE_CHUNK_ROWS=50000                       → rows per MySQL fetch / COPY
+#   MIGRATE_QUEUE_DEPTH=4                          → chunks buffered between threads
+#   MIGRATE_PROGRESS_FILE=mysql_to_pg_progress.json
+# =============================================================================
+
+MIGRATE_CHUNK_ROWS    = int(os.getenv("MIGRATE_CHUNK_ROWS", "50000"))
+MIGRATE_QUEUE_DEPTH   = int(os.getenv("MIGRATE_QUEUE_DEPTH", "4"))
+MIGRATE_PROGRESS_FILE = os.getenv("MIGRATE_PROGRESS_FILE", "mysql_to_pg_progress.json")
+COPY_NULL_MARKER      = "\\N"
+
+SALES_COLUMNS = [
+    "invoice", "storeInvoice", "orderDate", "time", "productId", "productName", "barcode",
+    "quantity", "sellingPrice", "discountAmount", "totalProductPrice", "deliveryFee",
+    "HSNCode", "GST", "GSTAmount", "CGSTRate", "CGSTAmount", "SGSTRate", "SGSTAmount",
+    "acessAmount", "cess", "cessAmount", "orderAmountTax", "orderAmountNet", "cashAmount",
+    "cardAmount", "upiAmount", "creditAmount", "costPrice", "description", "brandName",
+    "categoryName", "subCategoryOf", "storeName", "GSTIN", "orderType", "paymentMethod",
+    "customerName", "customerNumber", "orderFrom", "orderStatus"
+]
+
+DAY_QUERY = f"""
+    SELECT {", ".join(SALES_COLUMNS)}
+    FROM sales_data
+    WHERE orderDate >= %s AND orderDate < %s;
+"""
+
+
+def transform_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Column-wise version of the old row-wise time/orderDate clean-up."""
+    if "time" in df.columns:
+        # MySQL TIME arrives as timedelta ("0 days 13:45:00") — keep the clock part
+        df["time"] = df["time"].astype("string").str.split().str[-1]
+
+    if "orderDate" in df.columns:
+        df["orderDate"] = pd.to_datetime(
+            df["orderDate"], errors="coerce"
+        ).dt.strftime("%Y-%m-%d")
+    return df
+
+
+def copy_chunk(cur, df: pd.DataFrame):
+    """COPY one chunk into billing_data from an in-memory CSV buffer."""
+    cols   = ",".join([f'"{col}"' for col in df.columns])
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL_MARKER)
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY billing_data ({cols}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL_MARKER}')",
+        buffer
+    )
 
-    # SQL query
-    query = f"""
-        SELECT 
-            invoice, storeInvoice, orderDate, time, productId, productName, barcode,
-            quantity, sellingPrice, discountAmount, totalProductPrice, deliveryFee,
-            HSNCode, GST, GSTAmount, CGSTRate, CGSTAmount, SGSTRate, SGSTAmount,
-            acessAmount, cess, cessAmount, orderAmountTax, orderAmountNet, cashAmount,
-            cardAmount, upiAmount, creditAmount, costPrice, description, brandName,
-            categoryName, subCategoryOf, storeName, GSTIN, orderType, paymentMethod,
-            customerName, customerNumber, orderFrom, orderStatus
-        FROM sales_data
-        WHERE orderDate BETWEEN '{start_date}' AND '{end_date}';
-    """
 
+def _read_progress(path: str, start: date, end: date):
+    """Return the last migrated day for this exact range, or None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read progress file {path}: {e} — starting from scratch.")
+        return None
+    if state.get("range") != [start.isoformat(), end.isoformat()]:
+        print(f"Progress file {path} is for range {state.get('range')} — ignoring.")
+        return None
+    return date.fromisoformat(state["last_completed"])
+
+
+def _write_progress(path: str, start: date, end: date, last_completed: date):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "range":          [start.isoformat(), end.isoformat()],
+            "last_completed": last_completed.isoformat(),
+            "updated_at":     datetime.now().isoformat(timespec="seconds"),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def _put(chunks: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _read_days(days: list, chunks: queue.Queue, stop: threading.Event, chunk_rows: int):
+    """Reader thread: stream each day from MySQL as ("rows", day, df) then ("done", day)."""
+    mysql_conn = None
     try:
-        # --- Extract from MySQL ---
         mysql_conn = get_mysql_connection()
-        print("⏳ Fetching data from MySQL...")
-        df = pd.read_sql(query, mysql_conn)
-        mysql_conn.close()
-        print(f"✅ Retrieved {len(df)} rows from MySQL")
-
-        # --- Transform ---
-        if "time" in df.columns:
-            df["time"] = df["time"].apply(
-                lambda x: str(x).split()[-1] if pd.notnull(x) else None
-            )
-
-        if "orderDate" in df.columns:
-            df["orderDate"] = pd.to_datetime(
-                df["orderDate"], errors="coerce"
-            ).dt.strftime("%Y-%m-%d")
-
-        # --- Load into PostgreSQL ---
-        pg_conn = get_pg_connection()
-        cur = pg_conn.cursor()
+        for day in days:
+            cur = mysql_conn.cursor()  # unbuffered: rows stay server-side until fetched
+            cur.execute(DAY_QUERY, (day.isoformat(), (day + timedelta(days=1)).isoformat()))
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                if not _put(chunks, ("rows", day, pd.DataFrame(rows, columns=SALES_COLUMNS)), stop):
+                    return
+            cur.close()
+            if not _put(chunks, ("done", day, None), stop):
+                return
+        _put(chunks, ("end", None, None), stop)
+    except Exception as e:
+        _put(chunks, ("error", None, e), stop)
+    finally:
+        if mysql_conn:
+            mysql_conn.close()
 
-        columns = list(df.columns)
-        cols_str = ",".join([f'"{col}"' for col in columns])
 
-        data_tuples = [tuple(row) for row in df.values]
+def migrate_sales(start_date, end_date,
+                  chunk_rows: int = MIGRATE_CHUNK_ROWS,
+                  queue_depth: int = MIGRATE_QUEUE_DEPTH,
+                  progress_path: str = MIGRATE_PROGRESS_FILE):
+    start_time = time.time()
+    start, end = date.fromisoformat(str(start_date)), date.fromisoformat(str(end_date))
+
+    resume_after = _read_progress(progress_path, start, end)
+    first_day    = start if resume_after is None else resume_after + timedelta(days=1)
+    if resume_after is not None:
+        print(f"↻ Resuming after {resume_after}")
+    days = [first_day + timedelta(days=i) for i in range((end - first_day).days + 1)]
+    if not days:
+        print(f"✅ Range {start} → {end} already migrated ({progress_path})")
+        return
+
+    chunks = queue.Queue(maxsize=queue_depth)
+    stop   = threading.Event()
+    reader = threading.Thread(
+        target=_read_days, args=(days, chunks, stop, chunk_rows), daemon=True
+    )
 
-        insert_sql = f'INSERT INTO billing_data ({cols_str}) VALUES %s'
+    pg_conn    = None
+    total_rows = 0
+    try:
+        pg_conn = get_pg_connection()
+        cur     = pg_conn.cursor()
+        print(f"⏳ Streaming {len(days)} day(s) from MySQL into PostgreSQL "
+              f"({chunk_rows} rows/chunk)...")
+        reader.start()
+
+        day_rows = 0
+        while True:
+            kind, day, payload = chunks.get()
+            if kind == "error":
+                raise payload
+            if kind == "end":
+                break
+            if kind == "rows":
+                if day_rows == 0:
+                    # Idempotent per day: clear rows left by an earlier, unrecorded run.
+                    # Only once MySQL has rows for the day, so a gap in the source
+                    # never wipes what PostgreSQL already holds.
+                    cur.execute('DELETE FROM billing_data WHERE "orderDate" = %s', (day,))
+                copy_chunk(cur, transform_chunk(payload))
+                day_rows += len(payload)
+            else:  # "done"
+                if day_rows:
+                    pg_conn.commit()
+                    print(f"  ✓ {day}: {day_rows} rows")
+                else:
+                    print(f"  – {day}: no rows in MySQL — existing PostgreSQL rows kept")
+                _write_progress(progress_path, start, end, day)
+                total_rows += day_rows
+                day_rows = 0
 
-        print(f"⏳ Inserting {len(data_tuples)} rows into PostgreSQL...")
-        psycopg2.extras.execute_values(
-            cur, insert_sql, data_tuples, page_size=2000
-        )
-        pg_conn.commit()
         cur.close()
-        pg_conn.close()
-
         end_time = time.time()
         print(f"✅ Migration completed in {end_time - start_time:.2f} seconds")
-        print(f"Successfully migrated {len(df)} rows into billing_data")
+        print(f"Successfully migrated {total_rows} rows into billing_data")
 
     except Exception as e:
+        if pg_conn:
+            pg_conn.rollback()
         print("❌ Error during migration:", e)
+        print(f"Re-run the same range to resume after the last completed day ({progress_path}).")
+    finally:
+        stop.set()
+        if pg_conn:
+            pg_conn.close()
 
 
 if __name__ == "__main__":
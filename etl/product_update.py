@@ -1,6 +1,8 @@
 import psycopg2
+import psycopg2.extras
 import os
 from dotenv import load_dotenv
+from agg_insert import refresh_daily_comparisons
 
 load_dotenv()
 
@@ -18,51 +20,174 @@ DB_PASSWORD = require_env("DB_PASSWORD")
 DB_PORT = int(os.getenv("DB_PORT", 5432))
 
 
-queries = [
-    # === Product updates ===
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut Chocolate 55g' WHERE "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut Chocolate Bar 55g';""",
-    """UPDATE product_sales SET "productname" = 'Ocean Peach & Passion Fruit Fruit Drink 500 ml' WHERE "productname" = 'Ocean Peach & Passion Fruit Flavour Fruit Drink 500 ml';""",
-    """UPDATE product_sales SET "productname" = 'Lotus Biscoff Original Biscuit-250 gm' WHERE "productname" = 'Lotus Biscoff Original Caramelised Biscuit - 250 gm';""",
-    """UPDATE product_sales SET "productname" = 'Labubu Have A Seat Original Monsters Blind' WHERE "productname" = 'Labubu Have A Seat Original Popmart The Monsters Blind';""",
-    """UPDATE product_sales SET "productname" = 'Kwality Wall''s Magnum Chocolate Ice Cream 70ml' WHERE "productname" = 'Kwality Wall''s Magnum Chocolate Truffle Ice Cream 70ml';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut Bar 137g' WHERE "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut Chocolate Bar 137g';""",
-    """UPDATE product_sales SET "productname" = 'Nutella & Go Hazelnut Spread & Pretzels 48gm' WHERE "productname" = 'Nutella & Go Hazelnut Spread & Pretzels Sticks, 48gm';""",
-    """UPDATE product_sales SET "productname" = 'Coca Cola Diet Coke Carbonated Soft Drink 300ml' WHERE "productname" = 'Coca Cola Diet Coke Carbonated Soft Drink Can 300ml';""",
-    """UPDATE product_sales SET "productname" = 'Coca Cola Soft Drink Original Taste, 1L ' WHERE "productname" = 'Coca Cola Soft Drink Original Taste, Refreshing, 1L ';""",
-    """UPDATE product_sales SET "productname" = 'Ocean Strawberry & Lime Flavour Drink 500 ml ' WHERE "productname" = 'Ocean Strawberry & Lime Flavour Fruit Drink 500 ml';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Roast Almond Chocolate 58g' WHERE "productname" = 'Cadbury Dairy Milk Silk Roast Almond Chocolate Bar 58g';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Celebrations Assorted Chocolate 154.2g' WHERE "productname" = 'Cadbury Celebrations Assorted Chocolate Gift Pack 154.2g ';""",
-    """UPDATE product_sales SET "productname" = 'Godiva Chocolate Milk Chocolate Hazelnut 83g' WHERE "productname" = 'Godiva Chocolate Milk Chocolate Hazelnut Oyster 83 G';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Roast Almond Choco 58g' WHERE "productname" = 'Cadbury Dairy Milk Silk Roast Almond Chocolate 58g';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Hazelnut Chocolate 58g' WHERE "productname" = 'Cadbury Dairy Milk Silk Hazelnut Chocolate Bar 58g';""",
-    """UPDATE product_sales SET "productname" = 'MR. MAKHANA Popped Lotus Seeds-Pudina Party 75g' WHERE "productname" = 'MR. MAKHANA Popped Lotus Seeds - Pudina Party 75 g';""",
-    """UPDATE product_sales SET "productname" = 'Coca Cola Diet Coke Carbonated Drink 300ml' WHERE "productname" = 'Coca Cola Diet Coke Carbonated Soft Drink 300ml';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Chocolate Bar 112g' WHERE "productname" = 'Cadbury Dairy Milk Silk Bubbly Chocolate Bar 112g';""",
-    """UPDATE product_sales SET "productname" = 'Catch Flavoured Water - Lemon N Lime 750 Ml' WHERE "productname" = 'Catch Flavoured Water - Lemon N Lime 750 Ml Bottle';""",
-    """UPDATE product_sales SET "productname" = 'MrBeast Almond Chocolate with Almond 60g' WHERE "productname" = 'MrBeast Feastables Almond Milk Chocolate with Almond Chunks Bar 60g';""",
-    """UPDATE product_sales SET "productname" = 'Samyang Chicken Flavor Ramen Buldak Noodles 650Gm' WHERE "productname" = 'Samyang Hot Chicken Flavor Ramen Buldak Carbonara Noodles 650Gm ';""",
-    """UPDATE product_sales SET "productname" = 'Parle Platina Hide & Seek Chocolate Cookies-100gm' WHERE "productname" = 'Parle Platina Hide & Seek Chocolate Chip Cookies - 100gm';""",
-    """UPDATE product_sales SET "productname" = 'Monster Energy Drink Zero Sugar 12 x 500ml' WHERE "productname" = 'Monster Energy Drink Ultra Zero Sugar 12 x 500ml';""",
-    """UPDATE product_sales SET "productname" = 'Nestle Munch Max Chocolate Coated Wafer 38.5g' WHERE "productname" = 'Nestle Munch Max Chocolate Coated Crunchy Wafer Bar 38.5g';""",
-    """UPDATE product_sales SET "productname" = 'RiteBite Max Protein Bar Ultimate Choco 100g' WHERE "productname" = 'RiteBite Max Protein Bar Ultimate Choco Berry 100g';""",
-    """UPDATE product_sales SET "productname" = 'Sprite Clear Carbonated Drink Bottle 750ml' WHERE "productname" = 'Sprite Clear Carbonated Drink Pet Bottle 750ml';""",
-    """UPDATE product_sales SET "productname" = 'Catch Flavoured Water - Black Currant 750 Ml' WHERE "productname" = 'Catch Flavoured Water - Black Currant 750 Ml Bottle';""",
-    """UPDATE product_sales SET "productname" = 'Coca Cola Soft Drink Original Taste 750Ml' WHERE "productname" = 'Coca Cola Soft Drink Original Taste, Refreshing, 750Ml';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut 55g' WHERE "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut Chocolate 55g';""",
-    """UPDATE product_sales SET "productname" = 'iteBite Max Protein Bar Choco Almond 30g' WHERE "productname" = 'iteBite Max Protein Bar Ultimate Choco Almond 30g';""",
-    """UPDATE product_sales SET "productname" = 'Epigamia Chocolate Protein Milkshake, 250 ml' WHERE "productname" = 'Epigamia Chocolate Turbo 25 g Protein Milkshake, 250 ml';""",
-    """UPDATE product_sales SET "productname" = 'Mr Makhana Himalaya Lotus Seeds 60g' WHERE "productname" = 'Mr Makhana Himalaya Salt & Pepper Popped Lotus Seeds 60g';""",
-    """UPDATE product_sales SET "productname" = 'Cadbury Dairy Milk Fruit & Nut Chocolate 51 g' WHERE "productname" = 'Cadbury Dairy Milk Silk Fruit & Nut Chocolate Bar 51 g';""",
-    """UPDATE product_sales SET "productname" = 'RiteBite Max Protein Bar Choco Almond 30g' WHERE "productname" = 'RiteBite Max Protein Bar Ultimate Choco Almond 30g';""",
-    """UPDATE product_sales SET "productname" = 'Toblerone Swiss Milk Chocolate-Honey Almond 100gm' WHERE "productname" = 'Toblerone Swiss Milk Chocolate - With Honey & Almond Nougat, 100gm';""",
-    """UPDATE product_sales SET "productname" = 'Cetaphil Sun Pff 50+ Light Gel Skin Body 50 Ml' WHERE "productname" = 'Cetaphil Sun Pff 50+ Light Gel Sensitive Skin Body 50 Ml';""",
-    """UPDATE product_sales SET "productname" = 'MrBeast Feastables Milk Chocolate Rice Bar 60g' WHERE "productname" = 'MrBeast Feastables Crunch Milk Chocolate with Puffed Rice Bar 60g';""",
-
-    # === Store updates ===
-    """UPDATE store_sales SET "storename" = 'Daryaganj Subhash Marg' WHERE "storename" = 'Daryaganj Netaji Subhash Marg';""",
-    """UPDATE billing_data SET "storeName" = 'Daryaganj Subhash Marg' WHERE "storeName" = 'Daryaganj Netaji Subhash Marg';"""
+# =============================================================================
+# NAME ALIASES
+# -----------------------------------------------------------------------------
+# (old_name, canonical_name) pairs, in the order they were introduced. A name
+# that was renamed more than once (A → B, later B → C) is resolved to its
+# final canonical form before it is stored, so one set-based UPDATE per table
+# gives the same result as running the renames one after another.
+#
+# The resolved pairs live in the name_aliases table. agg_insert reads it and
+# writes aggregate rows under canonical names in the first place; run_updates()
+# rewrites any rows that were loaded before an alias was added.
+# =============================================================================
+
+NAME_ALIAS_TABLE = "name_aliases"
+
+PRODUCT_ALIASES = [
+    ("Cadbury Dairy Milk Silk Fruit & Nut Chocolate Bar 55g", "Cadbury Dairy Milk Silk Fruit & Nut Chocolate 55g"),
+    ("Ocean Peach & Passion Fruit Flavour Fruit Drink 500 ml", "Ocean Peach & Passion Fruit Fruit Drink 500 ml"),
+    ("Lotus Biscoff Original Caramelised Biscuit - 250 gm", "Lotus Biscoff Original Biscuit-250 gm"),
+    ("Labubu Have A Seat Original Popmart The Monsters Blind", "Labubu Have A Seat Original Monsters Blind"),
+    ("Kwality Wall's Magnum Chocolate Truffle Ice Cream 70ml", "Kwality Wall's Magnum Chocolate Ice Cream 70ml"),
+    ("Cadbury Dairy Milk Silk Fruit & Nut Chocolate Bar 137g", "Cadbury Dairy Milk Silk Fruit & Nut Bar 137g"),
+    ("Nutella & Go Hazelnut Spread & Pretzels Sticks, 48gm", "Nutella & Go Hazelnut Spread & Pretzels 48gm"),
+    ("Coca Cola Diet Coke Carbonated Soft Drink Can 300ml", "Coca Cola Diet Coke Carbonated Soft Drink 300ml"),
+    ("Coca Cola Soft Drink Original Taste, Refreshing, 1L ", "Coca Cola Soft Drink Original Taste, 1L "),
+    ("Ocean Strawberry & Lime Flavour Fruit Drink 500 ml", "Ocean Strawberry & Lime Flavour Drink 500 ml "),
+    ("Cadbury Dairy Milk Silk Roast Almond Chocolate Bar 58g", "Cadbury Dairy Milk Silk Roast Almond Chocolate 58g"),
+    ("Cadbury Celebrations Assorted Chocolate Gift Pack 154.2g ", "Cadbury Celebrations Assorted Chocolate 154.2g"),
+    ("Godiva Chocolate Milk Chocolate Hazelnut Oyster 83 G", "Godiva Chocolate Milk Chocolate Hazelnut 83g"),
+    ("Cadbury Dairy Milk Silk Roast Almond Chocolate 58g", "Cadbury Dairy Milk Silk Roast Almond Choco 58g"),
+    ("Cadbury Dairy Milk Silk Hazelnut Chocolate Bar 58g", "Cadbury Dairy Milk Silk Hazelnut Chocolate 58g"),
+    ("MR. MAKHANA Popped Lotus Seeds - Pudina Party 75 g", "MR. MAKHANA Popped Lotus Seeds-Pudina Party 75g"),
+    ("Coca Cola Diet Coke Carbonated Soft Drink 300ml", "Coca Cola Diet Coke Carbonated Drink 300ml"),
+    ("Cadbury Dairy Milk Silk Bubbly Chocolate Bar 112g", "Cadbury Dairy Milk Silk Chocolate Bar 112g"),
+    ("Catch Flavoured Water - Lemon N Lime 750 Ml Bottle", "Catch Flavoured Water - Lemon N Lime 750 Ml"),
+    ("MrBeast Feastables Almond Milk Chocolate with Almond Chunks Bar 60g", "MrBeast Almond Chocolate with Almond 60g"),
+    ("Samyang Hot Chicken Flavor Ramen Buldak Carbonara Noodles 650Gm ", "Samyang Chicken Flavor Ramen Buldak Noodles 650Gm"),
+    ("Parle Platina Hide & Seek Chocolate Chip Cookies - 100gm", "Parle Platina Hide & Seek Chocolate Cookies-100gm"),
+    ("Monster Energy Drink Ultra Zero Sugar 12 x 500ml", "Monster Energy Drink Zero Sugar 12 x 500ml"),
+    ("Nestle Munch Max Chocolate Coated Crunchy Wafer Bar 38.5g", "Nestle Munch Max Chocolate Coated Wafer 38.5g"),
+    ("RiteBite Max Protein Bar Ultimate Choco Berry 100g", "RiteBite Max Protein Bar Ultimate Choco 100g"),
+    ("Sprite Clear Carbonated Drink Pet Bottle 750ml", "Sprite Clear Carbonated Drink Bottle 750ml"),
+    ("Catch Flavoured Water - Black Currant 750 Ml Bottle", "Catch Flavoured Water - Black Currant 750 Ml"),
+    ("Coca Cola Soft Drink Original Taste, Refreshing, 750Ml", "Coca Cola Soft Drink Original Taste 750Ml"),
+    ("Cadbury Dairy Milk Silk Fruit & Nut Chocolate 55g", "Cadbury Dairy Milk Silk Fruit & Nut 55g"),
+    ("iteBite Max Protein Bar Ultimate Choco Almond 30g", "iteBite Max Protein Bar Choco Almond 30g"),
+    ("Epigamia Chocolate Turbo 25 g Protein Milkshake, 250 ml", "Epigamia Chocolate Protein Milkshake, 250 ml"),
+    ("Mr Makhana Himalaya Salt & Pepper Popped Lotus Seeds 60g", "Mr Makhana Himalaya Lotus Seeds 60g"),
+    ("Cadbury Dairy Milk Silk Fruit & Nut Chocolate Bar 51 g", "Cadbury Dairy Milk Fruit & Nut Chocolate 51 g"),
+    ("RiteBite Max Protein Bar Ultimate Choco Almond 30g", "RiteBite Max Protein Bar Choco Almond 30g"),
+    ("Toblerone Swiss Milk Chocolate - With Honey & Almond Nougat, 100gm", "Toblerone Swiss Milk Chocolate-Honey Almond 100gm"),
+    ("Cetaphil Sun Pff 50+ Light Gel Sensitive Skin Body 50 Ml", "Cetaphil Sun Pff 50+ Light Gel Skin Body 50 Ml"),
+    ("MrBeast Feastables Crunch Milk Chocolate with Puffed Rice Bar 60g", "MrBeast Feastables Milk Chocolate Rice Bar 60g"),
+]
+
+STORE_ALIASES = [
+    ("Daryaganj Netaji Subhash Marg", "Daryaganj Subhash Marg"),
 ]
 
+# Tables rewritten by run_updates():
+#   (dimension, table, name column, additive columns, order-count column for aov)
+# billing_data rows are renamed in place. Aggregate rows are merged instead:
+# an old-name row and its canonical row for the same date collapse into one
+# row with summed counts and sales, so the (name, orderdate) natural key used
+# by incremental aggregate writes stays unique.
+ALIAS_TARGETS = [
+    ("product", "product_sales", "productname", ["nooforders", "sales", "quantitysold"], None),
+    ("store",   "store_sales",   "storename",   ["nooforder", "sales"],                  "nooforder"),
+    ("store",   "billing_data",  "storeName",   None,                                    None),
+]
+
+
+def resolve_aliases(pairs: list) -> dict:
+    """Map every old name to where the ordered renames finally leave it."""
+    resolved = {}
+    for old, _ in pairs:
+        current = old
+        for src, dst in pairs:
+            if current == src:
+                current = dst
+        if current != old:
+            resolved[old] = current
+    return resolved
+
+
+def sync_alias_table(cur):
+    """Create name_aliases if needed and upsert the resolved alias lists."""
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {NAME_ALIAS_TABLE} (
+            dimension      TEXT NOT NULL,
+            old_name       TEXT NOT NULL,
+            canonical_name TEXT NOT NULL,
+            PRIMARY KEY (dimension, old_name)
+        )
+    """)
+    rows = [
+        (dimension, old, canonical)
+        for dimension, pairs in (("product", PRODUCT_ALIASES), ("store", STORE_ALIASES))
+        for old, canonical in resolve_aliases(pairs).items()
+    ]
+    psycopg2.extras.execute_values(
+        cur,
+        f"""INSERT INTO {NAME_ALIAS_TABLE} (dimension, old_name, canonical_name) VALUES %s
+            ON CONFLICT (dimension, old_name)
+            DO UPDATE SET canonical_name = EXCLUDED.canonical_name""",
+        rows
+    )
+    return len(rows)
+
+
+def rename_rows(cur, dimension: str, table: str, column: str) -> int:
+    """Set-based in-place rename of every aliased name in table.column."""
+    cur.execute(
+        f"""UPDATE {table} AS t
+            SET "{column}" = a.canonical_name
+            FROM {NAME_ALIAS_TABLE} AS a
+            WHERE a.dimension = %s AND t."{column}" = a.old_name""",
+        (dimension,)
+    )
+    return cur.rowcount
+
+
+def merge_aggregate_rows(cur, dimension: str, table: str, column: str,
+                         additive: list, orders_col) -> tuple:
+    """
+    Fold aliased aggregate rows into their canonical (name, orderdate) row.
+    Returns (rows replaced, canonical rows written, dates touched).
+    """
+    sums = ", ".join([f'SUM(t."{c}") AS "{c}"' for c in additive])
+    cur.execute(
+        f"""CREATE TEMP TABLE _alias_merge ON COMMIT DROP AS
+            SELECT COALESCE(a.canonical_name, t."{column}") AS name, t.orderdate, {sums}
+            FROM {table} AS t
+            LEFT JOIN {NAME_ALIAS_TABLE} AS a
+              ON a.dimension = %(dim)s AND a.old_name = t."{column}"
+            WHERE (COALESCE(a.canonical_name, t."{column}"), t.orderdate) IN (
+                SELECT a2.canonical_name, t2.orderdate
+                FROM {table} AS t2
+                JOIN {NAME_ALIAS_TABLE} AS a2
+                  ON a2.dimension = %(dim)s AND a2.old_name = t2."{column}"
+            )
+            GROUP BY 1, 2""",
+        {"dim": dimension}
+    )
+    cur.execute(
+        f"""DELETE FROM {table} AS t
+            USING _alias_merge AS m
+            WHERE t.orderdate = m.orderdate
+              AND (t."{column}" = m.name
+                   OR t."{column}" IN (SELECT old_name FROM {NAME_ALIAS_TABLE}
+                                       WHERE dimension = %s AND canonical_name = m.name))""",
+        (dimension,)
+    )
+    replaced = cur.rowcount
+    cols   = ", ".join([f'"{c}"' for c in additive])
+    aov    = ', "aov"' if orders_col else ""
+    aov_fn = f', ROUND(sales / NULLIF("{orders_col}", 0), 2)' if orders_col else ""
+    cur.execute(
+        f"""INSERT INTO {table} ("{column}", orderdate, {cols}{aov})
+            SELECT name, orderdate, {cols}{aov_fn} FROM _alias_merge"""
+    )
+    merged = cur.rowcount
+    cur.execute("SELECT DISTINCT orderdate FROM _alias_merge")
+    dates = [row[0] for row in cur.fetchall()]
+    cur.execute("DROP TABLE _alias_merge")
+    return replaced, merged, dates
+
+
 def run_updates():
     conn = None
     try:
@@ -75,8 +200,21 @@ def run_updates():
         )
 
         cur = conn.cursor()
-        for q in queries:
-            cur.execute(q)
+        synced = sync_alias_table(cur)
+        print(f"{synced} aliases synced into {NAME_ALIAS_TABLE}")
+        touched = set()
+        for dimension, table, column, additive, orders_col in ALIAS_TARGETS:
+            if additive is None:
+                renamed = rename_rows(cur, dimension, table, column)
+                print(f"  {table}.{column}: {renamed} rows renamed")
+            else:
+                replaced, merged, dates = merge_aggregate_rows(
+                    cur, dimension, table, column, additive, orders_col
+                )
+                touched.update(dates)
+                print(f"  {table}.{column}: {replaced} rows merged into {merged} canonical rows")
+        # Merged dates still carry the retired names in the dashboard comparison tables
+        refresh_daily_comparisons(cur, sorted(touched))
         conn.commit()
         print("All updates applied successfully")
         cur.close()
@@ -6,9 +6,12 @@ Covers every DAG task:
 
   DAG task          Script               metrics.py call
   ──────────────    ─────────────────    ──────────────────────────────────
-  etl_pip           etl_pip.py           task_timer, record_etl_rows
+  etl_pip           etl_pip.py           task_timer, record_etl_rows,
+                                         record_etl_throughput
   product_update    product_update.py    task_timer, record_etl_rows
-  daily_analysis    analysis.py          task_timer, record_db_*
+  daily_analysis    analysis.py          task_timer, record_db_*,
+                                         record_query_cache
+  (lib)  connector  connector.py         record_db_pool_checkouts
   weekly_reports    weekly_llm.py        report_timer, record_report,
                                          record_db_*, record_stock_counts
   weekly_mail       mail.py              mail_timer, record_mail_sent
@@ -81,6 +84,13 @@ etl_rows_loaded = Gauge(
     registry=_registry,
 )
 
+etl_load_rows_per_second = Gauge(
+    "etl_load_rows_per_second",
+    "Bulk load throughput per table and load method",
+    ["table", "method"],
+    registry=_registry,
+)
+
 etl_api_errors_total = Counter(
     "etl_api_errors_total",
     "API call failures during ETL data fetch",
@@ -110,6 +120,27 @@ db_retries_total = Counter(
     registry=_registry,
 )
 
+db_pool_checkouts_total = Counter(
+    "db_pool_checkouts_total",
+    "Connections borrowed from the shared connector.py pool",
+    ["script"],
+    registry=_registry,
+)
+
+db_pool_checkout_seconds = Gauge(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a pooled connection per run (mean / max)",
+    ["script", "stat"],
+    registry=_registry,
+)
+
+query_cache_requests_total = Counter(
+    "query_cache_requests_total",
+    "queries/* fetch calls served from cache (hit) or the database (miss)",
+    ["function", "result"],
+    registry=_registry,
+)
+
 # ── Report generation (weekly_llm.py, monthly_llm.py) ────────────────────────
 report_total = Counter(
     "report_generation_total",
@@ -286,6 +317,12 @@ def record_etl_rows(table: str, row_count: int) -> None:
     _push()
 
 
+def record_etl_throughput(table: str, method: str, rows_per_second: float) -> None:
+    """Call after a bulk load — method e.g. 'copy' | 'execute_values'."""
+    etl_load_rows_per_second.labels(table=table, method=method).set(rows_per_second)
+    _push()
+
+
 def record_etl_api_error(endpoint: str) -> None:
     """Call when an API fetch during ETL fails."""
     etl_api_errors_total.labels(endpoint=endpoint).inc()
@@ -313,6 +350,27 @@ def record_db_retry(script: str) -> None:
     _push()
 
 
+def record_query_cache(stats: dict) -> None:
+    """
+    Called once at exit by automation/queries/cache.py with the run's
+    {function: {"hit": n, "miss": n}} counts.
+    """
+    for function, counts in stats.items():
+        for result, count in counts.items():
+            if count:
+                query_cache_requests_total.labels(function=function, result=result).inc(count)
+    _push()
+
+
+def record_db_pool_checkouts(script: str, count: int,
+                             mean_seconds: float, max_seconds: float) -> None:
+    """Called once at exit by connector.py with the run's pool checkout stats."""
+    db_pool_checkouts_total.labels(script=script).inc(count)
+    db_pool_checkout_seconds.labels(script=script, stat="mean").set(mean_seconds)
+    db_pool_checkout_seconds.labels(script=script, stat="max").set(max_seconds)
+    _push()
+
+
 # ── Report generation ─────────────────────────────────────────────────────────
 
 @contextmanager
@@ -0,0 +1,119 @@
+"""
+tests/test_agg_natural_keys.py
+─────────────────────────────────────────────────────────────────────────────
+Checks ensure_aggregate_natural_keys in etl/agg_insert.py against aggregate
+tables that already hold duplicate (dimension, orderdate) rows: exact
+duplicates are collapsed, duplicates on the batch's dates are cleared for the
+upsert to recompute, conflicting duplicates elsewhere abort with a clear error,
+and the unique index is created once.
+
+Needs a scratch PostgreSQL database — skipped unless TEST_DATABASE_URL is set,
+e.g. TEST_DATABASE_URL=postgresql://postgres@localhost/scratch
+Each test runs in its own schema inside a rolled-back transaction.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+from datetime import date
+
+import pytest
+
+# Allow import from project root; agg_insert lives in etl/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+# DB settings are read at import time — the tests connect via TEST_DATABASE_URL
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "test")
+
+import psycopg2
+
+import agg_insert
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+TABLE_DDL = {
+    "brand_sales":    "brandname text, nooforders int, sales numeric, aov numeric, orderdate date",
+    "store_sales":    "storename text, nooforder int, sales numeric, aov numeric, orderdate date",
+    "category_sales": "subcategoryof text, sales numeric, orderdate date",
+    "product_sales":  "productname text, nooforders int, sales numeric, quantitysold numeric, "
+                      "orderdate date",
+}
+
+DEC_1 = date(2024, 12, 1)
+DEC_2 = date(2024, 12, 2)
+
+
+@pytest.fixture
+def cur():
+    """Cursor on an empty copy of the four aggregate tables; rolled back afterwards."""
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    cursor = conn.cursor()
+    cursor.execute("CREATE SCHEMA agg_natural_keys_test")
+    cursor.execute("SET LOCAL search_path TO agg_natural_keys_test")
+    for table, columns in TABLE_DDL.items():
+        cursor.execute(f"CREATE TABLE {table} ({columns})")
+    yield cursor
+    conn.rollback()
+    conn.close()
+
+
+def brand_rows(cur) -> list:
+    cur.execute("SELECT brandname, nooforders, sales, orderdate FROM brand_sales "
+                "ORDER BY orderdate, brandname, sales")
+    return [(b, n, float(s), d) for b, n, s, d in cur.fetchall()]
+
+
+def insert_brands(cur, rows):
+    for brand, orders, sales, day in rows:
+        cur.execute("INSERT INTO brand_sales VALUES (%s, %s, %s, %s, %s)",
+                    (brand, orders, sales, sales / orders, day))
+
+
+def has_index(cur, table) -> bool:
+    cur.execute("SELECT to_regclass(%s)", (f"{table}_natural_key",))
+    return cur.fetchone()[0] is not None
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Existing duplicates
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestEnsureNaturalKeys:
+
+    def test_exact_duplicates_collapsed(self, cur):
+        insert_brands(cur, [("Amul", 2, 100.0, DEC_1)] * 3 + [("Tata", 1, 50.0, DEC_1)])
+        agg_insert.ensure_aggregate_natural_keys(cur, [DEC_2])
+        assert brand_rows(cur) == [("Amul", 2, 100.0, DEC_1), ("Tata", 1, 50.0, DEC_1)]
+        assert all(has_index(cur, table) for table in TABLE_DDL)
+
+    def test_batch_date_duplicates_recomputed_by_upsert(self, cur):
+        insert_brands(cur, [("Amul", 2, 100.0, DEC_2), ("Amul", 3, 180.0, DEC_2),
+                            ("Tata", 1, 50.0, DEC_1)])
+        agg_insert.ensure_aggregate_natural_keys(cur, [DEC_2])
+        assert brand_rows(cur) == [("Tata", 1, 50.0, DEC_1)]
+
+        written, deleted = agg_insert.upsert_aggregate_table(
+            cur, "brand_sales", "brandname", agg_insert.POSTGRES_COLUMNS_BRAND,
+            [("Amul", 5, 280.0, 56.0, DEC_2)], [DEC_2],
+        )
+        assert (written, deleted) == (1, 0)
+        assert brand_rows(cur) == [("Tata", 1, 50.0, DEC_1), ("Amul", 5, 280.0, DEC_2)]
+
+    def test_conflicting_duplicates_outside_batch_abort(self, cur):
+        insert_brands(cur, [("Amul", 2, 100.0, DEC_1), ("Amul", 3, 180.0, DEC_1)])
+        with pytest.raises(ValueError, match=r"brand_sales .* 2024-12-01 \(1 keys\)"):
+            agg_insert.ensure_aggregate_natural_keys(cur, [DEC_2])
+        assert not has_index(cur, "brand_sales")
+
+    def test_existing_index_left_alone(self, cur):
+        agg_insert.ensure_aggregate_natural_keys(cur, [])
+        insert_brands(cur, [("Amul", 2, 100.0, DEC_1)])
+        agg_insert.ensure_aggregate_natural_keys(cur, [DEC_1])
+        assert brand_rows(cur) == [("Amul", 2, 100.0, DEC_1)]
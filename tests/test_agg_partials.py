@@ -0,0 +1,140 @@
+"""
+tests/test_agg_partials.py
+─────────────────────────────────────────────────────────────────────────────
+Checks StreamingAggregates in etl/agg_insert.py: partial aggregates folded
+chunk by chunk must give the same four rollups as pandas_compute_aggregates
+over the whole day — invoices spanning chunks, NaN invoices / names / dates,
+unparseable prices, Ho Marlboro rows and name_aliases merges included.
+No DB.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Allow import from project root; agg_insert lives in etl/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+# DB settings are read at import time — never used here
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "test")
+
+import agg_insert
+
+ALIASES = {
+    "productName": {"Milk 1L (old)": "Milk 1L"},
+    "storeName":   {"Downtown Old": "Downtown"},
+}
+
+
+def make_day(rows: int = 600, seed: int = 7) -> pd.DataFrame:
+    """Aggregate input with the nullable dtypes pandas_transform_data produces."""
+    rng = np.random.default_rng(seed)
+    stores   = ["Downtown", "Downtown Old", "Harbour", "Ho Marlboro", None]
+    products = ["Milk 1L", "Milk 1L (old)", "Bread", "Tea", "Coffee", None]
+    days     = pd.to_datetime(["2024-12-01", "2024-12-02", None])
+
+    invoices = [f"INV-{i:04d}" for i in rng.integers(0, 120, rows)]
+    for i in rng.choice(rows, 20, replace=False):
+        invoices[i] = None
+    prices = rng.uniform(-20, 500, rows).round(2).astype(object)
+    prices[rng.choice(rows, 10, replace=False)] = None
+
+    return pd.DataFrame({
+        "invoice":           pd.array(invoices, dtype="string"),
+        "orderDate":         days[rng.choice(3, rows, p=[0.48, 0.48, 0.04])],
+        "totalProductPrice": pd.array(prices, dtype="Float64"),
+        "quantity":          pd.array(rng.integers(1, 5, rows), dtype="Int64"),
+        "brandName":         pd.array(rng.choice(["Amul", "Tata", None], rows), dtype="string"),
+        "storeName":         pd.array(rng.choice(np.array(stores, dtype=object), rows), dtype="string"),
+        "subCategoryOf":     pd.array(rng.choice(["Dairy", "Bakery", "Drinks"], rows), dtype="string"),
+        "productName":       pd.array(rng.choice(np.array(products, dtype=object), rows), dtype="string"),
+    })
+
+
+def expected_aggregates(df: pd.DataFrame, aliases: dict) -> dict:
+    """What load_aggregates_to_postgres computes from the materialised day."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = df.copy()
+        df['totalProductPrice'] = pd.to_numeric(df['totalProductPrice'], errors='coerce')
+        df = agg_insert.exclude_ho_marlboro(df[df['totalProductPrice'].notna()])
+        df = agg_insert.apply_name_aliases_pandas(df, aliases)
+    return agg_insert.pandas_compute_aggregates(df)
+
+
+def stream(df: pd.DataFrame, chunk_rows: int) -> agg_insert.StreamingAggregates:
+    partials = agg_insert.StreamingAggregates()
+    for start in range(0, len(df), chunk_rows):
+        partials.add(df.iloc[start:start + chunk_rows])
+    return partials
+
+
+def assert_same_aggregates(got: dict, expected: dict):
+    for table, _, _, _, db_columns in agg_insert.PANDAS_AGG_DIMENSIONS:
+        pd.testing.assert_frame_equal(
+            got[table][db_columns].astype(object).reset_index(drop=True),
+            expected[table][db_columns].astype(object).reset_index(drop=True),
+            check_exact=False, obj=table,
+        )
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Streamed partials vs whole-day aggregation
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestStreamingAggregates:
+
+    @pytest.mark.parametrize("chunk_rows", [600, 97, 13])
+    def test_matches_whole_day(self, chunk_rows):
+        df = make_day()
+        assert_same_aggregates(stream(df, chunk_rows).aggregates(ALIASES),
+                               expected_aggregates(df, ALIASES))
+
+    def test_without_aliases(self):
+        df = make_day(seed=11)
+        assert_same_aggregates(stream(df, 50).aggregates(), expected_aggregates(df, {}))
+
+    def test_compaction_keeps_totals(self, monkeypatch):
+        monkeypatch.setattr(agg_insert, "STREAM_AGG_COMPACT_CHUNKS", 3)
+        df = make_day(seed=3)
+        assert_same_aggregates(stream(df, 40).aggregates(ALIASES),
+                               expected_aggregates(df, ALIASES))
+
+    def test_invoice_spanning_chunks_counted_once(self):
+        df = pd.DataFrame({
+            "invoice":           pd.array(["A", "A", None], dtype="string"),
+            "orderDate":         pd.to_datetime(["2024-12-01"] * 3),
+            "totalProductPrice": pd.array([10.0, 30.0, 5.0], dtype="Float64"),
+            "quantity":          pd.array([1, 2, 1], dtype="Int64"),
+            "brandName":         pd.array(["Amul"] * 3, dtype="string"),
+            "storeName":         pd.array(["Downtown"] * 3, dtype="string"),
+            "subCategoryOf":     pd.array(["Dairy"] * 3, dtype="string"),
+            "productName":       pd.array(["Milk 1L"] * 3, dtype="string"),
+        })
+        brand = stream(df, 1).aggregates()["brand_sales"]
+        assert brand[["brandname", "nooforders", "sales", "aov"]].values.tolist() == [
+            ["Amul", 1, 45.0, 45.0]
+        ]
+
+    def test_counts_and_dates(self):
+        df = make_day()
+        partials = stream(df, 97)
+        priced = df[df['totalProductPrice'].notna()]
+        ho     = (priced['storeName'] == 'Ho Marlboro').sum()
+        assert partials.ho_rows == ho
+        assert partials.rows == len(priced) - ho - priced['storeName'].isna().sum()
+        assert sorted(partials.dates()) == list(pd.to_datetime(["2024-12-01", "2024-12-02"]))
+
+    def test_missing_column_rejected(self):
+        with pytest.raises(ValueError, match="Missing columns"):
+            agg_insert.StreamingAggregates().add(make_day().drop(columns=["invoice"]))
@@ -0,0 +1,115 @@
+"""
+tests/test_chart_render.py
+─────────────────────────────────────────────────────────────────────────────
+Checks the chart cache in automation/chart_render.py: a store's charts are
+rendered in one batch, unchanged charts are read back from disk instead of
+re-rendered, and any change to data or title gives a new cache entry.
+Kaleido is replaced by a fake renderer — no browser needed.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+import base64
+
+import pandas as pd
+import pytest
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation import chart_render
+from automation.chart_render import bar_chart, chart_key, plot_charts
+
+
+@pytest.fixture
+def batches(monkeypatch, tmp_path):
+    """Fake Kaleido writing the figure title as the image; records each batch."""
+    calls = []
+
+    def fake_render_batch(figs, paths, fmt):
+        calls.append(len(figs))
+        for fig, path in zip(figs, paths):
+            with open(path, "wb") as f:
+                f.write(f"{fmt}:{fig.layout.title.text}".encode("utf-8"))
+
+    monkeypatch.setattr(chart_render, "_render_batch", fake_render_batch)
+    monkeypatch.setattr(chart_render, "_started", True)
+    monkeypatch.setattr(chart_render, "CHART_CACHE_DIR", str(tmp_path))
+    return calls
+
+
+def sales(names, values):
+    return pd.DataFrame({"brandName": names, "total_sales": values})
+
+
+def decode(img_html: str) -> str:
+    encoded = img_html.split("base64,")[1].split('"')[0]
+    return base64.b64decode(encoded).decode("utf-8")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Cache keys
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestChartKey:
+
+    def test_same_chart_same_key(self):
+        df = sales(["A", "B"], [10.0, 5.0])
+        assert chart_key(bar_chart(df, "brandName", "total_sales", "Top")) == \
+               chart_key(bar_chart(df.copy(), "brandName", "total_sales", "Top"))
+
+    def test_data_title_and_format_change_key(self):
+        base = bar_chart(sales(["A", "B"], [10.0, 5.0]), "brandName", "total_sales", "Top")
+        keys = {
+            chart_key(base),
+            chart_key(base, "svg"),
+            chart_key(bar_chart(sales(["A", "B"], [10.0, 6.0]), "brandName", "total_sales", "Top")),
+            chart_key(bar_chart(sales(["A", "C"], [10.0, 5.0]), "brandName", "total_sales", "Top")),
+            chart_key(bar_chart(sales(["A", "B"], [10.0, 5.0]), "brandName", "total_sales", "Other")),
+        }
+        assert len(keys) == 5
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# plot_charts
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestPlotCharts:
+
+    def test_one_batch_per_call_and_order_kept(self, batches):
+        specs = [
+            (sales(["A"], [1.0]), "brandName", "total_sales", "Brands"),
+            (sales([], []),       "brandName", "total_sales", "Empty"),
+            (sales(["B"], [2.0]), "brandName", "total_sales", "Categories"),
+        ]
+        html = plot_charts(specs, "png")
+        assert batches == [2]
+        assert html[1] == ""
+        assert decode(html[0]) == "png:Brands"
+        assert decode(html[2]) == "png:Categories"
+        assert 'src="data:image/png;base64,' in html[0]
+
+    def test_unchanged_charts_come_from_cache(self, batches):
+        spec = (sales(["A", "B"], [10.0, 5.0]), "brandName", "total_sales", "Brands")
+        first  = plot_charts([spec], "png")
+        second = plot_charts([spec], "png")
+        assert batches == [1]
+        assert first == second
+
+        plot_charts([(sales(["A", "B"], [10.0, 7.0]), "brandName", "total_sales", "Brands")], "png")
+        assert batches == [1, 1]
+
+    def test_svg_path(self, batches):
+        html = plot_charts([(sales(["A"], [1.0]), "brandName", "total_sales", "Brands")], "svg")
+        assert 'src="data:image/svg+xml;base64,' in html[0]
+        assert decode(html[0]) == "svg:Brands"
+
+    def test_no_cache_dir_still_renders(self, batches, monkeypatch):
+        monkeypatch.setattr(chart_render, "CHART_CACHE_DIR", "")
+        spec = (sales(["A"], [1.0]), "brandName", "total_sales", "Brands")
+        assert decode(plot_charts([spec], "png")[0]) == "png:Brands"
+        plot_charts([spec], "png")
+        assert batches == [1, 1]
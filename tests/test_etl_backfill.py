@@ -0,0 +1,131 @@
+"""
+tests/test_etl_backfill.py
+─────────────────────────────────────────────────────────────────────────────
+Checks the backfill checkpoint in etl/etl_pip.py: a window that downloads
+but is empty counts as completed, while a failed download (download_csv
+returns None) or a failed aggregate load stops the run without advancing
+the checkpoint.
+CSVDownloader and the billing_data load are replaced by fakes, and the
+aggregate load's DB connection fails on demand — no API, no DB.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+import json
+from datetime import date
+
+import pandas as pd
+import pytest
+
+# Allow import from project root; etl_pip imports agg_insert as a sibling
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "etl"))
+
+# DB settings are read at import time — never used here
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "test")
+
+import etl_pip
+import agg_insert
+
+
+class FakeDownloader:
+    """Returns an empty frame per window, None for dates in `failing`, and
+    one billing row for dates in `with_rows`."""
+
+    failing   = set()
+    with_rows = set()
+
+    def __init__(self, **_):
+        pass
+
+    def download_csv(self, order_type="online", from_date=None, to_date=None):
+        if from_date in self.failing:
+            return None
+        if from_date in self.with_rows:
+            return pd.DataFrame({
+                "invoice": ["INV-1"], "orderDate": [pd.Timestamp(from_date)],
+                "totalProductPrice": [100.0], "quantity": [1], "brandName": ["Amul"],
+                "storeName": ["Downtown"], "subCategoryOf": ["Dairy"], "productName": ["Milk"],
+            })
+        return pd.DataFrame()
+
+
+@pytest.fixture
+def run_backfill(tmp_path, monkeypatch):
+    for name in ("API_BASE_URL", "API_USERNAME", "API_PASSWORD"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setattr(etl_pip, "CSVDownloader", FakeDownloader)
+    monkeypatch.setattr(etl_pip, "pandas_validate_schema", lambda df, allow_empty=False: df)
+    monkeypatch.setattr(etl_pip, "pandas_transform_data", lambda df: df)
+    monkeypatch.setattr(etl_pip, "pandas_load_to_postgres", lambda df: None)
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    def refuse_connection(**_):
+        raise agg_insert.psycopg2.OperationalError("connection refused")
+
+    def run(start, end, failing=(), agg_failing=(), concurrency=2):
+        FakeDownloader.failing   = set(failing)
+        FakeDownloader.with_rows = set(agg_failing)
+        if agg_failing:
+            monkeypatch.setattr(agg_insert.psycopg2, "connect", refuse_connection)
+        return etl_pip.backfill(start, end, window="day", concurrency=concurrency,
+                                checkpoint_path=checkpoint)
+
+    def last_completed():
+        if not os.path.exists(checkpoint):
+            return None
+        with open(checkpoint) as f:
+            return json.load(f)["last_completed"]
+
+    return run, last_completed
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Checkpoint
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestBackfillCheckpoint:
+
+    def test_empty_windows_complete(self, run_backfill):
+        run, last_completed = run_backfill
+        summary = run(date(2024, 12, 1), date(2024, 12, 3))
+        assert [row["rows"] for row in summary] == [0, 0, 0]
+        assert last_completed() == "2024-12-03"
+
+    def test_failed_download_keeps_checkpoint(self, run_backfill):
+        run, last_completed = run_backfill
+        with pytest.raises(RuntimeError, match="Download failed"):
+            run(date(2024, 12, 1), date(2024, 12, 4), failing={"2024-12-03"})
+        assert last_completed() == "2024-12-02"
+
+    def test_failed_first_window_writes_no_checkpoint(self, run_backfill):
+        run, last_completed = run_backfill
+        with pytest.raises(RuntimeError):
+            run(date(2024, 12, 1), date(2024, 12, 2), failing={"2024-12-01"})
+        assert last_completed() is None
+
+    def test_resume_retries_failed_window(self, run_backfill):
+        run, last_completed = run_backfill
+        with pytest.raises(RuntimeError):
+            run(date(2024, 12, 1), date(2024, 12, 3), failing={"2024-12-02"})
+        summary = run(date(2024, 12, 1), date(2024, 12, 3))
+        assert [row["window"].split(" ")[0] for row in summary] == ["2024-12-02", "2024-12-03"]
+        assert last_completed() == "2024-12-03"
+
+    def test_failed_aggregate_load_keeps_checkpoint(self, run_backfill):
+        run, last_completed = run_backfill
+        with pytest.raises(RuntimeError, match="Aggregate load failed.*connection refused"):
+            run(date(2024, 12, 1), date(2024, 12, 3), agg_failing={"2024-12-02"})
+        assert last_completed() == "2024-12-01"
+
+    @pytest.mark.parametrize("concurrency", [0, -1])
+    def test_concurrency_below_one_rejected(self, run_backfill, concurrency):
+        run, last_completed = run_backfill
+        with pytest.raises(ValueError, match="concurrency must be at least 1"):
+            run(date(2024, 12, 1), date(2024, 12, 2), concurrency=concurrency)
+        assert last_completed() is None
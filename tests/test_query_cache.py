@@ -0,0 +1,106 @@
+"""
+tests/test_query_cache.py
+─────────────────────────────────────────────────────────────────────────────
+Checks the queries/* result cache in automation/queries/cache.py: a miss
+looks MAX(orderdate) up once and hands it to the fetch as last_date, a
+failed lookup falls back to the uncached fetch, and hit/miss counts are
+kept in-process for the single push at exit.
+The freshness lookup is replaced by a fake — no DB.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation.queries import cache
+from automation.queries.cache import cached_query
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Fake MAX(orderdate) lookup; records each table it is asked for."""
+    calls = []
+
+    def fake_latest(table):
+        calls.append(table)
+        if table == "broken_sales":
+            raise RuntimeError("connection refused")
+        return date(2025, 1, 31)
+
+    monkeypatch.setattr(cache, "_latest_orderdate", fake_latest)
+    monkeypatch.setattr(cache, "record_query_cache", None)
+    monkeypatch.setattr(cache, "_requests", {})
+    cache.clear_query_cache()
+    yield calls
+    cache.clear_query_cache()
+
+
+def make_fetch(table, seen):
+    @cached_query(table)
+    def fetch_sales(days=7, last_date=None):
+        seen.append(last_date)
+        return pd.DataFrame({"sales": [days * 10.0]})
+    return fetch_sales
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# cached_query
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestCachedQuery:
+
+    def test_miss_passes_looked_up_date(self, lookups):
+        seen  = []
+        fetch = make_fetch("brand_sales", seen)
+        fetch(7)
+        assert lookups == ["brand_sales"]
+        assert seen == [date(2025, 1, 31)]
+
+    def test_hit_skips_fetch(self, lookups):
+        seen  = []
+        fetch = make_fetch("brand_sales", seen)
+        first  = fetch(7)
+        second = fetch(7)
+        assert len(seen) == 1
+        assert second.equals(first) and second is not first
+
+    def test_explicit_last_date_skips_lookup(self, lookups):
+        seen  = []
+        fetch = make_fetch("brand_sales", seen)
+        fetch(7, date(2025, 1, 1))
+        fetch(7, last_date=date(2025, 1, 2))
+        assert lookups == []
+        assert seen == [date(2025, 1, 1), date(2025, 1, 2)]
+
+    def test_failed_lookup_runs_fetch_uncached(self, lookups):
+        seen  = []
+        fetch = make_fetch("broken_sales", seen)
+        assert fetch(7)["sales"].tolist() == [70.0]
+        assert seen == [None]
+        assert cache.query_cache_stats() == {}
+
+    def test_counts_kept_in_process(self, lookups):
+        fetch = make_fetch("brand_sales", [])
+        fetch(7)
+        fetch(7)
+        fetch(14)
+        assert cache.query_cache_stats() == {"fetch_sales": {"hit": 1, "miss": 2}}
+
+    def test_counts_pushed_once(self, lookups, monkeypatch):
+        pushes = []
+        monkeypatch.setattr(cache, "record_query_cache", pushes.append)
+        fetch = make_fetch("brand_sales", [])
+        fetch(7)
+        fetch(7)
+        assert pushes == []
+        cache._push_cache_stats()
+        assert pushes == [{"fetch_sales": {"hit": 1, "miss": 1}}]
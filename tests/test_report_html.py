@@ -0,0 +1,103 @@
+"""
+tests/test_report_html.py
+─────────────────────────────────────────────────────────────────────────────
+Checks the shared report HTML in automation/report_html.py: table cells are
+formatted like the former row-by-row renderer (stock as whole numbers, N/A,
+negative stock in red), text is escaped, and the page template fills in
+sections and report fragments.
+No DB — pure functions only.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation.report_html import df_to_html_with_stock, render_report_html, report_section
+
+
+def brand_table() -> pd.DataFrame:
+    return pd.DataFrame({
+        "brandName":       ["Amul", "Dal & Co <x>"],
+        "total_sales":     [1234.5, 99.0],
+        "quantity_sold":   [12.0, 3.0],
+        "current_stock":   [np.nan, -4.0],
+        "contrib_percent": ["92.58%", "7.42%"],
+    })
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# df_to_html_with_stock
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestTableHtml:
+
+    def test_empty_frame(self):
+        assert df_to_html_with_stock(pd.DataFrame()) == ""
+
+    def test_cells_and_headers(self):
+        html = df_to_html_with_stock(brand_table())
+        assert html.startswith('<table class="styled-table"><thead><tr><th>Brand</th>'
+                               "<th>Sales (₹)</th><th>Qty Sold</th><th>Stock</th>"
+                               "<th>Contrib%</th></tr></thead>")
+        assert "<tr><td>Amul</td><td>1234.5</td><td>12.0</td><td>N/A</td>" \
+               "<td>92.58%</td></tr>" in html
+        assert '<td style="color:#dc3545;font-weight:bold;">-4</td>' in html
+
+    def test_text_is_escaped(self):
+        html = df_to_html_with_stock(brand_table())
+        assert "<td>Dal &amp; Co &lt;x&gt;</td>" in html
+
+    def test_positive_stock_rounded(self):
+        df = brand_table().assign(current_stock=[7.6, 0.0])
+        html = df_to_html_with_stock(df)
+        assert "<td>8</td>" in html and "<td>0</td>" in html
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# render_report_html
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestReportPage:
+
+    def render(self, **overrides):
+        context = dict(
+            store_name="East & West", report_label="Monthly", period_label="Month",
+            logo_src="file:///tns.png", start_str="01 Sep 2025", end_str="30 Sep 2025",
+            total_sales=1234567.891, total_profit=2345.5, avg_profit_margin=18.456,
+            comparison_html='<div class="cmp">+4.00%</div>',
+            sections=[
+                report_section("Top 50 Brands (by Sales)", "<table>b</table>", "<img b>",
+                               "<p>brand rec</p>"),
+                report_section("Top 50 Categories (by Sales)", "<table>c</table>", "",
+                               "<p>category rec</p>", spacer_before=True),
+            ],
+        )
+        context.update(overrides)
+        return render_report_html(**context)
+
+    def test_header_values(self):
+        page = self.render()
+        assert "<title>East &amp; West - Monthly Store Report</title>" in page
+        assert "Month: 01 Sep 2025 to 30 Sep 2025" in page
+        assert "Total Monthly Sales: ₹1,234,567.89" in page
+        assert "₹2,345.50" in page and "18.46%" in page
+
+    def test_fragments_inserted_unescaped_in_order(self):
+        page = self.render(footer_blocks=["<p>rtv</p>"])
+        order = ['<div class="cmp">', "<table>b</table>", "<img b>", "<p>brand rec</p>",
+                 '<div style="height: 240px;"></div>', "<table>c</table>",
+                 "<p>category rec</p>", "<p>rtv</p>"]
+        positions = [page.index(fragment) for fragment in order]
+        assert positions == sorted(positions)
+
+    def test_spacer_only_where_requested(self):
+        page = self.render()
+        assert page.count('<div style="height: 240px;"></div>') == 1
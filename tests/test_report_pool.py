@@ -0,0 +1,126 @@
+"""
+tests/test_report_pool.py
+─────────────────────────────────────────────────────────────────────────────
+Checks the per-store render pool in automation/report_pool.py: every store
+is rendered, a failing store does not stop the others, renders overlap
+when workers > 1, and stage timings reach the summary.
+No DB, no Spark — render functions are plain Python.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation import report_pool
+from automation.report_pool import RenderPool, StageTimings
+
+
+@pytest.fixture(autouse=True)
+def no_metrics(monkeypatch):
+    """Keep the tests off the Pushgateway."""
+    monkeypatch.setattr(report_pool, "record_report", None)
+    monkeypatch.setattr(report_pool, "record_stores_processed", None)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# StageTimings
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestStageTimings:
+
+    def test_accumulates_repeated_stages(self):
+        timings = StageTimings()
+        for _ in range(3):
+            with timings.stage("llm"):
+                time.sleep(0.01)
+        assert set(timings.seconds) == {"llm"}
+        assert timings.seconds["llm"] >= 0.03
+
+    def test_records_stage_that_raises(self):
+        timings = StageTimings()
+        with pytest.raises(ValueError):
+            with timings.stage("pdf"):
+                raise ValueError("wkhtmltopdf failed")
+        assert "pdf" in timings.seconds
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# RenderPool
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestRenderPool:
+
+    def test_renders_every_store(self):
+        rendered = []
+
+        def render(store, data, timings):
+            with timings.stage("charts"):
+                rendered.append((store, data))
+
+        with RenderPool(render, "weekly", workers=3) as pool:
+            for i in range(6):
+                pool.submit(f"Store {i}", i)
+
+        assert sorted(rendered) == [(f"Store {i}", i) for i in range(6)]
+        assert all(r["ok"] for r in pool.results)
+        assert all("charts" in r["stages"] for r in pool.results)
+
+    def test_failure_is_isolated(self, capsys):
+        def render(store, data, timings):
+            if store == "Bad Store":
+                raise RuntimeError("upload failed")
+
+        with RenderPool(render, "monthly", workers=2) as pool:
+            for store in ["Store A", "Bad Store", "Store B"]:
+                pool.submit(store, None)
+            pool.record_failure("Empty Store", "aggregate", ValueError("no rows"))
+
+        status = {r["store"]: r["ok"] for r in pool.results}
+        assert status == {"Store A": True, "Bad Store": False,
+                          "Store B": True, "Empty Store": False}
+        out = capsys.readouterr().out
+        assert "2 succeeded, 2 failed" in out
+        assert "Bad Store: upload failed" in out
+
+    def test_workers_render_concurrently(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def render(store, data, timings):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        with RenderPool(render, "weekly", workers=4) as pool:
+            for i in range(8):
+                pool.submit(f"Store {i}", None)
+
+        assert peak[0] > 1
+
+    def test_summary_lists_stages(self, capsys):
+        def render(store, data, timings):
+            with timings.stage("llm"):
+                pass
+            with timings.stage("pdf"):
+                pass
+
+        with RenderPool(render, "weekly", workers=1) as pool:
+            with pool.timings.stage("aggregate (all stores)"):
+                pass
+            pool.submit("Store A", None)
+
+        out = capsys.readouterr().out
+        for line in ["aggregate (all stores)", "llm", "pdf", "render (store)"]:
+            assert line in out
@@ -0,0 +1,119 @@
+"""
+tests/test_stock_store.py
+─────────────────────────────────────────────────────────────────────────────
+Checks the shared stock data store in automation/stock_store.py: a store's
+CSV is parsed once per file version, rewritten CSVs are picked up, the
+rollups match the former weekly_reports.load_stock_lookups dicts, and a
+missing CSV gives the empty snapshot.
+Uses temporary CSVs only — no DB.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation import stock_store
+from automation.stock_store import EMPTY_SNAPSHOT, find_stock_csv, load_stock
+
+
+STOCK_CSV = """productName,brand,categoryName,quantity,sellingPrice,costPrice,vendorName
+Milk 1L,Amul,Dairy,4,60,50,Amul Dist
+Butter,Amul,Dairy,-2,55,45,Amul Dist
+Bread,Modern,Bakery,0,40,,Modern Foods
+Bread,Modern,Bakery,7,40,30,Modern Foods
+Jam,Kissan,Spreads,abc,120,90,
+"""
+
+
+@pytest.fixture
+def stock_dir(tmp_path, monkeypatch):
+    """A stock directory with two stores; in-memory cache only, counting parses."""
+    (tmp_path / "Store A.csv").write_text(STOCK_CSV)
+    (tmp_path / "Mall_Road.csv").write_text(STOCK_CSV)
+
+    parses = []
+    real_parse = stock_store._parse_csv
+
+    def counting_parse(path):
+        parses.append(os.path.basename(path))
+        return real_parse(path)
+
+    monkeypatch.setattr(stock_store, "_parse_csv", counting_parse)
+    monkeypatch.setattr(stock_store, "STOCK_CACHE_DIR", "")
+    stock_store.clear_stock_cache()
+    yield str(tmp_path), parses
+    stock_store.clear_stock_cache()
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Lookup + parsing
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestLoadStock:
+
+    def test_missing_store(self, stock_dir):
+        directory, parses = stock_dir
+        assert load_stock("Nowhere", directory) is EMPTY_SNAPSHOT
+        assert parses == []
+
+    def test_slash_in_name_uses_safe_file(self, stock_dir):
+        directory, _ = stock_dir
+        assert find_stock_csv("Mall/Road", directory).endswith("Mall_Road.csv")
+
+    def test_numeric_columns_coerced(self, stock_dir):
+        directory, _ = stock_dir
+        df = load_stock("Store A", directory).frame
+        assert df["quantity"].tolist() == [4.0, -2.0, 0.0, 7.0, 0.0]
+        assert df["costPrice"].tolist() == [50.0, 45.0, 0.0, 30.0, 90.0]
+        assert pd.isna(df["vendorName"].iloc[4])
+
+    def test_parsed_once_and_shared(self, stock_dir):
+        directory, parses = stock_dir
+        first  = load_stock("Store A", directory)
+        second = load_stock("Store A", directory)
+        assert parses == ["Store A.csv"]
+        assert first.frame is second.frame
+
+    def test_rewritten_csv_is_reparsed(self, stock_dir):
+        directory, parses = stock_dir
+        load_stock("Store A", directory)
+        path = os.path.join(directory, "Store A.csv")
+        with open(path, "a") as f:
+            f.write("Tea,Tata,Beverages,9,200,150,Tata Dist\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        snapshot = load_stock("Store A", directory)
+        assert parses == ["Store A.csv", "Store A.csv"]
+        assert snapshot.product_stock["Tea"] == 9.0
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Rollups
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestRollups:
+
+    def test_match_former_lookups(self, stock_dir):
+        directory, _ = stock_dir
+        snapshot = load_stock("Store A", directory)
+
+        df = pd.read_csv(os.path.join(directory, "Store A.csv"))
+        df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").fillna(0)
+        assert snapshot.brand_stock    == df.groupby("brand")["quantity"].sum().to_dict()
+        assert snapshot.category_stock == df.groupby("categoryName")["quantity"].sum().to_dict()
+        assert snapshot.product_stock  == df.set_index("productName")["quantity"].to_dict()
+
+    def test_values(self, stock_dir):
+        directory, _ = stock_dir
+        snapshot = load_stock("Store A", directory)
+        assert snapshot.brand_stock == {"Amul": 2.0, "Kissan": 0.0, "Modern": 7.0}
+        assert snapshot.product_stock["Bread"] == 7.0     # last row wins, as before
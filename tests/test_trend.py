@@ -0,0 +1,88 @@
+"""
+tests/test_trend.py
+─────────────────────────────────────────────────────────────────────────────
+Checks that the vectorized formatters in automation/queries/trend.py give
+byte-identical strings to the scalar helpers the tables used row by row.
+No DB — pure functions only.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation.queries.trend import (
+    get_trend_arrow,
+    trend_arrows,
+    format_count,
+    format_amount,
+)
+
+
+def make_pairs(n: int = 2000, seed: int = 3) -> pd.DataFrame:
+    """Random today / average pairs plus the awkward cases."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "today":   np.round(rng.gamma(2.0, 500.0, n), 2),
+        "average": np.round(rng.gamma(2.0, 500.0, n), 2),
+    })
+    edge = pd.DataFrame({
+        "today":   [0.0, 5.0, 5.0, 100.0, 0.0, np.nan, 1.05, 3.0, 1e9,  -4.0],
+        "average": [0.0, 0.0, np.nan, 100.0, 7.0, 3.0, 1.0,  -3.0, 1e-3, 2.0],
+    })
+    return pd.concat([df, edge], ignore_index=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# trend_arrows
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestTrendArrows:
+
+    def test_matches_scalar_helper(self):
+        df = make_pairs()
+        expected = df.apply(lambda row: get_trend_arrow(row["today"], row["average"]), axis=1)
+        assert trend_arrows(df["today"], df["average"]).tolist() == expected.tolist()
+
+    def test_integer_today_against_float_average(self):
+        today   = pd.Series([3, 0, 12, 7], dtype="int64")
+        average = pd.Series([2.5, 0.0, 12.0, 9.33])
+        expected = [get_trend_arrow(t, a) for t, a in zip(today, average)]
+        assert trend_arrows(today, average).tolist() == expected
+
+    def test_custom_no_baseline_label(self):
+        out = trend_arrows(pd.Series([10.0, 10.0]), pd.Series([0.0, 5.0]), no_baseline="→ (N/A)")
+        assert out.tolist() == ["→ (N/A)", "🡅 (100.0%)"]
+
+    def test_keeps_index(self):
+        today = pd.Series([1.0, 2.0], index=[7, 3])
+        assert list(trend_arrows(today, pd.Series([1.0, 1.0], index=[7, 3])).index) == [7, 3]
+
+    def test_empty(self):
+        assert trend_arrows(pd.Series([], dtype=float), pd.Series([], dtype=float)).empty
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# format_count / format_amount
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestNumberFormatting:
+
+    def test_format_count_matches_fstring(self):
+        values = pd.Series([0, 7, 1234, 9876543, 12.9])
+        assert format_count(values).tolist() == [f"{int(x):,}" for x in values]
+
+    def test_format_amount_matches_fstring(self):
+        values = make_pairs()["today"].fillna(0)
+        assert format_amount(values).tolist() == [f"{float(x):,.2f}" for x in values]
+
+    def test_format_amount_rounding_halves(self):
+        values = pd.Series([0.125, 2.675, 1234.005, -0.004])
+        assert format_amount(values).tolist() == [f"{float(x):,.2f}" for x in values]
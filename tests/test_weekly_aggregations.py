@@ -0,0 +1,208 @@
+"""
+tests/test_weekly_aggregations.py
+─────────────────────────────────────────────────────────────────────────────
+Checks that the weekly report's batch mode (one scan, all stores) gives the
+same StoreWeek as the per-store functions in automation/weekly_aggregations.py:
+comparison, financials and the brand / category / product tables, including
+contribution %, the top-N cut, a zero-sales store and a store with no rows in
+its current week.
+
+Runs on a local Spark session built from an in-memory frame — no DB, no JDBC.
+Skipped when pyspark or a Java runtime is not available.
+
+Run:  pytest tests/ -v
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import sys
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyspark")
+
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+
+# Allow import from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation.weekly_aggregations import (
+    BATCH_DIMENSIONS,
+    StoreWeek,
+    add_week_buckets,
+    aggregate_store_weeks,
+    comparison_from_window,
+    compute_brand_agg,
+    compute_category_agg,
+    compute_product_agg,
+    compute_total_sales_profit,
+)
+
+
+# Each store's week_end, as get_store_week_ends would return it.
+# "Dormant" has rows only in its previous two weeks.
+WEEK_ENDS = {
+    "Big Store":  date(2025, 3, 30),
+    "Small Shop": date(2025, 3, 28),
+    "Zero Sales": date(2025, 3, 30),
+    "Dormant":    date(2025, 3, 30),
+}
+
+
+def billing_rows() -> list:
+    """billing_data rows for four stores, spread over four weeks (None → NULL, as from JDBC)."""
+    rows = []
+
+    def add(store, day, brand, category, product, price, cost, qty):
+        rows.append((store, day, brand, category, product, price, cost, qty))
+
+    # Big Store: 60 brands / 120 products this week → both top-N cuts apply
+    end = WEEK_ENDS["Big Store"]
+    for i in range(120):
+        add("Big Store", end - timedelta(days=i % 7), f"Brand {i % 60:02d}",
+            f"Category {i % 8}", f"Product {i:03d}",
+            round(50 + i * 7.31, 2), None if i % 11 == 0 else round(20 + i * 2.17, 2),
+            float(1 + i % 4))
+    for i in range(30):        # earlier weeks, and one day outside the window
+        add("Big Store", end - timedelta(days=7 + i % 15), f"Brand {i:02d}",
+            "Category 0", f"Product {i:03d}", 100.0 + i, 60.0, 1.0)
+    add("Big Store", end - timedelta(days=21), "Brand 00", "Category 0", "Product 000",
+        9999.0, 1.0, 1.0)
+
+    # Small Shop: a few rows, negative margin, returns (negative sales)
+    end = WEEK_ENDS["Small Shop"]
+    add("Small Shop", end,                     "Amul", "Dairy", "Milk",   120.0, 150.0, 2.0)
+    add("Small Shop", end - timedelta(days=6), "Amul", "Dairy", "Butter", 80.0,  None,  1.0)
+    add("Small Shop", end - timedelta(days=3), "Tata", "Tea",   "Tea",    -40.0, 30.0,  -1.0)
+    add("Small Shop", end - timedelta(days=9), "Tata", "Tea",   "Tea",    300.0, 200.0, 3.0)
+
+    # Zero Sales: rows this week, all at zero value
+    end = WEEK_ENDS["Zero Sales"]
+    add("Zero Sales", end,                     "Free", "Promo", "Sample A", 0.0, 5.0, 1.0)
+    add("Zero Sales", end - timedelta(days=2), "Free", "Promo", "Sample B", 0.0, 0.0, 2.0)
+    add("Zero Sales", end - timedelta(days=8), "Free", "Promo", "Sample A", 50.0, 5.0, 1.0)
+
+    # Dormant: nothing in the current week
+    end = WEEK_ENDS["Dormant"]
+    add("Dormant", end - timedelta(days=8),  "Old", "Misc", "Thing", 70.0, 30.0, 1.0)
+    add("Dormant", end - timedelta(days=15), "Old", "Misc", "Thing", 90.0, 30.0, 1.0)
+
+    return rows
+
+
+@pytest.fixture(scope="module")
+def spark():
+    try:
+        session = (
+            SparkSession.builder
+            .appName("test_weekly_aggregations")
+            .master("local[1]")
+            .config("spark.sql.session.timeZone", "UTC")
+            .config("spark.sql.shuffle.partitions", "4")
+            .config("spark.ui.enabled", "false")
+            .getOrCreate()
+        )
+    except Exception as e:
+        pytest.skip(f"Spark could not start: {e}")
+    yield session
+    session.stop()
+
+
+@pytest.fixture(scope="module")
+def billing(spark):
+    schema = ("storeName string, orderDate date, brandName string, categoryName string, "
+              "productName string, totalProductPrice double, costPrice double, quantity double")
+    return spark.createDataFrame(billing_rows(), schema=schema).cache()
+
+
+@pytest.fixture(scope="module")
+def store_weeks() -> pd.DataFrame:
+    return pd.DataFrame(list(WEEK_ENDS.items()), columns=["storeName", "week_end"])
+
+
+@pytest.fixture(scope="module")
+def batch(spark, billing, store_weeks) -> dict:
+    """aggregate_store_weeks on the rows load_all_stores_window's query selects."""
+    week_ends = spark.createDataFrame(store_weeks, schema="storeName string, week_end date")
+    window = (
+        billing.join(week_ends, "storeName")
+        .filter((F.col("orderDate") > F.date_sub("week_end", 21)) &
+                (F.col("orderDate") <= F.col("week_end")))
+    )
+    return aggregate_store_weeks(add_week_buckets(window), store_weeks)
+
+
+def per_store(billing, store_name: str):
+    """What compute_store_week builds from its two per-store JDBC reads, or None."""
+    week_end   = WEEK_ENDS[store_name]
+    week_start = week_end - timedelta(days=6)
+    rows       = billing.filter(F.col("storeName") == store_name)
+
+    df_week = rows.filter((F.col("orderDate") >= F.lit(week_start)) &
+                          (F.col("orderDate") <= F.lit(week_end)))
+    if df_week.count() == 0:
+        return None
+    comparison_window = (
+        rows.filter((F.col("orderDate") > F.lit(week_end - timedelta(days=21))) &
+                    (F.col("orderDate") <= F.lit(week_end)))
+        .select("totalProductPrice", "orderDate")
+    )
+    return StoreWeek(
+        week_start, week_end,
+        comparison_from_window(comparison_window, week_end),
+        compute_brand_agg(df_week),
+        compute_category_agg(df_week),
+        compute_product_agg(df_week),
+        compute_total_sales_profit(df_week),
+    )
+
+
+def assert_same_store_week(got: StoreWeek, expected: StoreWeek):
+    assert (got.week_start, got.week_end) == (expected.week_start, expected.week_end)
+    assert got.comparison == pytest.approx(expected.comparison)
+    assert got.financials == pytest.approx(expected.financials)
+    for field in ("brand_df", "category_df", "product_df"):
+        pd.testing.assert_frame_equal(
+            getattr(got, field).reset_index(drop=True),
+            getattr(expected, field).reset_index(drop=True),
+            check_dtype=False, obj=field,
+        )
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Batch vs per-store
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestBatchMatchesPerStore:
+
+    @pytest.mark.parametrize("store_name", ["Big Store", "Small Shop", "Zero Sales"])
+    def test_store_week_matches(self, billing, batch, store_name):
+        assert_same_store_week(batch[store_name], per_store(billing, store_name))
+
+    def test_top_n_cut(self, batch):
+        limits = dict(BATCH_DIMENSIONS)
+        week = batch["Big Store"]
+        assert len(week.brand_df) == limits["brandName"] == 50
+        assert len(week.product_df) == limits["productName"] == 100
+        assert week.product_df["total_sales"].is_monotonic_decreasing
+        assert len(week.category_df) == 8
+
+    def test_contribution_is_share_of_store_week(self, batch):
+        week = batch["Small Shop"]
+        contrib = dict(zip(week.brand_df["brandName"], week.brand_df["contrib_percent"]))
+        assert contrib == {"Amul": pytest.approx(125.0), "Tata": pytest.approx(-25.0)}
+
+    def test_zero_sales_store(self, batch):
+        week = batch["Zero Sales"]
+        assert week.financials["total_weekly_sales"] == 0.0
+        assert week.brand_df["contrib_percent"].tolist() == [0.0]
+        assert week.product_df["profit_margin"].tolist() == [0.0, 0.0]
+        assert week.comparison == {"current_week_sales": 0.0, "prev_2_weeks_avg": 25.0}
+
+    def test_store_without_current_week_is_skipped(self, billing, batch):
+        assert per_store(billing, "Dormant") is None
+        assert "Dormant" not in batch
+        assert set(batch) == {"Big Store", "Small Shop", "Zero Sales"}